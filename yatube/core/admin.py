@@ -0,0 +1,134 @@
+from django.contrib import admin
+from django.contrib.admin.views.main import ORDER_VAR, ChangeList
+from django.contrib.admin.widgets import AutocompleteSelect
+
+from .models import Job
+from .paginator import EstimatedCountPaginator
+
+CURSOR_VAR = 'after'
+
+
+class KeysetChangeList(ChangeList):
+    """Список объектов с переходом по страницам по ключу ``pk``.
+
+    Вместо ``OFFSET`` следующая страница выбирается условием
+    ``pk < последний показанный pk``, поэтому далекие страницы
+    открываются так же быстро, как первая. При сортировке по колонке
+    список работает как обычный ``ChangeList``.
+    """
+
+    def __init__(self, request, *args, **kwargs):
+        self.cursor = None
+        if CURSOR_VAR in request.GET:
+            params = request.GET.copy()
+            try:
+                self.cursor = int(params.pop(CURSOR_VAR)[-1])
+            except ValueError:
+                # Испорченный курсор открывает первую страницу.
+                pass
+            request.GET = params
+        self.keyset = ORDER_VAR not in request.GET
+        super().__init__(request, *args, **kwargs)
+
+    def get_results(self, request):
+        if not self.keyset or self.show_all:
+            self.keyset = False
+            return super().get_results(request)
+        queryset = self.queryset.order_by('-pk')
+        if self.cursor is not None:
+            queryset = queryset.filter(pk__lt=self.cursor)
+        # Сначала выбираются только ключи по индексу: список должен
+        # остаться QuerySet, его использует формсет list_editable.
+        ids = list(
+            queryset.values_list('pk', flat=True)[:self.list_per_page + 1]
+        )
+        self.result_list = queryset.filter(pk__in=ids[:self.list_per_page])
+        self.next_cursor = None
+        if len(ids) > self.list_per_page:
+            self.next_cursor = ids[self.list_per_page - 1]
+        self.paginator = self.model_admin.get_paginator(
+            request, self.queryset, self.list_per_page
+        )
+        self.result_count = self.paginator.count
+        self.full_result_count = None
+        self.show_full_result_count = False
+        self.show_admin_actions = True
+        self.can_show_all = False
+        self.multi_page = (
+            self.cursor is not None or self.next_cursor is not None
+        )
+
+    def next_page_url(self):
+        return self.get_query_string({CURSOR_VAR: self.next_cursor})
+
+    def first_page_url(self):
+        return self.get_query_string(remove=[CURSOR_VAR])
+
+
+class PreloadedAutocompleteSelect(AutocompleteSelect):
+    """Автодополнение, которое берет подпись выбранного значения из уже
+    загруженного объекта, а не отдельным запросом на каждую строку."""
+    preloaded = None
+
+    def optgroups(self, name, value, attr=None):
+        selected = {str(v) for v in value if v not in ('', None)}
+        if self.preloaded is None or not selected <= set(self.preloaded):
+            return super().optgroups(name, value, attr)
+        default = (None, [], 0)
+        if not self.is_required:
+            default[1].append(self.create_option(name, '', '', False, 0))
+        for option_value in selected:
+            default[1].append(self.create_option(
+                name, option_value, self.preloaded[option_value], True,
+                len(default[1])
+            ))
+        return [default]
+
+
+class HighVolumeAdminMixin:
+    """Настройки списка объектов для таблиц с миллионами строк."""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        autocomplete = self.get_autocomplete_fields(request)
+        if 'widget' not in kwargs and db_field.name in autocomplete:
+            kwargs['widget'] = PreloadedAutocompleteSelect(
+                db_field.remote_field, self.admin_site,
+                using=kwargs.get('using')
+            )
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+    def get_changelist_formset(self, request, **kwargs):
+        formset = super().get_changelist_formset(request, **kwargs)
+        fields = [
+            name for name in self.get_autocomplete_fields(request)
+            if name in self.list_editable
+        ]
+
+        class PreloadedFormSet(formset):
+            def _construct_form(self, i, **kwargs):
+                form = super()._construct_form(i, **kwargs)
+                for name in fields:
+                    widget = form.fields[name].widget
+                    widget = getattr(widget, 'widget', widget)
+                    related = getattr(form.instance, name)
+                    widget.preloaded = (
+                        {str(related.pk): str(related)} if related else {}
+                    )
+                return form
+
+        return PreloadedFormSet
+
+
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'name', 'status', 'attempts', 'run_at', 'created')
+    list_filter = ('status', 'name')
+    search_fields = ('dedup_key',)
+    readonly_fields = ('locked_by', 'locked_at', 'last_error')
+
+
+admin.site.register(Job, JobAdmin)
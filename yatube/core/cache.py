@@ -0,0 +1,21 @@
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+
+from . import metrics
+
+_MISSING = object()
+
+
+class InstrumentedLocMemCache(LocMemCache):
+    """LocMemCache, который считает попадания и промахи для метрик."""
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _MISSING, version)
+        hit = value is not _MISSING
+        metrics.record_cache(key, hit)
+        return value if hit else default
+
+
+def cache_is_local(alias='default'):
+    """True, если кэш ``alias`` живет в памяти одного процесса."""
+    return isinstance(caches[alias], LocMemCache)
@@ -0,0 +1,195 @@
+"""Общий кэш страниц с пользовательскими фрагментами.
+
+Страница рендерится один раз от имени анонимного пользователя, а на
+месте фрагментов, зависящих от пользователя (шапка, вкладки, форма
+комментария, кнопки), тег ``{% hole %}`` оставляет HTML-комментарий
+с именем шаблона и параметрами. Этот общий текст кэшируется через
+``get_or_refresh``, а при каждом запросе метки заменяются маленькими
+рендерами фрагментов для текущего пользователя.
+
+Метки оставляются и на страницах без общего кэша: их заполняет
+``core.middleware.HoleMiddleware`` перед отправкой ответа. Так
+фрагменты одного шаблона со всей страницы, например кнопки лайков на
+карточках ленты, получают контекст одним вызовом пакетного поставщика,
+а не запросом на каждый.
+
+Страницы со многими адресами, например ленты с номерами страниц,
+сбрасываются целиком через поколение: ``bump_generation`` меняет
+значение, входящее в ключ, и старые записи просто перестают читаться.
+
+Пользовательский текст в шаблонах экранируется, поэтому ``<!--``
+из постов и комментариев не может подделать метку.
+"""
+import hashlib
+import json
+import re
+import uuid
+from collections import defaultdict
+from functools import wraps
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.http import HttpResponse, QueryDict
+from django.template.loader import render_to_string
+
+from .swr import STALE_TTL, _Uncacheable, get_or_refresh
+
+HOLE_RE = re.compile(r'<!--hole:(.*?)-->')
+
+_providers = {}
+
+
+def provider(template_name, batch=False):
+    """Регистрирует функцию, дополняющую контекст фрагмента.
+
+    Функция получает запрос и параметры метки и возвращает словарь.
+    Пакетная функция (``batch=True``) получает запрос и список
+    параметров всех таких фрагментов страницы и возвращает список
+    словарей в том же порядке.
+    """
+    def decorator(func):
+        _providers[template_name] = (func, batch)
+        return func
+    return decorator
+
+
+def _contexts(request, template_name, params_list):
+    contexts = [dict(params) for params in params_list]
+    func, batch = _providers.get(template_name, (None, False))
+    if func is None:
+        return contexts
+    if batch:
+        extra = func(request, params_list)
+    else:
+        extra = [func(request, **params) for params in params_list]
+    for context, values in zip(contexts, extra):
+        context.update(values)
+    return contexts
+
+
+def render_hole(request, template_name, params):
+    [context] = _contexts(request, template_name, [params])
+    return render_to_string(template_name, context, request)
+
+
+def marker(template_name, params):
+    data = json.dumps([template_name, params]).replace('--', '-\\u002d')
+    return f'<!--hole:{data}-->'
+
+
+def punching(request):
+    return getattr(request, '_punch_holes', False)
+
+
+def stitch(html, request):
+    holes = [json.loads(data) for data in HOLE_RE.findall(html)]
+    if not holes:
+        return html
+    by_template = defaultdict(list)
+    for number, (template_name, params) in enumerate(holes):
+        by_template[template_name].append((number, params))
+    rendered = [None] * len(holes)
+    for template_name, items in by_template.items():
+        contexts = _contexts(
+            request, template_name, [params for _, params in items]
+        )
+        for (number, _), context in zip(items, contexts):
+            rendered[number] = render_to_string(
+                template_name, context, request
+            )
+    parts = iter(rendered)
+    return HOLE_RE.sub(lambda match: next(parts), html)
+
+
+def shared_page_key(key_prefix, path):
+    digest = hashlib.md5(path.encode()).hexdigest()
+    return f'swr.page.{key_prefix}.shared.{digest}'
+
+
+def invalidate_shared_page(key_prefix, path):
+    cache.delete(shared_page_key(key_prefix, path))
+
+
+def generation_key(name):
+    return f'swr.page.generation.{name}'
+
+
+def get_generation(name):
+    key = generation_key(name)
+    value = cache.get(key)
+    if value is None:
+        cache.add(key, uuid.uuid4().hex, None)
+        value = cache.get(key)
+    return value
+
+
+def bump_generation(name):
+    """Сбрасывает все страницы, закэшированные с поколением ``name``."""
+    cache.set(generation_key(name), uuid.uuid4().hex, None)
+
+
+def _cached_query(request, params):
+    """Параметры запроса, которые читает представление, и путь с ними."""
+    query = QueryDict(mutable=True)
+    for name in params:
+        if name in request.GET:
+            query.setlist(name, request.GET.getlist(name))
+    query_string = query.urlencode()
+    query._mutable = False
+    path = f'{request.path}?{query_string}' if query_string else request.path
+    return query, query_string, path
+
+
+def shared_cache_page(ttl, stale_ttl=STALE_TTL, key_prefix='',
+                      generation=None, params=()):
+    """Кэширует страницу, общую для всех пользователей.
+
+    Ключ зависит от пути и только тех параметров запроса, которые
+    перечислены в ``params``: остальные параметры не порождают новых
+    записей и не видны представлению при рендеринге общей страницы.
+    Страницу можно сбросить через ``invalidate_shared_page``. Если
+    задано поколение ``generation``, оно тоже входит в ключ,
+    и ``bump_generation`` сбрасывает сразу все страницы этого
+    представления.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            query, query_string, path = _cached_query(request, params)
+
+            def compute():
+                user, punch = request.user, punching(request)
+                get, meta_query = request.GET, request.META.get(
+                    'QUERY_STRING', ''
+                )
+                request.user = AnonymousUser()
+                request._punch_holes = True
+                request.GET = query
+                request.META['QUERY_STRING'] = query_string
+                try:
+                    response = view(request, *args, **kwargs)
+                finally:
+                    request.user = user
+                    request._punch_holes = punch
+                    request.GET = get
+                    request.META['QUERY_STRING'] = meta_query
+                if response.status_code != 200 or response.streaming:
+                    raise _Uncacheable(response)
+                return response.content.decode(), response['Content-Type']
+
+            key = shared_page_key(key_prefix, path)
+            if generation is not None:
+                key = f'{key}.{get_generation(generation)}'
+            try:
+                body, content_type = get_or_refresh(
+                    key, compute, ttl, stale_ttl
+                )
+            except _Uncacheable as error:
+                return error.response
+            return HttpResponse(
+                stitch(body, request), content_type=content_type
+            )
+        return wrapper
+    return decorator
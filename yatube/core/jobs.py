@@ -0,0 +1,223 @@
+"""Очередь фоновых задач в таблице ``core_job``.
+
+Задача — функция, зарегистрированная декоратором ``task`` в модуле
+``jobs.py`` любого приложения; ``enqueue`` записывает в очередь ее имя
+и аргументы в JSON. Обработчик ``manage.py run_worker`` забирает
+задачи пачками: на PostgreSQL через ``SELECT ... FOR UPDATE SKIP
+LOCKED``, на SQLite условным ``UPDATE``, который удается только одному
+обработчику. Упавшая задача повторяется с экспоненциальной задержкой,
+а после последней попытки остается в таблице со статусом ``failed``.
+Выполненные задачи удаляются.
+
+Задачи, которые сбрасывают записи кэша, помечаются ``uses_cache``. Если
+кэш живет в памяти процесса, обработчик до кэша веб-процессов
+не достанет, поэтому такие задачи выполняются сразу в ``enqueue``,
+а ``run_worker`` их не берет.
+
+Задачи с одинаковым ``dedup_key`` не копятся: пока одна ждет, новые
+не ставятся. Выполняющаяся задача новую не блокирует: она могла уже
+прочитать данные, которые изменились после ее запуска.
+"""
+import json
+import logging
+import os
+import random
+import socket
+import time
+import traceback
+import uuid
+from datetime import timedelta
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from . import metrics
+from .cache import cache_is_local
+from .models import Job
+
+logger = logging.getLogger('yatube.jobs')
+
+BATCH_SIZE = 10
+LOCK_TIMEOUT = 10 * 60
+BACKOFF_BASE = 10
+BACKOFF_MAX = 60 * 60
+
+_tasks = {}
+_cache_tasks = set()
+
+
+def task(name, uses_cache=False):
+    """Регистрирует функцию как фоновую задачу с именем ``name``.
+
+    ``uses_cache`` отмечает задачи, которые сбрасывают записи кэша.
+    """
+    def decorator(func):
+        _tasks[name] = func
+        if uses_cache:
+            _cache_tasks.add(name)
+        return func
+    return decorator
+
+
+def local_cache_tasks():
+    """Задачи, которые нельзя отдавать обработчику: кэш в памяти
+    процесса."""
+    return frozenset(_cache_tasks) if cache_is_local() else frozenset()
+
+
+def enqueue(name, dedup_key=None, delay=0, max_attempts=None, **kwargs):
+    """Ставит задачу в очередь и возвращает ее ``Job``.
+
+    Если задача с тем же ``dedup_key`` уже ждет запуска, возвращается
+    она. Задача ``uses_cache`` при кэше в памяти процесса выполняется
+    сразу, и тогда возвращается None.
+    """
+    if name not in _tasks:
+        raise KeyError(f'Неизвестная задача {name}')
+    if name in local_cache_tasks():
+        _tasks[name](**kwargs)
+        return None
+    job = Job(
+        name=name,
+        payload=json.dumps(kwargs),
+        dedup_key=dedup_key,
+        run_at=timezone.now() + timedelta(seconds=delay),
+    )
+    if max_attempts is not None:
+        job.max_attempts = max_attempts
+    if dedup_key is None:
+        job.save()
+        return job
+    try:
+        with transaction.atomic():
+            job.save()
+    except IntegrityError:
+        existing = Job.objects.filter(
+            dedup_key=dedup_key, status=Job.QUEUED
+        ).first()
+        if existing is not None:
+            metrics.registry.inc('yatube_jobs_deduplicated_total',
+                                 {'task': name})
+            return existing
+        job.save()
+    return job
+
+
+def worker_id():
+    return f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+
+
+def _due(now):
+    return Job.objects.filter(
+        Q(status=Job.QUEUED, run_at__lte=now)
+        | Q(status=Job.RUNNING,
+            locked_at__lt=now - timedelta(seconds=LOCK_TIMEOUT))
+    ).order_by('run_at', 'pk')
+
+
+def claim(owner, limit=BATCH_SIZE, exclude=()):
+    """Забирает до ``limit`` готовых к запуску задач, кроме задач
+    с именами из ``exclude``.
+
+    Задачи, которые висят в работе дольше ``LOCK_TIMEOUT``, считаются
+    брошенными упавшим обработчиком и забираются снова.
+    """
+    now = timezone.now()
+    due = _due(now).exclude(name__in=exclude)
+    claimed = {
+        'status': Job.RUNNING,
+        'locked_by': owner,
+        'locked_at': now,
+        'attempts': F('attempts') + 1,
+    }
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            ids = list(
+                due.select_for_update(skip_locked=True)
+                .values_list('pk', flat=True)[:limit]
+            )
+            Job.objects.filter(pk__in=ids).update(**claimed)
+    else:
+        ids = list(due.values_list('pk', flat=True)[:limit])
+        # Повторное условие в UPDATE отсеивает задачи, которые успел
+        # забрать другой обработчик: SQLite выполняет записи по одной.
+        due.filter(pk__in=ids).update(**claimed)
+    return list(
+        Job.objects.filter(pk__in=ids, locked_by=owner, locked_at=now)
+        .order_by('run_at', 'pk')
+    )
+
+
+def backoff(attempts):
+    delay = min(BACKOFF_BASE * 2 ** (attempts - 1), BACKOFF_MAX)
+    return delay * random.uniform(0.5, 1.5)
+
+
+def _requeue(job, error):
+    """Возвращает упавшую задачу в очередь. Если за время ее работы
+    поставили такую же, повтор поручается той."""
+    try:
+        with transaction.atomic():
+            Job.objects.filter(pk=job.pk, locked_by=job.locked_by).update(
+                status=Job.QUEUED,
+                run_at=timezone.now() + timedelta(
+                    seconds=backoff(job.attempts)
+                ),
+                locked_by='',
+                locked_at=None,
+                last_error=error,
+            )
+    except IntegrityError:
+        Job.objects.filter(pk=job.pk, locked_by=job.locked_by).delete()
+
+
+def execute(job):
+    """Выполняет взятую задачу. Возвращает True при успехе."""
+    start = time.perf_counter()
+    try:
+        func = _tasks[job.name]
+        func(**json.loads(job.payload))
+    except Exception:
+        error = traceback.format_exc()
+        logger.exception('Задача %s упала', job)
+        if job.attempts < job.max_attempts:
+            _requeue(job, error)
+            result = 'retry'
+        else:
+            Job.objects.filter(pk=job.pk, locked_by=job.locked_by).update(
+                status=Job.FAILED, last_error=error
+            )
+            result = 'failed'
+    else:
+        Job.objects.filter(pk=job.pk, locked_by=job.locked_by).delete()
+        result = 'done'
+    metrics.registry.inc('yatube_jobs_total',
+                         {'task': job.name, 'result': result})
+    logger.debug('Задача %s: %s за %.3f с', job, result,
+                 time.perf_counter() - start)
+    return result == 'done'
+
+
+def execute_by_pk(pk, owner):
+    """Обработчик для пула процессов: задача читается заново."""
+    job = Job.objects.filter(pk=pk, locked_by=owner).first()
+    return job is not None and execute(job)
+
+
+def run_pending(limit=None):
+    """Выполняет готовые задачи в текущем потоке, пока они есть.
+
+    Возвращает число выполненных задач. Удобно в тестах и командах.
+    """
+    owner = worker_id()
+    done = 0
+    while limit is None or done < limit:
+        batch = claim(owner, BATCH_SIZE if limit is None
+                      else min(BATCH_SIZE, limit - done))
+        if not batch:
+            break
+        for job in batch:
+            execute(job)
+            done += 1
+    return done
@@ -0,0 +1,103 @@
+import statistics
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from core.jobs import claim, enqueue, execute, task, worker_id
+from core.models import Job
+
+_finished = []
+_finished_lock = threading.Lock()
+
+
+@task('core.bench')
+def bench(enqueued_at):
+    with _finished_lock:
+        _finished.append(time.time() - enqueued_at)
+
+
+class Command(BaseCommand):
+    help = ('Измеряет скорость постановки задач в очередь, пропускную '
+            'способность обработчиков и задержку от постановки до '
+            'выполнения')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--jobs', type=int, default=2000)
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument(
+            '--dedup', action='store_true',
+            help='Ставить задачи с ключом дедупликации'
+        )
+        parser.add_argument(
+            '--timeout', type=float, default=300,
+            help='Прервать замер, если задачи не выполнились за столько '
+                 'секунд'
+        )
+
+    def worker(self, stop, errors):
+        owner = worker_id()
+        try:
+            while not stop.is_set():
+                jobs = claim(owner)
+                if not jobs:
+                    time.sleep(0.01)
+                for job in jobs:
+                    execute(job)
+        except Exception as error:
+            errors.append(error)
+            stop.set()
+        finally:
+            close_old_connections()
+
+    def wait_finished(self, count, stop, errors, deadline):
+        while len(_finished) < count:
+            if errors:
+                raise CommandError(f'Обработчик упал: {errors[0]!r}')
+            if stop.is_set() or time.monotonic() > deadline:
+                raise CommandError(
+                    f'Выполнено {len(_finished)} из {count} задач '
+                    f'до истечения времени'
+                )
+            time.sleep(0.01)
+
+    def handle(self, *args, **options):
+        count = options['jobs']
+        _finished.clear()
+        stop = threading.Event()
+        errors = []
+        threads = [
+            threading.Thread(target=self.worker, args=(stop, errors))
+            for _ in range(options['workers'])
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            start = time.perf_counter()
+            for number in range(count):
+                enqueue(
+                    'core.bench', enqueued_at=time.time(),
+                    dedup_key=f'bench:{number}' if options['dedup'] else None,
+                )
+            enqueue_time = time.perf_counter() - start
+            self.wait_finished(
+                count, stop, errors, time.monotonic() + options['timeout']
+            )
+            total_time = time.perf_counter() - start
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+            Job.objects.filter(name='core.bench').delete()
+        latencies = sorted(_finished)
+        self.stdout.write(
+            f'Постановка: {count} задач за {enqueue_time:.2f} с '
+            f'({count / enqueue_time:.0f} задач/с)'
+        )
+        self.stdout.write(
+            f'Выполнение: {count / total_time:.0f} задач/с, '
+            f'задержка p50 {statistics.median(latencies):.4f} с, '
+            f'p99 {latencies[int(len(latencies) * 0.99) - 1]:.4f} с, '
+            f'max {latencies[-1]:.4f} с'
+        )
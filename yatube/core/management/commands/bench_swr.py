@@ -0,0 +1,86 @@
+import statistics
+import threading
+import time
+import uuid
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+
+from core.swr import get_or_refresh
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает задержки обычного кэша и кэша с отдачей '
+            'устаревшего значения под конкурентной нагрузкой')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=32)
+        parser.add_argument('--duration', type=float, default=5.0)
+        parser.add_argument('--ttl', type=int, default=1)
+        parser.add_argument(
+            '--cost', type=float, default=0.2,
+            help='Время пересчета значения, с'
+        )
+
+    def plain(self, key, compute, ttl):
+        value = cache.get(key)
+        if value is None:
+            value = compute()
+            cache.set(key, value, ttl)
+        return value
+
+    def swr(self, key, compute, ttl):
+        return get_or_refresh(key, compute, ttl)
+
+    def run(self, fetch, options):
+        key = f'bench:{uuid.uuid4().hex}'
+        latencies = []
+        computes = [0]
+        lock = threading.Lock()
+        deadline = time.monotonic() + options['duration']
+
+        def compute():
+            with lock:
+                computes[0] += 1
+            time.sleep(options['cost'])
+            return 'value'
+
+        def worker():
+            local = []
+            while time.monotonic() < deadline:
+                start = time.monotonic()
+                fetch(key, compute, options['ttl'])
+                local.append(time.monotonic() - start)
+                time.sleep(0.001)
+            with lock:
+                latencies.extend(local)
+
+        threads = [
+            threading.Thread(target=worker)
+            for _ in range(options['threads'])
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        latencies.sort()
+        slow = options['cost'] / 2
+        return {
+            'requests': len(latencies),
+            'computes': computes[0],
+            'slow': sum(1 for latency in latencies if latency >= slow),
+            'p50': statistics.median(latencies),
+            'p99': latencies[int(len(latencies) * 0.99) - 1],
+            'max': latencies[-1],
+        }
+
+    def handle(self, *args, **options):
+        for name, fetch in (('cache', self.plain), ('swr', self.swr)):
+            result = self.run(fetch, options)
+            self.stdout.write(
+                '{:<6} запросов {requests}, пересчетов {computes}, '
+                'медленных {slow}, p50 {p50:.4f} с, p99 {p99:.4f} с, '
+                'max {max:.4f} с'.format(
+                    name, **result
+                )
+            )
@@ -0,0 +1,80 @@
+import signal
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+
+from core.jobs import (claim, execute, execute_by_pk, local_cache_tasks,
+                       worker_id)
+
+
+def execute_in_thread(job):
+    try:
+        return execute(job)
+    finally:
+        close_old_connections()
+
+
+class Command(BaseCommand):
+    help = 'Выполняет фоновые задачи из очереди core_job'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument(
+            '--processes', action='store_true',
+            help='Пул процессов вместо потоков для задач, нагружающих CPU'
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=1.0,
+            help='Пауза при пустой очереди, с'
+        )
+        parser.add_argument(
+            '--burst', action='store_true',
+            help='Завершиться, когда очередь опустеет'
+        )
+
+    def handle(self, *args, **options):
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        owner = worker_id()
+        workers = options['workers']
+        skipped = local_cache_tasks()
+        if skipped:
+            self.stderr.write(
+                'Кэш в памяти процесса: задачи {} выполняются в '
+                'веб-процессах и здесь не берутся.'.format(
+                    ', '.join(sorted(skipped))
+                )
+            )
+        if options['processes']:
+            # Дочерние процессы не должны делить соединение с родителем.
+            connections.close_all()
+            pool = ProcessPoolExecutor(workers)
+        else:
+            pool = ThreadPoolExecutor(workers, thread_name_prefix='jobs')
+        done = failed = 0
+        with pool:
+            while not self.stopping:
+                jobs = claim(owner, workers, exclude=skipped)
+                if not jobs:
+                    if options['burst']:
+                        break
+                    close_old_connections()
+                    time.sleep(options['poll_interval'])
+                    continue
+                if options['processes']:
+                    results = pool.map(
+                        execute_by_pk, [job.pk for job in jobs],
+                        [owner] * len(jobs)
+                    )
+                else:
+                    results = pool.map(execute_in_thread, jobs)
+                for ok in results:
+                    done += ok
+                    failed += not ok
+        self.stdout.write(f'Выполнено задач: {done}, с ошибкой: {failed}')
+
+    def stop(self, signum, frame):
+        self.stopping = True
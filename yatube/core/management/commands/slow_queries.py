@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from core import slow_queries
+
+SORT_FIELDS = ('total', 'count', 'max')
+
+
+class Command(BaseCommand):
+    help = 'Отчет по отпечаткам SQL-запросов, отсортированный по времени'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=20)
+        parser.add_argument('--sort', choices=SORT_FIELDS, default='total')
+
+    def handle(self, *args, **options):
+        rows = slow_queries.report()
+        rows.sort(key=lambda row: row.get(options['sort'], 0), reverse=True)
+        for row in rows[:options['limit']]:
+            count = int(row.get('count', 0))
+            total = row.get('total', 0.0)
+            self.stdout.write(
+                '[{}] всего {:.3f} с, запросов {}, среднее {:.4f} с, '
+                'максимум {:.4f} с, view={}, template={}'.format(
+                    slow_queries.fingerprint_id(row['fingerprint']),
+                    total, count, total / count if count else 0.0,
+                    row.get('max', 0.0), row['view'], row['template'],
+                )
+            )
+            self.stdout.write('    ' + row['fingerprint'])
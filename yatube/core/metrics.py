@@ -0,0 +1,228 @@
+"""Сбор метрик приложения в формате Prometheus.
+
+Каждый процесс копит значения в памяти и периодически сбрасывает их
+в собственный файл в ``METRICS_DIR``. Страница метрик объединяет файлы
+всех процессов, поэтому счетчики агрегируются по всем воркерам хоста.
+"""
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+COUNTER = 'counter'
+HISTOGRAM = 'histogram'
+GAUGE = 'gauge'
+
+
+def _labels_key(labels):
+    return tuple(sorted((labels or {}).items()))
+
+
+class Registry:
+    """Хранилище метрик одного процесса."""
+
+    def __init__(self, name):
+        self.name = name
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._types = {}
+        self._sums = defaultdict(float)
+        self._maxima = {}
+        self._last_flush = time.monotonic()
+
+    def _check_fork(self):
+        # После fork дочерний процесс не должен повторно выгружать
+        # значения, накопленные родителем.
+        if self._pid != os.getpid():
+            self._reset()
+
+    def inc(self, name, labels=None, amount=1):
+        with self._lock:
+            self._check_fork()
+            self._types.setdefault(name, COUNTER)
+            self._sums[(name, _labels_key(labels))] += amount
+
+    def set_max(self, name, value, labels=None):
+        key = (name, _labels_key(labels))
+        with self._lock:
+            self._check_fork()
+            self._types.setdefault(name, GAUGE)
+            if value > self._maxima.get(key, float('-inf')):
+                self._maxima[key] = value
+
+    def observe(self, name, value, labels=None, buckets=LATENCY_BUCKETS):
+        labels_key = _labels_key(labels)
+        with self._lock:
+            self._check_fork()
+            self._types.setdefault(name, HISTOGRAM)
+            for bound in buckets:
+                if value <= bound:
+                    le = labels_key + (('le', repr(bound)),)
+                    self._sums[(name + '_bucket', le)] += 1
+            inf = labels_key + (('le', '+Inf'),)
+            self._sums[(name + '_bucket', inf)] += 1
+            self._sums[(name + '_sum', labels_key)] += value
+            self._sums[(name + '_count', labels_key)] += 1
+
+    def _path(self):
+        return os.path.join(
+            settings.METRICS_DIR, f'{self.name}-{self._pid}.json'
+        )
+
+    def flush(self):
+        with self._lock:
+            self._check_fork()
+            data = {
+                'types': dict(self._types),
+                'sums': [[n, lk, v] for (n, lk), v in self._sums.items()],
+                'maxima': [
+                    [n, lk, v] for (n, lk), v in self._maxima.items()
+                ],
+            }
+            self._last_flush = time.monotonic()
+            path = self._path()
+        os.makedirs(settings.METRICS_DIR, exist_ok=True)
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    def maybe_flush(self):
+        interval = settings.METRICS_FLUSH_INTERVAL
+        if time.monotonic() - self._last_flush >= interval:
+            self.flush()
+
+    def read_all(self):
+        """Объединяет значения, выгруженные всеми процессами."""
+        self.flush()
+        return _read_files(f'{self.name}-')
+
+
+def _read_files(prefix):
+    types = {}
+    sums = defaultdict(float)
+    maxima = {}
+    with os.scandir(settings.METRICS_DIR) as entries:
+        for entry in entries:
+            filename = entry.name
+            if not filename.startswith(prefix):
+                continue
+            if not filename.endswith('.json'):
+                continue
+            try:
+                with open(entry.path) as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                continue
+            types.update(data['types'])
+            for name, labels, value in data['sums']:
+                sums[(name, tuple(map(tuple, labels)))] += value
+            for name, labels, value in data['maxima']:
+                key = (name, tuple(map(tuple, labels)))
+                maxima[key] = max(value, maxima.get(key, value))
+    return types, sums, maxima
+
+
+registry = Registry('metrics')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    pairs = ','.join(
+        '{}="{}"'.format(k, str(v).replace('\\', '\\\\').replace('"', '\\"'))
+        for k, v in labels
+    )
+    return '{' + pairs + '}'
+
+
+def _metric_family(name, types):
+    for suffix in ('_bucket', '_sum', '_count'):
+        base = name[:-len(suffix)]
+        if name.endswith(suffix) and types.get(base) == HISTOGRAM:
+            return base
+    return name
+
+
+def render_text():
+    """Текст метрик в формате экспозиции Prometheus."""
+    types, sums, maxima = registry.read_all()
+    samples = defaultdict(list)
+    for (name, labels), value in list(sums.items()) + list(maxima.items()):
+        samples[_metric_family(name, types)].append((name, labels, value))
+    lines = []
+    for family in sorted(samples):
+        lines.append(f'# TYPE {family} {types.get(family, COUNTER)}')
+        for name, labels, value in sorted(samples[family]):
+            lines.append(f'{name}{_format_labels(labels)} {value!r}')
+    return '\n'.join(lines) + '\n'
+
+
+class RequestStats:
+    """Счетчики одного запроса: обращения к БД и рендеринг шаблонов."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.template = None
+        self.view = None
+
+    def add_query(self, duration):
+        self.queries += 1
+        self.db_time += duration
+
+
+_local = threading.local()
+
+
+def current_stats():
+    return getattr(_local, 'stats', None)
+
+
+def start_request():
+    _local.stats = RequestStats()
+    return _local.stats
+
+
+def finish_request():
+    _local.stats = None
+
+
+def record_template(name, duration):
+    registry.observe(
+        'yatube_template_render_seconds', duration, {'template': name}
+    )
+    stats = current_stats()
+    if stats is not None:
+        stats.template_time += duration
+
+
+def cache_key_kind(key):
+    if 'views.decorators.cache.cache_' in key or 'swr.page.' in key:
+        return 'cache_page'
+    if 'template.cache.' in key:
+        return 'template_fragment'
+    return 'other'
+
+
+def record_cache(key, hit):
+    kind = cache_key_kind(key)
+    if hit and 'views.decorators.cache.cache_header' in key:
+        # Попадание по заголовкам — лишь первый шаг cache_page,
+        # результат учтется при чтении самой страницы.
+        return
+    result = 'hit' if hit else 'miss'
+    registry.inc(
+        'yatube_cache_requests_total', {'cache': kind, 'result': result}
+    )
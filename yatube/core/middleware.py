@@ -0,0 +1,76 @@
+import time
+
+from django.db import connection
+
+from . import holes, metrics, slow_queries
+
+
+class MetricsMiddleware:
+    """Записывает время ответа, коды статуса и работу с БД по view."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = metrics.start_request()
+        start = time.perf_counter()
+        try:
+            with connection.execute_wrapper(self.db_wrapper(stats)):
+                response = self.get_response(request)
+        finally:
+            metrics.finish_request()
+        duration = time.perf_counter() - start
+        match = request.resolver_match
+        labels = {'view': match.view_name if match else 'unresolved'}
+        registry = metrics.registry
+        registry.observe('yatube_view_latency_seconds', duration, labels)
+        registry.inc(
+            'yatube_view_responses_total',
+            dict(labels, status=str(response.status_code))
+        )
+        registry.inc('yatube_db_queries_total', labels, stats.queries)
+        registry.inc('yatube_db_query_seconds_total', labels, stats.db_time)
+        registry.inc(
+            'yatube_view_template_seconds_total', labels, stats.template_time
+        )
+        registry.maybe_flush()
+        slow_queries.registry.maybe_flush()
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        stats = metrics.current_stats()
+        if stats is not None and request.resolver_match:
+            stats.view = request.resolver_match.view_name
+
+    @staticmethod
+    def db_wrapper(stats):
+        def wrapper(execute, sql, params, many, context):
+            start = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                duration = time.perf_counter() - start
+                stats.add_query(duration)
+                slow_queries.record(
+                    sql, None if many else params, duration,
+                    stats.view, stats.template
+                )
+        return wrapper
+
+
+class HoleMiddleware:
+    """Заполняет метки фрагментов в HTML-ответах."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request._punch_holes = True
+        response = self.get_response(request)
+        request._punch_holes = False
+        if (not response.streaming
+                and 'text/html' in response.get('Content-Type', '')):
+            response.content = holes.stitch(
+                response.content.decode(), request
+            )
+        return response
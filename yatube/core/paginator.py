@@ -0,0 +1,151 @@
+import hashlib
+from collections.abc import Sequence
+from math import ceil
+
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.core.paginator import Paginator
+from django.db import connection
+from django.utils.functional import cached_property
+
+COUNT_CACHE_TIMEOUT = 300
+MAX_PAGE = 50
+
+
+def _table_estimate(queryset):
+    """Оценка числа строк таблицы по статистике PostgreSQL."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT reltuples FROM pg_class WHERE relname = %s',
+            [queryset.model._meta.db_table]
+        )
+        row = cursor.fetchone()
+    return int(row[0]) if row and row[0] > 0 else None
+
+
+def _count_queryset(queryset):
+    """Копия запроса без сортировки и вычисляемых полей выборки.
+
+    Для COUNT(*) они не нужны, а из-за любой аннотации Django считает
+    строки через подзапрос с ``GROUP BY``.
+    """
+    queryset = queryset.order_by()
+    query = queryset.query
+    for alias, annotation in list(query.annotations.items()):
+        if not annotation.contains_aggregate:
+            del query.annotations[alias]
+    query.set_annotation_mask(query.annotations)
+    return queryset
+
+
+def estimated_count(queryset, timeout=COUNT_CACHE_TIMEOUT):
+    """Число строк без полного COUNT(*) на каждый запрос.
+
+    Для таблицы без фильтров на PostgreSQL берется статистика
+    планировщика, в остальных случаях результат COUNT(*) кэшируется
+    на ``timeout`` секунд для каждого набора фильтров.
+    """
+    queryset = _count_queryset(queryset)
+    if not queryset.query.where and connection.vendor == 'postgresql':
+        estimate = _table_estimate(queryset)
+        if estimate is not None:
+            return estimate
+    try:
+        sql = str(queryset.query).encode()
+    except EmptyResultSet:
+        # ``.none()`` и фильтры по пустому списку не дают SQL.
+        return 0
+    key = 'count:' + hashlib.md5(sql).hexdigest()
+    return cache.get_or_set(key, queryset.count, timeout)
+
+
+class EstimatedCountPaginator(Paginator):
+    """С ``exact_count=True`` число строк считается на каждый запрос:
+    для небольших выборок, которые показывают это число пользователю."""
+
+    def __init__(self, *args, exact_count=False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.exact_count = exact_count
+
+    @cached_property
+    def count(self):
+        if self.exact_count:
+            return _count_queryset(self.object_list).count()
+        return estimated_count(self.object_list)
+
+
+class FeedPaginator(EstimatedCountPaginator):
+    """Нумерованные страницы ленты не дальше ``max_page``.
+
+    Дальние страницы заставляют базу пропускать все предыдущие строки
+    через ``OFFSET``, поэтому после ``max_page`` лента листается только
+    курсором (см. ``cursor_page``).
+    """
+
+    def __init__(self, object_list, per_page, max_page=MAX_PAGE, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.max_page = max_page
+
+    @cached_property
+    def num_pages(self):
+        if self.count == 0 and not self.allow_empty_first_page:
+            return 0
+        hits = max(1, self.count - self.orphans)
+        return min(ceil(hits / self.per_page), self.max_page)
+
+    @property
+    def truncated(self):
+        return self.count > self.max_page * self.per_page
+
+
+class CursorPage(Sequence):
+    """Страница курсорной навигации: без номера и общего числа."""
+    is_cursor = True
+
+    def __init__(self, object_list, cursor, next_cursor):
+        self.object_list = object_list
+        self.cursor = cursor
+        self.next_cursor = next_cursor
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+
+def cursor_page(queryset, cursor=None, per_page=10):
+    """Страница записей с ``pk`` меньше курсора по убыванию ``pk``.
+
+    Вместо ``OFFSET`` используется условие по индексу, поэтому далекие
+    страницы стоят столько же, сколько первая. Возвращает записи
+    и курсор следующей страницы или ``None``.
+    """
+    if cursor is not None:
+        queryset = queryset.filter(pk__lt=cursor)
+    objects = list(queryset.order_by('-pk')[:per_page + 1])
+    if len(objects) > per_page:
+        return objects[:per_page], objects[per_page - 1].pk
+    return objects, None
+
+
+def deep_page_cursor(queryset, number, per_page, max_page=MAX_PAGE):
+    """Курсор, с которого начинается лента после ``max_page``.
+
+    ``None``, если номер страницы не дальше ``max_page`` или записей
+    столько нет.
+    """
+    if number <= max_page:
+        return None
+    ids = queryset.order_by('-pk').values_list('pk', flat=True)
+    try:
+        return ids[max_page * per_page - 1]
+    except IndexError:
+        return None
+
+
+def get_cursor(request, name='before'):
+    try:
+        return int(request.GET[name])
+    except (KeyError, ValueError):
+        return None
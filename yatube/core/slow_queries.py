@@ -0,0 +1,88 @@
+"""Журнал медленных запросов к БД с группировкой по отпечаткам SQL.
+
+Отпечаток — текст запроса без литералов, поэтому запросы, отличающиеся
+только параметрами, попадают в одну строку отчета
+``manage.py slow_queries``.
+"""
+import hashlib
+import logging
+import re
+import threading
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connection
+
+from .metrics import Registry
+
+logger = logging.getLogger('yatube.slow_queries')
+
+registry = Registry('queries')
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST_RE = re.compile(r'\bIN\s*\((?:\s*(?:%s|\?)\s*,?)+\)', re.IGNORECASE)
+_SPACES_RE = re.compile(r'\s+')
+
+_explaining = threading.local()
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(sql):
+    """Нормализует SQL: убирает литералы и сворачивает списки IN."""
+    sql = _STRING_RE.sub('?', sql)
+    sql = _NUMBER_RE.sub('?', sql)
+    sql = sql.replace('%s', '?')
+    sql = _IN_LIST_RE.sub('IN (...)', sql)
+    return _SPACES_RE.sub(' ', sql).strip()
+
+
+def fingerprint_id(text):
+    return hashlib.md5(text.encode()).hexdigest()[:12]
+
+
+def explain(sql, params):
+    if not sql.lstrip().upper().startswith('SELECT'):
+        return ''
+    prefix = (
+        'EXPLAIN QUERY PLAN ' if connection.vendor == 'sqlite' else 'EXPLAIN '
+    )
+    _explaining.active = True
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(prefix + sql, params)
+            return '\n'.join(' '.join(map(str, row)) for row in cursor)
+    except Exception as error:
+        return f'EXPLAIN не выполнен: {error}'
+    finally:
+        _explaining.active = False
+
+
+def record(sql, params, duration, view=None, template=None):
+    if getattr(_explaining, 'active', False):
+        return
+    text = fingerprint(sql)
+    labels = {
+        'fingerprint': text,
+        'view': view or '-',
+        'template': template or '-',
+    }
+    registry.inc('count', labels)
+    registry.inc('total', labels, duration)
+    registry.set_max('max', duration, labels)
+    if duration >= settings.SLOW_QUERY_THRESHOLD:
+        logger.warning(
+            'Медленный запрос %.3f с [%s] view=%s template=%s\n%s\n%s',
+            duration, fingerprint_id(text), labels['view'],
+            labels['template'], sql, explain(sql, params)
+        )
+
+
+def report():
+    """Статистика по отпечаткам из всех процессов."""
+    types, sums, maxima = registry.read_all()
+    rows = {}
+    for (name, labels), value in list(sums.items()) + list(maxima.items()):
+        row = rows.setdefault(labels, dict(labels))
+        row[name] = value
+    return list(rows.values())
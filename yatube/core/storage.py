@@ -0,0 +1,105 @@
+"""Хранилище файлов с адресацией по содержимому.
+
+Имя файла — SHA-256 его содержимого, разложенный по вложенным
+каталогам: ``posts/ab/cd/abcd…ef.jpg``. Одинаковые загрузки хранятся
+один раз, а записи в базе просто ссылаются на общий файл. Хэш считается
+потоково, пока загрузка пишется во временный файл, поэтому содержимое
+не читается повторно.
+
+Повторная загрузка обновляет время изменения общего файла. Очистка
+не удаляет файлы моложе ``DELETE_GRACE``: пост, который сослался на
+уже существующий файл, мог еще не попасть в базу.
+"""
+import hashlib
+import os
+import re
+import tempfile
+import time
+
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+DELETE_GRACE = 60 * 60
+
+HASH_NAME_RE = re.compile(
+    r'(^|/)[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}(\.\w+)?$'
+)
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    shard_levels = 2
+    shard_width = 2
+    incoming_dir = '.incoming'
+
+    def hashed_name(self, name, digest):
+        directory = os.path.dirname(name)
+        extension = os.path.splitext(name)[1].lower()
+        shards = [
+            digest[i * self.shard_width:(i + 1) * self.shard_width]
+            for i in range(self.shard_levels)
+        ]
+        return os.path.join(directory, *shards, digest + extension)
+
+    @staticmethod
+    def is_hashed_name(name):
+        return bool(HASH_NAME_RE.search(name))
+
+    def get_available_name(self, name, max_length=None):
+        # Итоговое имя зависит только от содержимого и определяется
+        # в _save, совпадение имен означает совпадение файлов.
+        return name
+
+    @staticmethod
+    def _touch(path):
+        """Продлевает жизнь существующего файла. False, если его нет."""
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def is_recent(self, name, grace=DELETE_GRACE):
+        try:
+            mtime = os.path.getmtime(self.path(name))
+        except FileNotFoundError:
+            return False
+        return time.time() - mtime < grace
+
+    def delete_if_stale(self, name, grace=DELETE_GRACE):
+        """Удаляет файл, если его не загружали повторно ``grace`` секунд.
+        Возвращает True, если файл удален."""
+        if self.is_recent(name, grace):
+            return False
+        self.delete(name)
+        return True
+
+    def _save(self, name, content):
+        incoming = self.path(self.incoming_dir)
+        os.makedirs(incoming, exist_ok=True)
+        hasher = hashlib.sha256()
+        fd, tmp_path = tempfile.mkstemp(dir=incoming)
+        try:
+            with os.fdopen(fd, 'wb') as tmp:
+                for chunk in content.chunks():
+                    if isinstance(chunk, str):
+                        chunk = chunk.encode()
+                    hasher.update(chunk)
+                    tmp.write(chunk)
+            name = self.hashed_name(name, hasher.hexdigest())
+            full_path = self.path(name)
+            if self._touch(full_path):
+                os.remove(tmp_path)
+                return name.replace('\\', '/')
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            if self.file_permissions_mode is not None:
+                os.chmod(tmp_path, self.file_permissions_mode)
+            os.replace(tmp_path, full_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return name.replace('\\', '/')
+
+
+content_storage = ContentAddressedStorage()
@@ -0,0 +1,91 @@
+"""Кэш с отдачей устаревшего значения на время пересчета.
+
+Когда запись обычного кэша истекает, все одновременные запросы
+промахиваются и пересчитывают ее разом. Здесь запись живет дольше
+своего срока свежести: после него значение пересчитывает только тот
+запрос, который взял блокировку в кэше, а остальные получают старое
+значение. Пересчет может начаться и раньше срока — с вероятностью,
+растущей к концу срока и пропорциональной времени прошлого расчета
+(алгоритм XFetch), поэтому горячие ключи обычно обновляются до того,
+как устареют.
+"""
+import math
+import random
+import time
+import uuid
+
+from django.core.cache import cache
+
+from . import metrics
+
+STALE_TTL = 300
+LOCK_TIMEOUT = 30
+WAIT_INTERVAL = 0.05
+BETA = 1.0
+
+
+class _Uncacheable(Exception):
+    def __init__(self, response):
+        self.response = response
+
+
+def _record(result):
+    metrics.registry.inc('yatube_swr_requests_total', {'result': result})
+
+
+def _should_refresh(expires_at, delta, beta):
+    if beta <= 0:
+        return time.time() >= expires_at
+    jitter = -delta * beta * math.log(random.random() or 1e-12)
+    return time.time() + jitter >= expires_at
+
+
+def _wait_for(key, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        time.sleep(WAIT_INTERVAL)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry
+    return None
+
+
+def get_or_refresh(key, compute, ttl, stale_ttl=STALE_TTL,
+                   lock_timeout=LOCK_TIMEOUT, beta=BETA):
+    """Значение ``compute()`` из кэша, свежее не дольше ``ttl`` секунд.
+
+    Еще ``stale_ttl`` секунд после этого отдается устаревшее значение,
+    пока один из запросов его пересчитывает. При пустом кэше запросы
+    без блокировки ждут результата до ``lock_timeout`` секунд.
+    """
+    lock_key = f'{key}:lock'
+    token = uuid.uuid4().hex
+    entry = cache.get(key)
+    if entry is not None:
+        value, expires_at, delta = entry
+        if not _should_refresh(expires_at, delta, beta):
+            _record('hit')
+            return value
+        if not cache.add(lock_key, token, lock_timeout):
+            _record('stale')
+            return value
+        locked = True
+    else:
+        locked = cache.add(lock_key, token, lock_timeout)
+        if not locked:
+            entry = _wait_for(key, lock_timeout)
+            if entry is not None:
+                _record('wait')
+                return entry[0]
+    _record('refresh')
+    try:
+        start = time.monotonic()
+        value = compute()
+        delta = time.monotonic() - start
+        cache.set(key, (value, time.time() + ttl, delta), ttl + stale_ttl)
+    finally:
+        # Не дождавшийся результата запрос считает сам, но чужую
+        # блокировку не снимает.
+        if locked and cache.get(lock_key) == token:
+            cache.delete(lock_key)
+    return value
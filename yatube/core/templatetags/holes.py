@@ -0,0 +1,22 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from core import holes
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def hole(context, template_name, **params):
+    """Фрагмент, зависящий от пользователя.
+
+    Вместо фрагмента остается метка, которую при каждом запросе
+    заполняет ``shared_cache_page`` или ``HoleMiddleware``; без них,
+    например в письмах, фрагмент рендерится сразу.
+
+        {% hole 'posts/includes/comment_form.html' post_id=post.id %}
+    """
+    request = context['request']
+    if holes.punching(request):
+        return mark_safe(holes.marker(template_name, params))
+    return holes.render_hole(request, template_name, params)
@@ -0,0 +1,50 @@
+from django import template
+from django.core.cache.utils import make_template_fragment_key
+
+from core.swr import get_or_refresh
+
+register = template.Library()
+
+
+class SWRCacheNode(template.Node):
+    def __init__(self, nodelist, ttl, fragment_name, vary_on):
+        self.nodelist = nodelist
+        self.ttl = ttl
+        self.fragment_name = fragment_name
+        self.vary_on = vary_on
+
+    def render(self, context):
+        ttl = self.ttl.resolve(context)
+        try:
+            ttl = int(ttl)
+        except (ValueError, TypeError):
+            raise template.TemplateSyntaxError(
+                f'"swrcache" tag got a non-integer timeout value: {ttl!r}'
+            )
+        vary_on = [var.resolve(context) for var in self.vary_on]
+        key = make_template_fragment_key(self.fragment_name, vary_on)
+        return get_or_refresh(
+            key, lambda: self.nodelist.render(context), ttl
+        )
+
+
+@register.tag('swrcache')
+def do_swrcache(parser, token):
+    """Как ``{% cache %}``, но на время пересчета фрагмента отдает
+    устаревшую версию.
+
+        {% swrcache 20 index_page page_obj.number %} ... {% endswrcache %}
+    """
+    nodelist = parser.parse(('endswrcache',))
+    parser.delete_first_token()
+    tokens = token.split_contents()
+    if len(tokens) < 3:
+        raise template.TemplateSyntaxError(
+            f"'{tokens[0]}' tag requires at least 2 arguments."
+        )
+    return SWRCacheNode(
+        nodelist,
+        parser.compile_filter(tokens[1]),
+        tokens[2],
+        [parser.compile_filter(token) for token in tokens[3:]],
+    )
@@ -0,0 +1,109 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.db import DatabaseError
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from core.jobs import claim, enqueue, execute, run_pending, task, worker_id
+from core.models import Job
+
+calls = []
+
+
+@task('core.test_record')
+def record(value):
+    calls.append(value)
+
+
+@task('core.test_cache', uses_cache=True)
+def record_cache(value):
+    calls.append(value)
+
+
+@task('core.test_fail')
+def fail():
+    raise ValueError('сбой')
+
+
+class JobQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_run_pending_executes_and_deletes(self):
+        enqueue('core.test_record', value=1)
+        enqueue('core.test_record', value=2)
+        self.assertEqual(run_pending(), 2)
+        self.assertEqual(calls, [1, 2])
+        self.assertFalse(Job.objects.exists())
+
+    def test_dedup_key_collapses_pending_jobs(self):
+        first = enqueue('core.test_record', dedup_key='same', value=1)
+        second = enqueue('core.test_record', dedup_key='same', value=2)
+        self.assertEqual(first.pk, second.pk)
+        run_pending()
+        enqueue('core.test_record', dedup_key='same', value=3)
+        run_pending()
+        self.assertEqual(calls, [1, 3])
+
+    def test_running_job_does_not_block_new_one(self):
+        """Пока задача выполняется, такая же ставится заново, а упавшая
+        задача уступает повтор уже поставленной."""
+        job = enqueue('core.test_fail', dedup_key='same')
+        [claimed] = claim(worker_id())
+        queued = enqueue('core.test_fail', dedup_key='same')
+        self.assertNotEqual(queued.pk, job.pk)
+        self.assertFalse(execute(claimed))
+        self.assertEqual(
+            list(Job.objects.values_list('pk', 'status')),
+            [(queued.pk, Job.QUEUED)])
+
+    def test_cache_task_inline_with_local_cache(self):
+        """Задача, сбрасывающая кэш, при кэше в памяти процесса
+        выполняется сразу, а с общим кэшем ставится в очередь."""
+        self.assertIsNone(enqueue('core.test_cache', value=1))
+        self.assertEqual(calls, [1])
+        self.assertFalse(Job.objects.exists())
+        with mock.patch('core.jobs.cache_is_local', return_value=False):
+            self.assertIsNotNone(enqueue('core.test_cache', value=2))
+        self.assertEqual(claim(worker_id(), exclude={'core.test_cache'}), [])
+        self.assertEqual(run_pending(), 1)
+        self.assertEqual(calls, [1, 2])
+
+    def test_claimed_job_not_claimed_twice(self):
+        enqueue('core.test_record', value=1)
+        self.assertEqual(len(claim(worker_id())), 1)
+        self.assertEqual(claim(worker_id()), [])
+
+    def test_abandoned_job_reclaimed(self):
+        """Задача упавшего обработчика забирается после LOCK_TIMEOUT."""
+        enqueue('core.test_record', value=1)
+        [job] = claim(worker_id())
+        Job.objects.filter(pk=job.pk).update(
+            locked_at=timezone.now() - timedelta(hours=1))
+        [again] = claim(worker_id())
+        self.assertEqual((again.pk, again.attempts), (job.pk, 2))
+
+    def test_failed_job_retried_with_backoff(self):
+        job = enqueue('core.test_fail', max_attempts=2)
+        [claimed] = claim(worker_id())
+        self.assertFalse(execute(claimed))
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.QUEUED)
+        self.assertGreater(job.run_at, timezone.now())
+        self.assertIn('сбой', job.last_error)
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        run_pending()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+
+
+class BenchJobsTests(TransactionTestCase):
+    def test_worker_failure_stops_benchmark(self):
+        """Упавший обработчик прерывает замер, а не вешает команду."""
+        with mock.patch('core.management.commands.bench_jobs.claim',
+                        side_effect=DatabaseError('база недоступна')):
+            with self.assertRaisesMessage(CommandError, 'база недоступна'):
+                call_command('bench_jobs', jobs=5, workers=1)
+        self.assertFalse(Job.objects.exists())
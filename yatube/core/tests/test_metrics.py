@@ -0,0 +1,64 @@
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from posts.models import Post
+
+User = get_user_model()
+
+TEMP_METRICS_DIR = tempfile.mkdtemp()
+
+
+@override_settings(METRICS_DIR=TEMP_METRICS_DIR)
+class MetricsViewTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.post = Post.objects.create(
+            author=User.objects.create_user(username='test_author'),
+            text='Тестовая запись')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_METRICS_DIR, ignore_errors=True)
+
+    def setUp(self):
+        self.guest_client = Client()
+        cache.clear()
+
+    def test_metrics_page_contains_view_latency(self):
+        """Страница метрик содержит время ответа и запросы к БД по view."""
+        self.guest_client.get(reverse('posts:index'))
+        response = self.guest_client.get(reverse('core:metrics'))
+        self.assertEqual(response.status_code, 200)
+        content = response.content.decode()
+        self.assertIn('# TYPE yatube_view_latency_seconds histogram', content)
+        self.assertIn(
+            'yatube_view_latency_seconds_count{view="posts:index"}', content
+        )
+        self.assertIn('yatube_db_queries_total{view="posts:index"}', content)
+        self.assertIn(
+            'yatube_template_render_seconds_count'
+            '{template="posts/index.html"}', content
+        )
+
+    def test_metrics_count_cache_page_hits(self):
+        """Повторный запрос index учитывается как попадание в cache_page."""
+        self.guest_client.get(reverse('posts:index'))
+        self.guest_client.get(reverse('posts:index'))
+        content = self.guest_client.get(
+            reverse('core:metrics')).content.decode()
+        self.assertIn(
+            'yatube_cache_requests_total{cache="cache_page",result="hit"}',
+            content
+        )
+
+    def test_metrics_page_is_internal(self):
+        """Страница метрик недоступна с внешних адресов."""
+        response = self.guest_client.get(
+            reverse('core:metrics'), REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,65 @@
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from posts.models import Post
+
+from core.slow_queries import fingerprint
+
+User = get_user_model()
+
+TEMP_METRICS_DIR = tempfile.mkdtemp()
+
+
+@override_settings(METRICS_DIR=TEMP_METRICS_DIR)
+class SlowQueriesTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.post = Post.objects.create(
+            author=User.objects.create_user(username='test_author'),
+            text='Тестовая запись')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_METRICS_DIR, ignore_errors=True)
+
+    def setUp(self):
+        self.guest_client = Client()
+        cache.clear()
+
+    def test_fingerprint_strips_literals(self):
+        """Запросы с разными литералами дают один отпечаток."""
+        self.assertEqual(
+            fingerprint("SELECT * FROM t WHERE id = 10 AND s = 'a''b'"),
+            fingerprint("SELECT * FROM t WHERE id = 7 AND s = 'c'"),
+        )
+        self.assertEqual(
+            fingerprint('SELECT * FROM t WHERE id IN (%s, %s, %s)'),
+            'SELECT * FROM t WHERE id IN (...)',
+        )
+
+    @override_settings(SLOW_QUERY_THRESHOLD=0)
+    def test_slow_query_logged_with_plan(self):
+        """Медленный запрос пишется в журнал вместе с планом."""
+        with self.assertLogs('yatube.slow_queries', 'WARNING') as logs:
+            self.guest_client.get(
+                reverse('posts:post_detail', args=[self.post.id]))
+        self.assertIn('view=posts:post_detail', logs.output[0])
+        self.assertTrue(any('SCAN' in line or 'SEARCH' in line
+                            for line in logs.output))
+
+    def test_slow_queries_command_report(self):
+        """Команда slow_queries выводит отпечатки с view и шаблоном."""
+        self.guest_client.get(
+            reverse('posts:post_detail', args=[self.post.id]))
+        out = StringIO()
+        call_command('slow_queries', stdout=out)
+        self.assertIn('view=posts:post_detail', out.getvalue())
+        self.assertIn('template=posts/post_detail.html', out.getvalue())
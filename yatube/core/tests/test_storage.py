@@ -0,0 +1,90 @@
+import os
+import shutil
+import tempfile
+import time
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from posts.models import Post
+
+from core.storage import DELETE_GRACE, content_storage
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ContentAddressedStorageTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.author = User.objects.create_user(username='test_author')
+
+    def test_identical_uploads_share_file(self):
+        """Одинаковые картинки сохраняются одним шардированным файлом."""
+        first = Post.objects.create(
+            author=self.author, text='Первый',
+            image=SimpleUploadedFile('a.gif', SMALL_GIF, 'image/gif'))
+        second = Post.objects.create(
+            author=self.author, text='Второй',
+            image=SimpleUploadedFile('b.GIF', SMALL_GIF, 'image/gif'))
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertRegex(
+            first.image.name, r'^posts/[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}'
+                              r'\.gif$')
+        self.assertEqual(os.listdir(content_storage.path('.incoming')), [])
+
+    def test_migrate_media_rewrites_paths(self):
+        """Команда переносит старые файлы и переписывает пути."""
+        old_name = 'posts/old.gif'
+        os.makedirs(content_storage.path('posts'), exist_ok=True)
+        with open(content_storage.path(old_name), 'wb') as f:
+            f.write(SMALL_GIF)
+        post = Post.objects.create(
+            author=self.author, text='Старый', image=old_name)
+        missing = Post.objects.create(
+            author=self.author, text='Потерянный', image='posts/lost.gif')
+        call_command('migrate_media', batch_size=1, stdout=StringIO())
+        post.refresh_from_db()
+        missing.refresh_from_db()
+        self.assertTrue(content_storage.is_hashed_name(post.image.name))
+        self.assertEqual(post.image.read(), SMALL_GIF)
+        self.assertFalse(content_storage.exists(old_name))
+        self.assertEqual(missing.image.name, 'posts/lost.gif')
+
+    def test_save_plain_content(self):
+        """Хранилище принимает обычный ContentFile."""
+        name = content_storage.save('posts/x.txt', ContentFile(b'data'))
+        self.assertTrue(name.endswith('.txt'))
+        self.assertTrue(content_storage.exists(name))
+
+    def test_dedup_hit_refreshes_mtime(self):
+        """Повторная загрузка продлевает жизнь общего файла, а старый
+        файл без повторных загрузок удаляется."""
+        name = content_storage.save('posts/y.txt', ContentFile(b'shared'))
+        path = content_storage.path(name)
+        old = time.time() - 2 * DELETE_GRACE
+        os.utime(path, (old, old))
+        content_storage.save('posts/z.txt', ContentFile(b'shared'))
+        self.assertFalse(content_storage.delete_if_stale(name))
+        self.assertTrue(content_storage.exists(name))
+        os.utime(path, (old, old))
+        self.assertTrue(content_storage.delete_if_stale(name))
+        self.assertFalse(content_storage.exists(name))
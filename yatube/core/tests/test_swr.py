@@ -0,0 +1,70 @@
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.template import Context, Template
+from django.test import TestCase
+
+from core.swr import get_or_refresh
+
+
+class StaleWhileRevalidateTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.computed = 0
+
+    def compute(self):
+        self.computed += 1
+        return f'значение {self.computed}'
+
+    def expire(self, key, value='старое'):
+        cache.set(key, (value, time.time() - 1, 0.1), 300)
+
+    def test_fresh_value_not_recomputed(self):
+        get_or_refresh('key', self.compute, 60, beta=0)
+        self.assertEqual(get_or_refresh('key', self.compute, 60, beta=0),
+                         'значение 1')
+        self.assertEqual(self.computed, 1)
+
+    def test_stale_served_while_locked(self):
+        """Пока другой процесс пересчитывает, отдается старое значение."""
+        self.expire('key')
+        cache.add('key:lock', 1, 30)
+        self.assertEqual(get_or_refresh('key', self.compute, 60), 'старое')
+        self.assertEqual(self.computed, 0)
+
+    def test_stale_recomputed_by_lock_holder(self):
+        self.expire('key')
+        self.assertEqual(
+            get_or_refresh('key', self.compute, 60), 'значение 1')
+        self.assertIsNone(cache.get('key:lock'))
+
+    def test_waiter_keeps_holder_lock(self):
+        """Запрос, не дождавшийся результата, считает значение сам,
+        но не снимает блокировку того, кто его пересчитывает."""
+        cache.add('key:lock', 'чужая', 30)
+        with mock.patch('core.swr.WAIT_INTERVAL', 0.01):
+            value = get_or_refresh('key', self.compute, 60, lock_timeout=0.02)
+        self.assertEqual(value, 'значение 1')
+        self.assertEqual(cache.get('key:lock'), 'чужая')
+
+    def test_early_probabilistic_refresh(self):
+        """Долгий расчет обновляется заранее, до конца срока."""
+        cache.set('key', ('старое', time.time() + 5, 10.0), 300)
+        with mock.patch('core.swr.random.random', return_value=0.5):
+            self.assertEqual(
+                get_or_refresh('key', self.compute, 60), 'значение 1')
+        with mock.patch('core.swr.random.random', return_value=0.99):
+            self.assertEqual(
+                get_or_refresh('key', self.compute, 60), 'значение 1')
+
+    def test_template_tag(self):
+        template = Template(
+            '{% load swr %}{% swrcache 60 fragment key %}'
+            '{{ value }}{% endswrcache %}')
+        first = template.render(Context({'key': 1, 'value': 'первое'}))
+        second = template.render(Context({'key': 1, 'value': 'второе'}))
+        other = template.render(Context({'key': 2, 'value': 'второе'}))
+        self.assertEqual(first, 'первое')
+        self.assertEqual(second, 'первое')
+        self.assertEqual(other, 'второе')
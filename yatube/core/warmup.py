@@ -0,0 +1,135 @@
+"""Прогрев кэшей после деплоя.
+
+Страницы запрашиваются по HTTP у работающего сайта или рендерятся
+через настоящий ``WSGIHandler`` со всеми middleware прямо в процессе
+команды. Во втором случае заполняются те же ключи кэша страниц,
+фрагментов и миниатюр, что и при запросах посетителей, но веб-процессы
+их увидят только через общий кэш (Memcached, Redis). Кэш в памяти
+процесса исчезает вместе с командой, и от прогрева остаются лишь
+файлы миниатюр.
+"""
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from io import BytesIO
+from urllib.error import HTTPError
+from urllib.parse import urljoin, urlsplit
+from urllib.request import urlopen
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+
+HTTP_TIMEOUT = 30
+
+
+def make_environ(url):
+    site = urlsplit(settings.SITE_URL)
+    path, _, query = url.partition('?')
+    return {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': path,
+        'QUERY_STRING': query,
+        'SCRIPT_NAME': '',
+        'SERVER_NAME': site.hostname or 'localhost',
+        'SERVER_PORT': str(site.port or (443 if site.scheme == 'https'
+                                         else 80)),
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'HTTP_HOST': site.netloc or 'localhost',
+        'wsgi.url_scheme': site.scheme or 'http',
+        'wsgi.input': BytesIO(),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+        'wsgi.version': (1, 0),
+    }
+
+
+def fetch_http(base_url, url):
+    """Запрашивает страницу у сайта и возвращает (url, статус, секунды).
+
+    Если сайт не ответил, статус — None.
+    """
+    start = time.perf_counter()
+    try:
+        with urlopen(urljoin(base_url, url), timeout=HTTP_TIMEOUT) as response:
+            response.read()
+            status = response.status
+    except HTTPError as error:
+        status = error.code
+    except OSError:
+        # URLError, таймауты и обрывы соединения.
+        status = None
+    return url, status, time.perf_counter() - start
+
+
+def fetch(handler, url):
+    """Рендерит страницу и возвращает (url, статус, секунды)."""
+    status = []
+    start = time.perf_counter()
+    response = handler(
+        make_environ(url),
+        lambda code, headers, exc_info=None: status.append(code)
+    )
+    try:
+        for _ in response:
+            pass
+    finally:
+        if hasattr(response, 'close'):
+            response.close()
+    return url, int(status[0].split()[0]), time.perf_counter() - start
+
+
+def warm(urls, concurrency=4, budget=60, progress=None, base_url=None):
+    """Рендерит адреса не более чем в ``concurrency`` потоков, пока
+    не истечет ``budget`` секунд. Возвращает (готово, ошибок, пропущено).
+
+    С ``base_url`` страницы запрашиваются по HTTP у этого сайта, иначе
+    рендерятся в текущем процессе. ``progress`` получает статус None,
+    если сайт не ответил, и такой адрес считается ошибкой. Новые адреса
+    после бюджета не запускаются, уже начатые рендеры дорабатывают,
+    но считаются пропущенными.
+    """
+    if base_url is not None:
+        target = base_url
+        get = fetch_http
+    else:
+        target = WSGIHandler()
+        get = fetch
+    deadline = time.monotonic() + budget
+    urls = iter(urls)
+    done = failed = skipped = 0
+    with ThreadPoolExecutor(concurrency) as pool:
+        running = set()
+        for url in urls:
+            if len(running) >= concurrency:
+                finished, running = wait(
+                    running, timeout=max(0, deadline - time.monotonic()),
+                    return_when=FIRST_COMPLETED
+                )
+                for future in finished:
+                    ok = _report(future, progress)
+                    done += ok
+                    failed += not ok
+            if time.monotonic() >= deadline:
+                skipped = 1 + sum(1 for _ in urls)
+                break
+            running.add(pool.submit(get, target, url))
+        finished, running = wait(
+            running, timeout=max(0, deadline - time.monotonic())
+        )
+        for future in finished:
+            ok = _report(future, progress)
+            done += ok
+            failed += not ok
+        for future in running:
+            future.cancel()
+        skipped += len(running)
+    return done, failed, skipped
+
+
+def _report(future, progress):
+    url, status, duration = future.result()
+    if progress is not None:
+        progress(url, status, duration)
+    return status is not None and status < 400
@@ -1,16 +1,51 @@
 from django.contrib import admin
+from core.admin import HighVolumeAdminMixin
 from .models import Post
-from .models import Group, Comment
+from .models import Group, Comment, PurgeTask
+from .purge import soft_delete_posts
 
 
-class PostAdmin(admin.ModelAdmin):
+class PostAdmin(HighVolumeAdminMixin, admin.ModelAdmin):
     list_display = ('pk', 'text', 'pub_date', 'author', 'group')
     list_editable = ('group',)
+    list_select_related = ('author', 'group')
+    autocomplete_fields = ('author', 'group')
     search_fields = ('text',)
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
+    actions = ('soft_delete',)
+
+    def soft_delete(self, request, queryset):
+        deleted = soft_delete_posts(queryset)
+        self.message_user(
+            request, f'Скрыто постов: {deleted}. Они будут удалены в фоне.'
+        )
+    soft_delete.short_description = 'Удалить в фоне'
+
+
+class GroupAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'title', 'slug')
+    search_fields = ('title', 'slug')
+
+
+class CommentAdmin(HighVolumeAdminMixin, admin.ModelAdmin):
+    list_display = ('pk', 'text', 'created', 'author', 'post')
+    list_select_related = ('author', 'post')
+    autocomplete_fields = ('author', 'post')
+    search_fields = ('text',)
+    list_filter = ('created',)
+    empty_value_display = '-пусто-'
+
+
+class PurgeTaskAdmin(admin.ModelAdmin):
+    list_display = (
+        'username', 'stage', 'comments', 'posts', 'follows', 'files',
+        'created', 'finished',
+    )
+    readonly_fields = list_display + ('user_id',)
 
 
 admin.site.register(Post, PostAdmin)
-admin.site.register(Group)
-admin.site.register(Comment)
+admin.site.register(Group, GroupAdmin)
+admin.site.register(Comment, CommentAdmin)
+admin.site.register(PurgeTask, PurgeTaskAdmin)
@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class PostsConfig(AppConfig):
     name = 'posts'
+
+    def ready(self):
+        from . import (feeds, follow_feed, holes, mentions,  # noqa: F401
+                       notifications, tags)
@@ -0,0 +1,223 @@
+"""Буферизованные счетчики постов.
+
+Каждое увеличение попадает только в отдельный кэш ``counters``, где
+нет других ключей, которые могли бы вытеснить буфер. Накопленные приращения
+каждые ``COUNTERS_FLUSH_INTERVAL`` секунд записываются в ``Post``
+пакетными ``UPDATE`` фоновым потоком процесса. Команда
+``manage.py flush_counters`` сбрасывает только тот буфер, который
+видит сама, поэтому полезна лишь с общим кэшем. При падении процесса
+теряется не больше одного интервала сброса. Приращение может быть
+отрицательным: так снимаются лайки.
+"""
+import logging
+import threading
+import time
+import uuid
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import close_old_connections, transaction
+from django.db.models import F
+
+logger = logging.getLogger('yatube.counters')
+
+COUNTERS_CACHE = 'counters'
+LOCK_TIMEOUT = 5
+LOCK_ATTEMPTS = 50
+
+
+class CounterLockTimeout(Exception):
+    pass
+
+
+class BufferedCounter:
+    def __init__(self, model, field):
+        self.model = model
+        self.field = field
+        self.prefix = f'counters:{model}:{field}'
+        self.dirty_key = f'{self.prefix}:dirty'
+        # Ключи, которые не удалось отметить грязными из-за занятой
+        # блокировки; они отмечаются при следующей возможности.
+        self._unmarked = set()
+        self._unmarked_lock = threading.Lock()
+
+    @property
+    def cache(self):
+        return caches[COUNTERS_CACHE]
+
+    def _key(self, pk):
+        return f'{self.prefix}:{pk}'
+
+    def _get_model(self):
+        from django.apps import apps
+        return apps.get_model(self.model)
+
+    def incr(self, pk, delta=1):
+        cache = self.cache
+        key = self._key(pk)
+        if cache.add(key, delta, timeout=None):
+            self._mark_dirty(pk)
+        else:
+            try:
+                value = cache.incr(key, delta)
+            except ValueError:
+                cache.add(key, delta, timeout=None)
+                value = delta
+            # Счетчик был обнулен последним сбросом — пост снова грязный.
+            # Пропавший список грязных постов тоже восстанавливается.
+            if value == delta or not cache.has_key(self.dirty_key):
+                self._mark_dirty(pk)
+        start_flusher()
+
+    def pending(self, pks):
+        """Несохраненные приращения для набора первичных ключей."""
+        keys = {self._key(pk): pk for pk in pks}
+        return {
+            keys[key]: value
+            for key, value in self.cache.get_many(list(keys)).items()
+        }
+
+    def annotate(self, objects, attr):
+        """Проставляет объектам сумму сохраненного значения и буфера."""
+        objects = list(objects)
+        pending = self.pending(obj.pk for obj in objects)
+        for obj in objects:
+            stored = getattr(obj, self.field)
+            setattr(obj, attr, stored + pending.get(obj.pk, 0))
+        return objects
+
+    def flush(self):
+        """Записывает накопленные приращения в БД. Возвращает их число."""
+        cache = self.cache
+        self._retry_unmarked()
+        dirty = cache.get(self.dirty_key)
+        if not dirty:
+            return 0
+        pending = self.pending(dirty)
+        by_delta = defaultdict(list)
+        for pk, delta in pending.items():
+            if delta:
+                by_delta[delta].append(pk)
+        model = self._get_model()
+        with transaction.atomic():
+            for delta, pks in by_delta.items():
+                model.objects.filter(pk__in=pks).update(
+                    **{self.field: F(self.field) + delta}
+                )
+        self._subtract(pending)
+        try:
+            self._clean_dirty(dirty)
+        except CounterLockTimeout:
+            # Записанные посты останутся грязными, их нулевые
+            # приращения отсеются следующим сбросом.
+            logger.warning('Счетчик %s: блокировка занята', self.prefix)
+        return sum(pending.values())
+
+    def _subtract(self, flushed):
+        for pk, delta in flushed.items():
+            if delta:
+                try:
+                    self.cache.decr(self._key(pk), delta)
+                except ValueError:
+                    # Ключ вытеснен: приращение уже записано в БД.
+                    pass
+
+    def _acquire(self):
+        """Берет блокировку списка грязных постов и возвращает ее токен.
+
+        Если блокировку не удалось взять, список не трогается.
+        """
+        token = uuid.uuid4().hex
+        for _ in range(LOCK_ATTEMPTS):
+            if self.cache.add(self._lock_key, token, LOCK_TIMEOUT):
+                return token
+            time.sleep(0.001)
+        raise CounterLockTimeout(self.prefix)
+
+    def _release(self, token):
+        # Чужую блокировку, взятую после истечения нашей, не удаляем.
+        if self.cache.get(self._lock_key) == token:
+            self.cache.delete(self._lock_key)
+
+    @property
+    def _lock_key(self):
+        return f'{self.dirty_key}:lock'
+
+    def _mark_dirty(self, pk):
+        try:
+            self._add_dirty({pk})
+        except CounterLockTimeout:
+            with self._unmarked_lock:
+                self._unmarked.add(pk)
+
+    def _retry_unmarked(self):
+        with self._unmarked_lock:
+            pks, self._unmarked = self._unmarked, set()
+        if not pks:
+            return
+        try:
+            self._add_dirty(pks)
+        except CounterLockTimeout:
+            with self._unmarked_lock:
+                self._unmarked |= pks
+
+    def _add_dirty(self, pks):
+        token = self._acquire()
+        try:
+            dirty = self.cache.get(self.dirty_key) or set()
+            dirty |= pks
+            self.cache.set(self.dirty_key, dirty, None)
+        finally:
+            self._release(token)
+
+    def _clean_dirty(self, flushed):
+        token = self._acquire()
+        try:
+            # Посты, которые успели получить новые приращения во время
+            # сброса, остаются грязными до следующего раза.
+            busy = self.pending(flushed)
+            dirty = self.cache.get(self.dirty_key) or set()
+            dirty -= {pk for pk in flushed if not busy.get(pk)}
+            self.cache.set(self.dirty_key, dirty, None)
+        finally:
+            self._release(token)
+
+
+post_views = BufferedCounter('posts.Post', 'views')
+post_likes = BufferedCounter('posts.Post', 'likes')
+
+COUNTERS = [post_views, post_likes]
+
+
+def flush_all():
+    return {counter.prefix: counter.flush() for counter in COUNTERS}
+
+
+_flusher = None
+_flusher_lock = threading.Lock()
+
+
+def _flush_forever(interval):
+    while True:
+        time.sleep(interval)
+        try:
+            flush_all()
+        except Exception:
+            logger.exception('Не удалось сбросить счетчики')
+        finally:
+            close_old_connections()
+
+
+def start_flusher():
+    global _flusher
+    interval = settings.COUNTERS_FLUSH_INTERVAL
+    if _flusher is not None or not interval:
+        return
+    with _flusher_lock:
+        if _flusher is None:
+            _flusher = threading.Thread(
+                target=_flush_forever, args=(interval,),
+                name='counters-flusher', daemon=True
+            )
+            _flusher.start()
@@ -0,0 +1,106 @@
+"""Ежедневные дайджесты новых постов для подписчиков.
+
+Все письма строятся за один отсортированный проход по ``Post``,
+соединенному с ``Follow``: строки приходят упорядоченными по
+получателю, группируются на лету и отправляются пачками, поэтому
+память не зависит от числа подписчиков.
+"""
+from datetime import timedelta
+from itertools import groupby, islice
+from operator import itemgetter
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db.models.functions import Substr
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .models import DigestRun, Follow
+
+POSTS_PER_DIGEST = 20
+EXCERPT_LENGTH = 200
+CHUNK_SIZE = 2000
+BATCH_SIZE = 500
+
+DIGEST_FIELDS = (
+    'user_id', 'user__username', 'user__email', 'author__username',
+    'author__posts__id', 'author__posts__pub_date', 'excerpt',
+)
+
+
+def iter_digest_rows(since, until):
+    return (
+        Follow.objects
+        .filter(
+            author__posts__pub_date__gt=since,
+            author__posts__pub_date__lte=until,
+            author__posts__is_deleted=False,
+        )
+        .exclude(user__email='')
+        .annotate(excerpt=Substr('author__posts__text', 1, EXCERPT_LENGTH))
+        .order_by('user_id', '-author__posts__pub_date')
+        .values_list(*DIGEST_FIELDS, named=True)
+        .iterator(chunk_size=CHUNK_SIZE)
+    )
+
+
+def iter_digests(since, until):
+    """Выдает пары (получатель, посты) по одной на подписчика."""
+    for _, rows in groupby(iter_digest_rows(since, until), itemgetter(0)):
+        first = next(rows)
+        posts = [first] + list(islice(rows, POSTS_PER_DIGEST - 1))
+        total = len(posts) + sum(1 for _ in rows)
+        recipient = {
+            'username': first.user__username,
+            'email': first.user__email,
+            'more': total - len(posts),
+        }
+        yield recipient, posts
+
+
+def build_message(recipient, posts):
+    body = render_to_string('posts/email/digest.txt', {
+        'recipient': recipient,
+        'posts': posts,
+        'site_url': settings.SITE_URL,
+    })
+    return EmailMessage(
+        subject='Новые записи ваших авторов',
+        body=body,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[recipient['email']],
+    )
+
+
+def send_digests(since, until, batch_size=BATCH_SIZE, dry_run=False):
+    """Отправляет дайджесты пачками. Возвращает число писем."""
+    connection = None if dry_run else get_connection()
+    sent = 0
+    digests = iter_digests(since, until)
+    while True:
+        batch = [
+            build_message(recipient, posts)
+            for recipient, posts in islice(digests, batch_size)
+        ]
+        if not batch:
+            return sent
+        if connection is not None:
+            connection.send_messages(batch)
+        sent += len(batch)
+
+
+def run_digests(batch_size=BATCH_SIZE, dry_run=False):
+    """Рассылает дайджесты постов, вышедших после прошлой рассылки,
+    и записывает ``DigestRun``. Возвращает число писем."""
+    until = timezone.now()
+    last_run = DigestRun.objects.first()
+    since = (
+        last_run.posts_until if last_run
+        else until - timedelta(days=1)
+    )
+    sent = send_digests(since, until, batch_size=batch_size, dry_run=dry_run)
+    if not dry_run:
+        DigestRun.objects.create(
+            posts_since=since, posts_until=until, recipients=sent
+        )
+    return sent
@@ -0,0 +1,164 @@
+"""RSS и Atom ленты сайта, групп и авторов.
+
+Читатели, опрашивающие HTML-страницы профилей и групп, переходят
+на ленты. Перед рендерингом выполняется один запрос за датой самого
+свежего поста: по ней и поколению лент строится ETag, и повторный опрос
+без изменений получает ``304`` без выборки постов. ``Last-Modified``
+не отдается: правка поста не меняет дату самого свежего из них,
+и клиент с ``If-Modified-Since`` не увидел бы правку. Отрендеренные тела
+лент хранятся в кэше под ключом с этим ETag, поэтому новый пост сам их
+вытесняет, а правки и удаления сбрасывают общее поколение лент.
+"""
+import hashlib
+from calendar import timegm
+
+from django.contrib.syndication.views import Feed
+from django.core.cache import cache
+from django.core.exceptions import ObjectDoesNotExist
+from django.db.models import Max
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.http import Http404, HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.http import quote_etag
+from django.utils.text import Truncator
+
+from .models import Group, Post, User
+
+FEED_SIZE = 20
+FEED_CACHE_TIMEOUT = 60 * 60
+GENERATION_KEY = 'feeds:generation'
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def bump_generation(**kwargs):
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.set(GENERATION_KEY, 1, None)
+
+
+class CachedFeed(Feed):
+    """Лента с условным GET и кэшированием тела ответа."""
+
+    def posts(self, obj):
+        return Post.objects.all()
+
+    def items(self, obj):
+        return self.posts(obj).select_related('author', 'group')[:FEED_SIZE]
+
+    def item_title(self, item):
+        return Truncator(item.text).chars(60)
+
+    def item_description(self, item):
+        return item.text
+
+    def item_link(self, item):
+        return reverse('posts:post_detail', args=[item.pk])
+
+    def item_pubdate(self, item):
+        return item.pub_date
+
+    def item_author_name(self, item):
+        return item.author.get_full_name() or item.author.username
+
+    def item_categories(self, item):
+        return [item.group.title] if item.group else []
+
+    def __call__(self, request, *args, **kwargs):
+        try:
+            obj = self.get_object(request, *args, **kwargs)
+        except ObjectDoesNotExist:
+            raise Http404('Feed object does not exist.')
+        latest = self.posts(obj).aggregate(latest=Max('pub_date'))['latest']
+        timestamp = timegm(latest.utctimetuple()) if latest else 0
+        generation = cache.get(GENERATION_KEY, 0)
+        etag = quote_etag(f'{timestamp}-{generation}')
+        response = get_conditional_response(request, etag=etag)
+        if response is not None:
+            return response
+        url = request.build_absolute_uri(request.path)
+        key = 'feeds:{}:{}'.format(
+            hashlib.md5(url.encode()).hexdigest(), etag.strip('"')
+        )
+        cached = cache.get(key)
+        if cached is None:
+            feedgen = self.get_feed(obj, request)
+            response = HttpResponse(content_type=feedgen.content_type)
+            feedgen.write(response, 'utf-8')
+            cache.set(
+                key, (response.content, feedgen.content_type),
+                FEED_CACHE_TIMEOUT
+            )
+        else:
+            content, content_type = cached
+            response = HttpResponse(content, content_type=content_type)
+        response['ETag'] = etag
+        return response
+
+
+class AtomFeedMixin:
+    feed_type = Atom1Feed
+
+    def subtitle(self, obj):
+        return self.description(obj)
+
+
+class LatestPostsFeed(CachedFeed):
+    title = 'Yatube: новые посты'
+
+    def link(self, obj):
+        return reverse('posts:index')
+
+    def description(self, obj):
+        return 'Последние посты всех авторов'
+
+
+class GroupPostsFeed(CachedFeed):
+    def get_object(self, request, slug):
+        return get_object_or_404(Group, slug=slug)
+
+    def posts(self, obj):
+        return Post.objects.filter(group=obj)
+
+    def title(self, obj):
+        return f'Yatube: {obj.title}'
+
+    def link(self, obj):
+        return reverse('posts:group_posts', args=[obj.slug])
+
+    def description(self, obj):
+        return obj.description
+
+
+class AuthorPostsFeed(CachedFeed):
+    def get_object(self, request, username):
+        return get_object_or_404(User, username=username)
+
+    def posts(self, obj):
+        return Post.objects.filter(author=obj)
+
+    def title(self, obj):
+        return f'Yatube: {obj.get_full_name() or obj.username}'
+
+    def link(self, obj):
+        return reverse('posts:profile', args=[obj.username])
+
+    def description(self, obj):
+        return f'Посты пользователя {obj.username}'
+
+
+class LatestPostsAtomFeed(AtomFeedMixin, LatestPostsFeed):
+    pass
+
+
+class GroupPostsAtomFeed(AtomFeedMixin, GroupPostsFeed):
+    pass
+
+
+class AuthorPostsAtomFeed(AtomFeedMixin, AuthorPostsFeed):
+    pass
@@ -0,0 +1,110 @@
+"""Кэш ленты подписок.
+
+Для каждого пользователя в кэше лежат id постов первых страниц ленты
+и общее число постов. Страница из кэша собирается одним запросом
+``in_bulk``, дальние страницы читаются из базы как раньше. Новый
+и удаленный пост автора сбрасывают кэш его подписчиков фоновой задачей
+``posts.invalidate_followers``: подписчики выбираются одним запросом
+и удаляются из кэша через ``delete_many``. При кэше в памяти процесса
+задача выполняется сразу в веб-процессе.
+"""
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.jobs import enqueue
+from core.paginator import FeedPaginator
+
+from . import queries
+from .models import Follow, Post
+
+CACHED_PAGES = 5
+FEED_CACHE_TIMEOUT = 60 * 60
+INVALIDATE_BATCH = 1000
+
+
+def feed_key(user_id):
+    return f'follow_feed:{user_id}'
+
+
+def get_feed(user, size):
+    """Id первых ``size`` постов ленты и общее число постов."""
+    key = feed_key(user.pk)
+    feed = cache.get(key)
+    if feed is None:
+        posts = Post.objects.filter(author__following__user=user)
+        feed = (list(posts.values_list('pk', flat=True)[:size]),
+                posts.count())
+        cache.set(key, feed, FEED_CACHE_TIMEOUT)
+    return feed
+
+
+def hydrate(ids):
+    posts = queries.feed_posts().in_bulk(ids)
+    return [posts[pk] for pk in ids if pk in posts]
+
+
+class FollowFeedPaginator(FeedPaginator):
+    def __init__(self, user, per_page):
+        self.user = user
+        self.ids, count = get_feed(user, per_page * CACHED_PAGES)
+        super().__init__(self.ids, per_page)
+        self.__dict__['count'] = count
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        top = min(bottom + self.per_page, self.count)
+        if top <= len(self.ids):
+            posts = hydrate(self.ids[bottom:top])
+        else:
+            posts = queries.follow_posts(self.user)[bottom:top]
+        return self._get_page(posts, number, self)
+
+
+def invalidate_user(user_id):
+    cache.delete(feed_key(user_id))
+
+
+def invalidate_followers(author_ids):
+    followers = (
+        Follow.objects.filter(author_id__in=author_ids)
+        .values_list('user_id', flat=True)
+        .distinct()
+        .iterator()
+    )
+    keys = []
+    for user_id in followers:
+        keys.append(feed_key(user_id))
+        if len(keys) >= INVALIDATE_BATCH:
+            cache.delete_many(keys)
+            keys = []
+    cache.delete_many(keys)
+
+
+def schedule_invalidation(author_id):
+    enqueue(
+        'posts.invalidate_followers',
+        dedup_key=f'follow_feed:{author_id}',
+        author_ids=[author_id],
+    )
+
+
+@receiver(post_save, sender=Post)
+def post_published(sender, instance, created, **kwargs):
+    if created:
+        author_id = instance.author_id
+        transaction.on_commit(lambda: schedule_invalidation(author_id))
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    author_id = instance.author_id
+    transaction.on_commit(lambda: schedule_invalidation(author_id))
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def follow_changed(sender, instance, **kwargs):
+    invalidate_user(instance.user_id)
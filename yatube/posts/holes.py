@@ -0,0 +1,90 @@
+"""Пользовательские фрагменты страниц постов и сброс общего кэша.
+
+Страница поста кэшируется целиком для всех посетителей, поэтому новый
+комментарий или правка поста сразу удаляют ее из кэша. Главная лента
+и страницы групп кэшируются с поколением ``FEED_GENERATION``: любое
+изменение поста или группы сбрасывает все их страницы разом.
+"""
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.urls import reverse
+
+from core.holes import (bump_generation, invalidate_shared_page, provider,
+                        shared_page_key)
+
+from .counters import post_likes
+from .forms import CommentForm
+from .likes import liked_ids
+from .models import Comment, Follow, Group, Post
+from .notifications import get_unread_count
+
+FEED_GENERATION = 'posts.feed'
+
+
+@provider('includes/header.html')
+def header(request):
+    if not request.user.is_authenticated:
+        return {}
+    return {'unread_notifications': get_unread_count(request.user)}
+
+
+@provider('posts/includes/comment_form.html')
+def comment_form(request, post_id):
+    return {'form': CommentForm()}
+
+
+@provider('posts/includes/follow_button.html')
+def follow_button(request, username):
+    following = request.user.is_authenticated and Follow.objects.filter(
+        user=request.user, author__username=username
+    ).exists()
+    return {'following': following}
+
+
+@provider('posts/includes/like_button.html', batch=True)
+def like_buttons(request, params_list):
+    post_ids = [params['post_id'] for params in params_list]
+    liked = liked_ids(request.user, post_ids)
+    pending = post_likes.pending(post_ids)
+    return [
+        {
+            'liked': params['post_id'] in liked,
+            'like_count': params['likes'] + pending.get(params['post_id'], 0),
+        }
+        for params in params_list
+    ]
+
+
+def invalidate_post_page(post_id):
+    invalidate_shared_page(
+        'post_detail', reverse('posts:post_detail', args=[post_id])
+    )
+
+
+def invalidate_post_pages(post_ids):
+    cache.delete_many([
+        shared_page_key(
+            'post_detail', reverse('posts:post_detail', args=[post_id])
+        )
+        for post_id in post_ids
+    ])
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def post_changed(sender, instance, **kwargs):
+    invalidate_post_page(instance.pk)
+    bump_generation(FEED_GENERATION)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_changed(sender, instance, **kwargs):
+    bump_generation(FEED_GENERATION)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def comment_changed(sender, instance, **kwargs):
+    invalidate_post_page(instance.post_id)
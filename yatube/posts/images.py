@@ -0,0 +1,60 @@
+"""Заглушки и заранее нарезанные размеры картинок постов.
+
+Для каждой картинки один раз при загрузке считается крошечная
+JPEG-миниатюра в виде data URI. Лента показывает ее фоном, пока
+настоящая картинка загружается лениво. Размеры для ленты нарезает
+фоновая задача ``posts.pregenerate_thumbnails``.
+"""
+import base64
+import logging
+from io import BytesIO
+
+from django.db import transaction
+from PIL import Image, ImageOps
+from sorl.thumbnail import get_thumbnail
+
+from core.jobs import enqueue
+
+logger = logging.getLogger('yatube.images')
+
+# Отметка картинки, для которой заглушку посчитать не удалось, чтобы
+# досчет не пытался снова.
+NO_PLACEHOLDER = '-'
+PLACEHOLDER_SIZE = (16, 6)
+PLACEHOLDER_QUALITY = 40
+THUMBNAIL_GEOMETRIES = ('480x170', '960x339', '1440x509')
+
+
+def make_placeholder(fileobj):
+    """Data URI крошечной миниатюры или пустая строка для битого файла."""
+    try:
+        with Image.open(fileobj) as image:
+            image = ImageOps.fit(image.convert('RGB'), PLACEHOLDER_SIZE)
+            buffer = BytesIO()
+            image.save(buffer, 'JPEG', quality=PLACEHOLDER_QUALITY)
+    except (OSError, ValueError):
+        return ''
+    encoded = base64.b64encode(buffer.getvalue()).decode()
+    return f'data:image/jpeg;base64,{encoded}'
+
+
+def placeholder_for_path(item):
+    """Обработчик для пула процессов: (pk, путь) -> (pk, заглушка)."""
+    pk, path = item
+    return pk, make_placeholder(path)
+
+
+def pregenerate_thumbnails(image):
+    for geometry in THUMBNAIL_GEOMETRIES:
+        try:
+            get_thumbnail(image, geometry, crop='center', upscale=True)
+        except Exception:
+            logger.exception('Не удалось нарезать %s для %s', geometry, image)
+
+
+def schedule_thumbnails(name):
+    transaction.on_commit(lambda: enqueue(
+        'posts.pregenerate_thumbnails',
+        dedup_key=f'thumbnails:{name}',
+        image_name=name,
+    ))
@@ -0,0 +1,30 @@
+"""Фоновые задачи приложения posts."""
+from core.jobs import task
+
+from . import digests, follow_feed, images, mentions, notifications
+from .models import Post
+
+
+@task('posts.invalidate_followers', uses_cache=True)
+def invalidate_followers(author_ids):
+    follow_feed.invalidate_followers(author_ids)
+
+
+@task('posts.pregenerate_thumbnails')
+def pregenerate_thumbnails(image_name):
+    images.pregenerate_thumbnails(Post(image=image_name).image)
+
+
+@task('posts.send_mentions')
+def send_mentions():
+    mentions.send_notifications()
+
+
+@task('posts.send_digests')
+def send_digests(batch_size=digests.BATCH_SIZE):
+    digests.run_digests(batch_size=batch_size)
+
+
+@task('posts.aggregate_notifications')
+def aggregate_notifications():
+    notifications.aggregate()
@@ -0,0 +1,87 @@
+"""Лайки постов.
+
+Лайк — строка ``Like`` с уникальной парой (пользователь, пост), а число
+лайков поста копится в буферизованном счетчике ``post_likes`` и
+записывается в ``Post.likes`` пакетно. Поэтому всплеск лайков одного
+поста не выстраивает писателей в очередь за одной строкой.
+
+Клиент присылает желаемое состояние, а не просьбу переключить его:
+лайк — один ``INSERT ... ON CONFLICT DO NOTHING``, снятие — один
+``DELETE``, и повторная отправка формы ничего не меняет. Счетчик
+меняется, только если база сообщила о вставленной или удаленной строке.
+
+Буферы счетчиков теряются при падении процесса, поэтому
+``reconcile_likes`` пересчитывает ``Post.likes`` по таблице лайков.
+"""
+from django.db import connection
+from django.db.models import Count, F
+from django.utils import timezone
+
+from .counters import post_likes
+from .models import Like, Post
+
+RECONCILE_BATCH = 1000
+
+
+def _insert_like(user_id, post_id):
+    """Вставляет лайк одним запросом. True, если строка добавлена."""
+    quote = connection.ops.quote_name
+    columns = ', '.join(quote(name) for name in ('created', 'user_id',
+                                                 'post_id'))
+    sql = (
+        f'INSERT INTO {quote(Like._meta.db_table)} ({columns}) '
+        f'VALUES (%s, %s, %s) ON CONFLICT DO NOTHING'
+    )
+    created = connection.ops.adapt_datetimefield_value(timezone.now())
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [created, user_id, post_id])
+        return cursor.rowcount == 1
+
+
+def set_like(user, post_id, liked):
+    """Ставит (``liked=True``) или снимает лайк. Возвращает True, если
+    состояние изменилось."""
+    if liked:
+        changed = _insert_like(user.pk, post_id)
+    else:
+        deleted, _ = Like.objects.filter(
+            user=user, post_id=post_id
+        ).delete()
+        changed = bool(deleted)
+    if changed:
+        post_likes.incr(post_id, 1 if liked else -1)
+    return changed
+
+
+def liked_ids(user, post_ids):
+    """Id постов из ``post_ids``, которые лайкнул пользователь."""
+    if not user.is_authenticated or not post_ids:
+        return set()
+    return set(
+        Like.objects.filter(user=user, post_id__in=post_ids)
+        .values_list('post_id', flat=True)
+    )
+
+
+def reconcile_likes(batch_size=RECONCILE_BATCH):
+    """Приводит ``Post.likes`` к числу строк ``Like`` пачками по
+    диапазонам id. Возвращает число исправленных постов."""
+    fixed = 0
+    last_pk = 0
+    while True:
+        pks = list(
+            Post.all_objects.filter(pk__gt=last_pk).order_by('pk')
+            .values_list('pk', flat=True)[:batch_size]
+        )
+        if not pks:
+            return fixed
+        last_pk = pks[-1]
+        wrong = [
+            Post(pk=pk, likes=actual) for pk, actual in
+            Post.all_objects.filter(pk__gte=pks[0], pk__lte=last_pk)
+            .annotate(actual=Count('liked_by'))
+            .exclude(likes=F('actual'))
+            .values_list('pk', 'actual')
+        ]
+        Post.all_objects.bulk_update(wrong, ['likes'])
+        fixed += len(wrong)
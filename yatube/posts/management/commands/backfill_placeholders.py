@@ -0,0 +1,53 @@
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from posts.images import NO_PLACEHOLDER, placeholder_for_path
+from posts.models import Post
+
+BATCH_SIZE = 200
+
+
+class Command(BaseCommand):
+    help = 'Считает заглушки для картинок постов, загруженных ранее'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None)
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        storage = Post._meta.get_field('image').storage
+        pending = (
+            Post.all_objects.filter(image_placeholder='')
+            .exclude(image='')
+            .order_by('pk')
+        )
+        done = failed = 0
+        last_pk = 0
+        with ProcessPoolExecutor(options['workers']) as pool:
+            while True:
+                # Пачки выбираются по ключу, а не курсором по строкам,
+                # которые тут же обновляются.
+                rows = list(
+                    pending.filter(pk__gt=last_pk)
+                    .values_list('pk', 'image')[:options['batch_size']]
+                )
+                if not rows:
+                    break
+                last_pk = rows[-1][0]
+                batch = [(pk, storage.path(name)) for pk, name in rows]
+                posts = [
+                    Post(pk=pk, image_placeholder=placeholder
+                         or NO_PLACEHOLDER)
+                    for pk, placeholder in pool.map(
+                        placeholder_for_path, batch, chunksize=16
+                    )
+                ]
+                Post.all_objects.bulk_update(posts, ['image_placeholder'])
+                failed += sum(
+                    post.image_placeholder == NO_PLACEHOLDER for post in posts
+                )
+                done += len(posts)
+                self.stdout.write(
+                    f'Обработано картинок: {done}, без заглушки: {failed}'
+                )
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import Post
+from posts.tags import backfill
+
+BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = 'Индексирует хэштеги постов, сохраненных до появления тегов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        last_pk = 0
+        done = 0
+        while True:
+            batch = list(
+                Post.all_objects.filter(pk__gt=last_pk)
+                .order_by('pk')
+                .values_list('pk', 'text')[:options['batch_size']]
+            )
+            if not batch:
+                break
+            last_pk = batch[-1][0]
+            done += backfill(batch)
+            self.stdout.write(f'До поста {last_pk}: связей с тегами {done}')
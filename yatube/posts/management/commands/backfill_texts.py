@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from posts.mentions import render_batch
+from posts.models import Comment, Post
+
+BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = 'Рендерит текст со ссылками и начало текста для старых записей'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        targets = (
+            (Post, ['text_html', 'excerpt']),
+            (Comment, ['text_html']),
+        )
+        for model, fields in targets:
+            last_pk = 0
+            done = 0
+            while True:
+                batch = list(
+                    model.all_objects.filter(pk__gt=last_pk, text_html='')
+                    .order_by('pk')
+                    .only('pk', 'text')[:options['batch_size']]
+                )
+                if not batch:
+                    break
+                last_pk = batch[-1].pk
+                render_batch(batch)
+                model.all_objects.bulk_update(batch, fields)
+                done += len(batch)
+                self.stdout.write(
+                    f'{model._meta.verbose_name_plural}: {done}'
+                )
@@ -0,0 +1,98 @@
+import statistics
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, transaction
+from django.db.models import F
+
+from posts.counters import post_likes
+from posts.likes import set_like
+from posts.models import Like, Post, User
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает лайки с буферизованным счетчиком и с обновлением '
+            'строки поста под конкурентной нагрузкой на один пост')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=16)
+        parser.add_argument('--users', type=int, default=50)
+
+    def direct(self, user, post_id, liked):
+        with transaction.atomic():
+            if liked:
+                Like.objects.create(user=user, post_id=post_id)
+            else:
+                Like.objects.filter(user=user, post_id=post_id).delete()
+            Post.objects.filter(pk=post_id).update(
+                likes=F('likes') + (1 if liked else -1)
+            )
+
+    def buffered(self, user, post_id, liked):
+        set_like(user, post_id, liked)
+
+    def run(self, toggle, users, post, threads):
+        latencies = []
+        errors = [0]
+        lock = threading.Lock()
+        chunks = [users[number::threads] for number in range(threads)]
+
+        def worker(chunk):
+            local = []
+            try:
+                for user in chunk:
+                    for liked in (True, False):
+                        start = time.perf_counter()
+                        try:
+                            toggle(user, post.pk, liked)
+                        except Exception:
+                            with lock:
+                                errors[0] += 1
+                        local.append(time.perf_counter() - start)
+            finally:
+                close_old_connections()
+            with lock:
+                latencies.extend(local)
+
+        workers = [
+            threading.Thread(target=worker, args=(chunk,))
+            for chunk in chunks
+        ]
+        start = time.perf_counter()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        latencies.sort()
+        return {
+            'toggles': len(latencies),
+            'rate': len(latencies) / elapsed,
+            'errors': errors[0],
+            'p50': statistics.median(latencies),
+            'p99': latencies[int(len(latencies) * 0.99) - 1],
+        }
+
+    def handle(self, *args, **options):
+        author = User.objects.create_user(username='bench_likes_author')
+        users = [
+            User.objects.create_user(username=f'bench_likes_{number}')
+            for number in range(options['users'])
+        ]
+        post = Post.objects.create(author=author, text='Бенчмарк лайков')
+        try:
+            for name, toggle in (('direct', self.direct),
+                                 ('buffered', self.buffered)):
+                result = self.run(toggle, users, post, options['threads'])
+                self.stdout.write(
+                    '{:<9} переключений {toggles}, {rate:.0f}/с, '
+                    'ошибок {errors}, p50 {p50:.4f} с, '
+                    'p99 {p99:.4f} с'.format(name, **result)
+                )
+            post_likes.flush()
+        finally:
+            post.delete()
+            User.objects.filter(pk__in=[author.pk] + [
+                user.pk for user in users
+            ]).delete()
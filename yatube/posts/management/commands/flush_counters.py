@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from core.cache import cache_is_local
+from posts.counters import COUNTERS_CACHE, flush_all
+
+
+class Command(BaseCommand):
+    help = (
+        'Записывает буферизованные счетчики постов в базу данных. '
+        'Сбрасывается только кэш, видимый этому процессу: с кэшем в '
+        'памяти процесса счетчики веб-процессов записывает их фоновый '
+        'поток (COUNTERS_FLUSH_INTERVAL).'
+    )
+
+    def handle(self, *args, **options):
+        if cache_is_local(COUNTERS_CACHE):
+            self.stderr.write(
+                'Кэш в памяти процесса: буфер этой команды пуст, счетчики '
+                'веб-процессов записывает их фоновый поток.'
+            )
+        for counter, flushed in flush_all().items():
+            self.stdout.write(f'{counter}: записано {flushed}')
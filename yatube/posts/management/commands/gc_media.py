@@ -0,0 +1,43 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.media_gc import (find_orphans, reconcile_thumbnails,
+                            referenced_images, remove_orphans)
+
+
+class Command(BaseCommand):
+    help = 'Удаляет картинки и миниатюры, на которые не ссылается ни один пост'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true')
+        parser.add_argument(
+            '--quarantine',
+            help='Переносить файлы в этот каталог вместо удаления'
+        )
+        parser.add_argument('--workers', type=int, default=8)
+        parser.add_argument(
+            '--min-age', type=float, default=24,
+            help='Не трогать файлы моложе стольких часов'
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        referenced = referenced_images()
+        self.stdout.write(f'Картинок в постах: {len(referenced)}')
+        stale, live = reconcile_thumbnails(referenced, dry_run=dry_run)
+        self.stdout.write(f'Устаревших записей sorl: {stale}')
+        min_age = options['min_age'] * 3600
+        orphans = find_orphans(
+            settings.MEDIA_ROOT, referenced, live, min_age=min_age
+        )
+        count, size = remove_orphans(
+            orphans, settings.MEDIA_ROOT,
+            quarantine=options['quarantine'],
+            workers=options['workers'],
+            dry_run=dry_run,
+            min_age=min_age,
+        )
+        action = 'Найдено' if dry_run else 'Удалено'
+        self.stdout.write(
+            f'{action} файлов: {count}, {size / 2 ** 20:.1f} МБ'
+        )
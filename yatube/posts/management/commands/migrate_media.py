@@ -0,0 +1,60 @@
+import os
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.models import Post
+
+BATCH_SIZE = 200
+
+
+class Command(BaseCommand):
+    help = (
+        'Переносит картинки постов в хранилище с адресацией по содержимому '
+        'и переписывает пути в базе пачками'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument(
+            '--keep-old', action='store_true',
+            help='Не удалять старые файлы после переноса'
+        )
+
+    def handle(self, *args, **options):
+        storage = Post._meta.get_field('image').storage
+        last_pk = 0
+        moved = missing = 0
+        while True:
+            batch = list(
+                Post.all_objects.filter(pk__gt=last_pk)
+                .exclude(image='')
+                .order_by('pk')
+                .values_list('pk', 'image')[:options['batch_size']]
+            )
+            if not batch:
+                break
+            last_pk = batch[-1][0]
+            updated, old_names = [], []
+            for pk, name in batch:
+                if storage.is_hashed_name(name):
+                    continue
+                if not storage.exists(name):
+                    missing += 1
+                    continue
+                with storage.open(name) as content:
+                    new_name = storage.save(
+                        f'posts/{os.path.basename(name)}', content
+                    )
+                updated.append(Post(pk=pk, image=new_name))
+                old_names.append(name)
+            with transaction.atomic():
+                Post.all_objects.bulk_update(updated, ['image'])
+            if not options['keep_old']:
+                for name in old_names:
+                    storage.delete(name)
+            moved += len(updated)
+            self.stdout.write(
+                f'Перенесено: {moved}, нет файла: {missing}, '
+                f'последний id: {last_pk}'
+            )
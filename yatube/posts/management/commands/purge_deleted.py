@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.models import PurgeTask
+from posts.purge import BATCH_SIZE, purge_deleted_posts, run_task
+
+
+class Command(BaseCommand):
+    help = 'Пакетно удаляет мягко удаленных пользователей и посты'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument(
+            '--pause', type=float, default=0,
+            help='Пауза между пачками в секундах, чтобы не мешать записи'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        pause = options['pause']
+
+        def report_task(task):
+            self.stdout.write(
+                f'{task.username}: этап {task.stage}, '
+                f'комментариев {task.comments}, постов {task.posts}, '
+                f'подписок {task.follows}, файлов {task.files}'
+            )
+            time.sleep(pause)
+
+        def report_posts(total):
+            self.stdout.write(f'Удалено скрытых постов: {total}')
+            time.sleep(pause)
+
+        for task in PurgeTask.objects.exclude(stage='done'):
+            run_task(task, batch_size, report_task)
+        purge_deleted_posts(batch_size, report_posts)
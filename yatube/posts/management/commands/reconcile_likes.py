@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from posts.counters import post_likes
+from posts.likes import RECONCILE_BATCH, reconcile_likes
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает число лайков постов по таблице лайков'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=RECONCILE_BATCH
+        )
+
+    def handle(self, *args, **options):
+        post_likes.flush()
+        fixed = reconcile_likes(batch_size=options['batch_size'])
+        self.stdout.write(f'Исправлено постов: {fixed}')
@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.jobs import enqueue
+from posts.digests import BATCH_SIZE, run_digests
+
+
+class Command(BaseCommand):
+    help = 'Рассылает подписчикам дайджест новых постов их авторов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument('--dry-run', action='store_true')
+        parser.add_argument(
+            '--enqueue', action='store_true',
+            help='Поставить рассылку в очередь фоновых задач'
+        )
+
+    def handle(self, *args, **options):
+        if options['enqueue']:
+            job = enqueue(
+                'posts.send_digests', dedup_key='digests',
+                batch_size=options['batch_size'],
+            )
+            self.stdout.write(f'Рассылка в очереди: задача #{job.pk}')
+            return
+        start = time.perf_counter()
+        sent = run_digests(
+            batch_size=options['batch_size'],
+            dry_run=options['dry_run'],
+        )
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            f'Дайджестов: {sent} за {elapsed:.2f} с '
+            f'({sent / elapsed if elapsed else 0:.0f} писем/с)'
+        )
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from posts.mentions import BATCH_SIZE, send_notifications
+
+
+class Command(BaseCommand):
+    help = 'Рассылает уведомления о новых упоминаниях пользователей'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        sent = send_notifications(batch_size=options['batch_size'])
+        self.stdout.write(f'Уведомлений об упоминаниях: {sent}')
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from posts.trending import update_trending
+
+
+class Command(BaseCommand):
+    help = 'Обновляет рейтинг популярных постов по новым комментариям'
+
+    def handle(self, *args, **options):
+        comments = update_trending()
+        self.stdout.write(f'Учтено новых комментариев: {comments}')
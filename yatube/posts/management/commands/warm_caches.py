@@ -0,0 +1,59 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.cache import cache_is_local
+from core.warmup import warm
+from posts.warmup import popular_urls, urls_from_access_log
+
+
+class Command(BaseCommand):
+    help = 'Прогревает кэши страниц, фрагментов и миниатюр после деплоя'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--access-log',
+            help='Журнал доступа в формате combined для выбора страниц'
+        )
+        parser.add_argument(
+            '--url',
+            help='Адрес работающего сайта, у которого запрашивать страницы'
+        )
+        parser.add_argument('--limit', type=int, default=50)
+        parser.add_argument('--concurrency', type=int, default=4)
+        parser.add_argument(
+            '--budget', type=float, default=60,
+            help='Бюджет времени в секундах'
+        )
+
+    def handle(self, *args, **options):
+        if options['url'] is None and cache_is_local():
+            self.stderr.write(
+                'Кэш в памяти процесса: страницы прогреются только в этой '
+                'команде, веб-процессам достанутся лишь миниатюры. '
+                'Укажите --url или общий кэш.'
+            )
+        if options['access_log']:
+            with open(options['access_log'], errors='replace') as log:
+                urls = urls_from_access_log(log, options['limit'])
+        else:
+            urls = popular_urls(options['limit'])
+
+        def progress(url, status, duration):
+            if status is None:
+                self.stderr.write(f'Нет ответа {duration:.3f} с {url}')
+            else:
+                self.stdout.write(f'{status} {duration:.3f} с {url}')
+
+        start = time.perf_counter()
+        done, failed, skipped = warm(
+            urls,
+            concurrency=options['concurrency'],
+            budget=options['budget'],
+            progress=progress,
+            base_url=options['url'],
+        )
+        self.stdout.write(
+            f'Прогрето страниц: {done}, с ошибкой: {failed}, '
+            f'не успели: {skipped} за {time.perf_counter() - start:.1f} с'
+        )
@@ -0,0 +1,212 @@
+"""Сборка мусора в каталоге медиафайлов.
+
+Файлы картинок остаются на диске после замены картинки в ``post_edit``
+и после удаления постов, а миниатюры sorl — после удаления исходников.
+Дерево обходится потоково через ``os.scandir``, а набор используемых
+файлов хранится как множество коротких хэшей имен, поэтому память
+остается ограниченной даже для десятков миллионов файлов.
+"""
+import hashlib
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from itertools import chain, islice
+
+from sorl.thumbnail import default as thumbnail_default
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.helpers import deserialize
+from sorl.thumbnail.images import deserialize_image_file
+from sorl.thumbnail.kvstores.base import add_prefix, del_prefix
+from sorl.thumbnail.models import KVStore
+
+from .models import Post
+
+CHUNK_SIZE = 5000
+DELETE_BATCH = 1000
+IMAGE_DIRS = ('posts', '.incoming')
+
+
+def name_digest(name):
+    return hashlib.blake2b(name.encode(), digest_size=8).digest()
+
+
+def referenced_images(chunk_size=CHUNK_SIZE):
+    """Хэши имен всех картинок, на которые ссылаются посты."""
+    digests = set()
+    last_pk = 0
+    while True:
+        chunk = list(
+            Post.all_objects.filter(pk__gt=last_pk)
+            .exclude(image='')
+            .order_by('pk')
+            .values_list('pk', 'image')[:chunk_size]
+        )
+        if not chunk:
+            return digests
+        last_pk = chunk[-1][0]
+        digests.update(name_digest(name) for _, name in chunk)
+
+
+def walk(root, relative):
+    """Потоково выдает (имя относительно MEDIA_ROOT, путь, mtime)."""
+    stack = [relative]
+    while stack:
+        current = stack.pop()
+        try:
+            entries = os.scandir(os.path.join(root, current))
+        except FileNotFoundError:
+            continue
+        with entries:
+            for entry in entries:
+                name = f'{current}/{entry.name}'
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(name)
+                elif entry.is_file(follow_symlinks=False):
+                    yield name, entry.path, entry.stat().st_mtime
+
+
+def kvstore_rows(identity, chunk_size=CHUNK_SIZE):
+    """Потоково выдает пачки (ключ без префикса, значение) из таблицы
+    KV-хранилища sorl, не загружая все ключи в память."""
+    prefix = add_prefix('', identity)
+    last_key = prefix
+    while True:
+        chunk = list(
+            KVStore.objects.filter(
+                key__startswith=prefix, key__gt=last_key
+            ).order_by('key').values_list('key', 'value')[:chunk_size]
+        )
+        if not chunk:
+            return
+        last_key = chunk[-1][0]
+        yield [(del_prefix(key), value) for key, value in chunk]
+
+
+def image_files(keys):
+    """Записи sorl об изображениях по их ключам: {ключ: ImageFile}."""
+    rows = KVStore.objects.filter(
+        key__in=[add_prefix(key) for key in keys]
+    ).values_list('key', 'value')
+    return {
+        del_prefix(key): deserialize_image_file(value) for key, value in rows
+    }
+
+
+def collect_live_thumbnails(referenced, dry_run=False):
+    """Хэши имен миниатюр, исходники которых используются. Записи
+    о миниатюрах забытых исходников удаляются из KV-хранилища, а сами
+    файлы остаются на диске и убираются вместе с остальными сиротами."""
+    kvstore = thumbnail_default.kvstore
+    live = set()
+    for chunk in kvstore_rows('thumbnails'):
+        sources = image_files(key for key, _ in chunk)
+        lists = {key: deserialize(value) or [] for key, value in chunk}
+        thumbnails = image_files(chain.from_iterable(lists.values()))
+        for source_key, thumbnail_keys in lists.items():
+            source = sources.get(source_key)
+            alive = (
+                source is not None
+                and name_digest(source.name) in referenced
+            )
+            for key in thumbnail_keys:
+                thumbnail = thumbnails.get(key)
+                if thumbnail is None:
+                    continue
+                if alive:
+                    live.add(name_digest(thumbnail.name))
+                elif not dry_run:
+                    kvstore.delete(thumbnail, delete_thumbnails=False)
+    return live
+
+
+def reconcile_thumbnails(referenced, dry_run=False):
+    """Удаляет из KV-хранилища sorl записи об исходниках, которых больше
+    нет среди постов, вместе с записями об их миниатюрах. Возвращает
+    число таких исходников и хэши имен живых миниатюр."""
+    kvstore = thumbnail_default.kvstore
+    prefix = thumbnail_settings.THUMBNAIL_PREFIX
+    live = collect_live_thumbnails(referenced, dry_run=dry_run)
+    stale = 0
+    for chunk in kvstore_rows('image'):
+        for _, value in chunk:
+            image_file = deserialize_image_file(value)
+            if image_file.name.startswith(prefix):
+                known = name_digest(image_file.name) in live
+            else:
+                known = name_digest(image_file.name) in referenced
+                stale += not known
+            if not known and not dry_run:
+                kvstore.delete(image_file)
+    return stale, live
+
+
+def find_orphans(root, referenced, live_thumbnails, min_age):
+    threshold = time.time() - min_age
+    prefix = thumbnail_settings.THUMBNAIL_PREFIX.rstrip('/')
+    sources = [(directory, referenced) for directory in IMAGE_DIRS]
+    sources.append((prefix, live_thumbnails))
+    for relative, known in sources:
+        for name, path, mtime in walk(root, relative):
+            # Свежие файлы могут принадлежать загрузке, которая еще
+            # не сохранена в базе.
+            if mtime > threshold:
+                continue
+            if name_digest(name) not in known:
+                yield name, path
+
+
+def still_referenced(names):
+    """Имена из пачки, на которые успели сослаться посты после того,
+    как был собран набор используемых файлов."""
+    return set(
+        Post.all_objects.filter(image__in=names)
+        .values_list('image', flat=True)
+    )
+
+
+def remove_file(item, quarantine=None, dry_run=False, min_age=0):
+    """Удаляет файл или переносит его в карантин. Возвращает размер
+    файла или None, если файла уже нет или его недавно загрузили."""
+    name, path = item
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    if time.time() - stat.st_mtime < min_age:
+        return None
+    if dry_run:
+        return stat.st_size
+    if quarantine:
+        target = os.path.join(quarantine, name)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.move(path, target)
+    else:
+        os.remove(path)
+    return stat.st_size
+
+
+def remove_orphans(orphans, root, quarantine=None, workers=8,
+                   dry_run=False, min_age=0):
+    """Удаляет или переносит в карантин файлы пачками в несколько
+    потоков. Возвращает (число файлов, байт).
+
+    Перед удалением каждая пачка проверяется заново: файл, на который
+    уже сослался пост или который загрузили повторно, остается.
+    """
+    remove = partial(
+        remove_file, quarantine=quarantine, dry_run=dry_run, min_age=min_age
+    )
+    count = size = 0
+    with ThreadPoolExecutor(workers) as pool:
+        while True:
+            batch = list(islice(orphans, DELETE_BATCH))
+            if not batch:
+                return count, size
+            referenced = still_referenced([name for name, _ in batch])
+            batch = [item for item in batch if item[0] not in referenced]
+            for removed in pool.map(remove, batch):
+                if removed is not None:
+                    count += 1
+                    size += removed
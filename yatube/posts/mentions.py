@@ -0,0 +1,170 @@
+"""Упоминания пользователей через ``@username``.
+
+При сохранении поста или комментария все упомянутые имена проверяются
+одним запросом ``IN``, связи записываются в ``Mention``, а текст со
+ссылками на профили и теги сохраняется в ``text_html``, чтобы шаблоны
+не разбирали текст при каждом показе. Уведомления о новых упоминаниях
+рассылает пачками задача ``posts.send_mentions``: она ставится через
+``NOTIFY_DELAY`` секунд после упоминания, и все упоминания за это время
+уходят одной рассылкой. То же делает команда ``manage.py send_mentions``.
+"""
+import re
+from itertools import groupby
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models.signals import post_save, pre_save
+from django.dispatch import receiver
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils.html import escape
+from django.utils.text import Truncator
+
+from core.jobs import enqueue
+
+from .models import EXCERPT_LENGTH, Comment, Mention, Post, User
+from .tags import TAG_RE
+
+MENTION_RE = re.compile(r'(?<![\w@])@([\w.+-]*\w)')
+BATCH_SIZE = 500
+NOTIFY_DELAY = 60
+
+
+def extract_mentions(text):
+    return set(MENTION_RE.findall(text))
+
+
+def resolve_mentions(text):
+    """Словарь имя -> id для существующих упомянутых пользователей."""
+    names = extract_mentions(text)
+    if not names:
+        return {}
+    return dict(
+        User.objects.filter(username__in=names, is_active=True)
+        .values_list('username', 'pk')
+    )
+
+
+def render_html(text, usernames):
+    def mention(match):
+        name = match.group(1)
+        if name not in usernames:
+            return match.group(0)
+        url = reverse('posts:profile', args=[name])
+        return f'<a href="{url}">@{name}</a>'
+
+    def tag(match):
+        url = reverse('posts:tag_posts', args=[match.group(1).lower()])
+        return f'<a href="{url}">{match.group(0)}</a>'
+
+    html = MENTION_RE.sub(mention, escape(text))
+    return TAG_RE.sub(tag, html)
+
+
+def sync_mentions(obj, user_ids, created=False):
+    field = obj._meta.model_name
+    if created:
+        existing = set()
+    else:
+        existing = set(
+            Mention.objects.filter(**{field: obj})
+            .values_list('user_id', flat=True)
+        )
+    removed = existing - user_ids
+    if removed:
+        Mention.objects.filter(**{field: obj, 'user_id__in': removed}).delete()
+    added = user_ids - existing
+    if added:
+        # Упоминание самого себя сохраняется, но уведомление не нужно.
+        Mention.objects.bulk_create([
+            Mention(user_id=pk, notified=pk == obj.author_id, **{field: obj})
+            for pk in added
+        ])
+        if added - {obj.author_id}:
+            transaction.on_commit(schedule_notifications)
+
+
+def schedule_notifications():
+    enqueue('posts.send_mentions', dedup_key='mentions', delay=NOTIFY_DELAY)
+
+
+def render_fields(obj, usernames):
+    """Заполняет ``text_html`` и у постов сохраненное начало текста."""
+    obj.text_html = render_html(obj.text, usernames)
+    if isinstance(obj, Post):
+        obj.excerpt = render_html(
+            Truncator(obj.text).chars(EXCERPT_LENGTH), usernames
+        )
+
+
+def render_batch(objects):
+    """Рендерит пачку объектов с одним запросом к ``User``."""
+    names = set()
+    for obj in objects:
+        names |= extract_mentions(obj.text)
+    usernames = set(
+        User.objects.filter(username__in=names, is_active=True)
+        .values_list('username', flat=True)
+    ) if names else set()
+    for obj in objects:
+        render_fields(obj, usernames)
+
+
+@receiver(pre_save, sender=Post)
+@receiver(pre_save, sender=Comment)
+def render_text(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and 'text' not in update_fields:
+        return
+    instance._mentioned = resolve_mentions(instance.text)
+    render_fields(instance, instance._mentioned)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=Comment)
+def update_mentions(sender, instance, created, **kwargs):
+    mentioned = instance.__dict__.pop('_mentioned', None)
+    if mentioned is not None:
+        sync_mentions(instance, set(mentioned.values()), created=created)
+
+
+def build_message(user, mentions):
+    body = render_to_string('posts/email/mentions.txt', {
+        'user': user,
+        'mentions': mentions,
+        'site_url': settings.SITE_URL,
+    })
+    return EmailMessage(
+        subject='Вас упомянули на Yatube',
+        body=body,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[user.email],
+    )
+
+
+def send_notifications(batch_size=BATCH_SIZE):
+    """Рассылает уведомления о новых упоминаниях пачками, одно письмо
+    на пользователя в пачке. Возвращает число писем."""
+    connection = get_connection()
+    sent = 0
+    while True:
+        batch = list(
+            Mention.objects.filter(notified=False)
+            .select_related(
+                'user', 'post__author', 'comment__author', 'comment__post'
+            )
+            .order_by('user_id', 'pk')[:batch_size]
+        )
+        if not batch:
+            return sent
+        messages = []
+        for _, mentions in groupby(batch, lambda mention: mention.user_id):
+            mentions = list(mentions)
+            user = mentions[0].user
+            if user.email:
+                messages.append(build_message(user, mentions))
+        connection.send_messages(messages)
+        Mention.objects.filter(
+            pk__in=[mention.pk for mention in batch]
+        ).update(notified=True)
+        sent += len(messages)
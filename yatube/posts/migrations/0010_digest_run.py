@@ -0,0 +1,28 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0009_trending'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DigestRun',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+                ('posts_since', models.DateTimeField(verbose_name='Посты начиная с')),
+                ('posts_until', models.DateTimeField(verbose_name='Посты по')),
+                ('recipients', models.PositiveIntegerField(default=0, verbose_name='Получателей')),
+            ],
+            options={
+                'verbose_name': 'Рассылка дайджеста',
+                'verbose_name_plural': 'Рассылки дайджестов',
+                'ordering': ['-created'],
+            },
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0010_digest_run'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PurgeTask',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+                ('user_id', models.PositiveIntegerField(verbose_name='ID пользователя')),
+                ('username', models.CharField(max_length=150, verbose_name='Имя пользователя')),
+                ('stage', models.CharField(choices=[('comments', 'Комментарии'), ('posts', 'Посты'), ('follows', 'Подписки'), ('user', 'Пользователь'), ('done', 'Завершено')], default='comments', max_length=20, verbose_name='Этап')),
+                ('comments', models.PositiveIntegerField(default=0, verbose_name='Удалено комментариев')),
+                ('posts', models.PositiveIntegerField(default=0, verbose_name='Удалено постов')),
+                ('follows', models.PositiveIntegerField(default=0, verbose_name='Удалено подписок')),
+                ('files', models.PositiveIntegerField(default=0, verbose_name='Удалено файлов')),
+                ('finished', models.DateTimeField(blank=True, null=True, verbose_name='Дата завершения')),
+            ],
+            options={
+                'verbose_name': 'Удаление пользователя',
+                'verbose_name_plural': 'Удаления пользователей',
+                'ordering': ['created'],
+            },
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='is_deleted',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Удален'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='is_deleted',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Удален'),
+        ),
+    ]
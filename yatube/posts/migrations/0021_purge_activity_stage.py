@@ -0,0 +1,18 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0020_follow_fields'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='purgetask',
+            name='stage',
+            field=models.CharField(choices=[('comments', 'Комментарии'), ('posts', 'Посты'), ('follows', 'Подписки'), ('activity', 'Лайки и уведомления'), ('user', 'Пользователь'), ('done', 'Завершено')], default='comments', max_length=20, verbose_name='Этап'),
+        ),
+    ]
@@ -1,9 +1,31 @@
 from django.db import models
+from django.utils.safestring import mark_safe
+from django.utils.text import Truncator
 from django.contrib.auth import get_user_model
 from core.models import CreatedModel
+from core.storage import content_storage
+
+from .images import NO_PLACEHOLDER, make_placeholder, schedule_thumbnails
 
 User = get_user_model()
 
+EXCERPT_LENGTH = 300
+
+
+class VisibleManager(models.Manager):
+    """Менеджер, скрывающий удаленные записи."""
+    def get_queryset(self):
+        return super().get_queryset().filter(is_deleted=False)
+
+
+class LinkedTextMixin:
+    """Текст со ссылками на упомянутых пользователей и теги."""
+    @property
+    def linked_text(self):
+        if self.text_html:
+            return mark_safe(self.text_html)
+        return self.text
+
 
 class Group(models.Model):
     title = models.CharField(max_length=200, verbose_name='Название')
@@ -14,13 +36,24 @@ class Group(models.Model):
         return self.title
 
 
-class Post(models.Model):
+class Post(LinkedTextMixin, models.Model):
     text = models.TextField(
         verbose_name='Текст поста',
         help_text='Введите текст поста'
     )
+    text_html = models.TextField(
+        blank=True,
+        editable=False,
+        verbose_name='Текст со ссылками'
+    )
+    excerpt = models.TextField(
+        blank=True,
+        editable=False,
+        verbose_name='Начало текста со ссылками'
+    )
     pub_date = models.DateTimeField(
         auto_now_add=True,
+        db_index=True,
         verbose_name='Дата публикации'
     )
     author = models.ForeignKey(
@@ -40,19 +73,71 @@ class Post(models.Model):
     image = models.ImageField(
         'Картинка',
         upload_to='posts/',
+        storage=content_storage,
         blank=True
     )
+    image_placeholder = models.TextField(
+        blank=True,
+        editable=False,
+        verbose_name='Заглушка картинки'
+    )
+    views = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Просмотры'
+    )
+    likes = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Лайки'
+    )
+    is_deleted = models.BooleanField(
+        default=False,
+        editable=False,
+        verbose_name='Удален'
+    )
+
+    objects = VisibleManager()
+    all_objects = models.Manager()
 
     def __str__(self):
         return self.text[:15]
 
+    @property
+    def linked_excerpt(self):
+        if self.excerpt:
+            return mark_safe(self.excerpt)
+        # Ленты отдают начало текста в text_head, а сам text отложен.
+        text = getattr(self, 'text_head', None) or self.text
+        return Truncator(text).chars(EXCERPT_LENGTH)
+
+    @property
+    def placeholder_uri(self):
+        """Data URI заглушки картинки или пустая строка."""
+        if self.image_placeholder == NO_PLACEHOLDER:
+            return ''
+        return self.image_placeholder
+
+    def save(self, *args, **kwargs):
+        uploaded = bool(self.image) and not self.image._committed
+        if uploaded:
+            self.image_placeholder = (
+                make_placeholder(self.image) or NO_PLACEHOLDER
+            )
+            self.image.seek(0)
+        elif not self.image:
+            self.image_placeholder = ''
+        super().save(*args, **kwargs)
+        if uploaded:
+            schedule_thumbnails(self.image.name)
+
     class Meta:
         ordering = ['-pub_date']
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
 
 
-class Comment(CreatedModel):
+class Comment(LinkedTextMixin, CreatedModel):
     post = models.ForeignKey(
         Post,
         on_delete=models.CASCADE,
@@ -69,6 +154,19 @@ class Comment(CreatedModel):
         verbose_name='Текст комментария',
         help_text='Введите текст комментария'
     )
+    text_html = models.TextField(
+        blank=True,
+        editable=False,
+        verbose_name='Текст со ссылками'
+    )
+    is_deleted = models.BooleanField(
+        default=False,
+        editable=False,
+        verbose_name='Удален'
+    )
+
+    objects = VisibleManager()
+    all_objects = models.Manager()
 
     def __str__(self):
         return self.text
@@ -95,3 +193,298 @@ class Follow(models.Model):
     class Meta:
         verbose_name = 'Подписка'
         verbose_name_plural = 'Подписки'
+
+
+class Like(CreatedModel):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='likes',
+        verbose_name='Пользователь'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='liked_by',
+        verbose_name='Пост'
+    )
+
+    class Meta:
+        unique_together = ('user', 'post')
+        verbose_name = 'Лайк'
+        verbose_name_plural = 'Лайки'
+
+
+class Tag(models.Model):
+    name = models.CharField(
+        max_length=50,
+        unique=True,
+        verbose_name='Название'
+    )
+
+    def __str__(self):
+        return f'#{self.name}'
+
+    class Meta:
+        ordering = ['name']
+        verbose_name = 'Хэштег'
+        verbose_name_plural = 'Хэштеги'
+
+
+class TaggedPost(models.Model):
+    tag = models.ForeignKey(
+        Tag,
+        on_delete=models.CASCADE,
+        related_name='tagged_posts',
+        verbose_name='Хэштег'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='tagged',
+        verbose_name='Пост'
+    )
+
+    class Meta:
+        unique_together = ('tag', 'post')
+        verbose_name = 'Хэштег поста'
+        verbose_name_plural = 'Хэштеги постов'
+
+
+class Mention(CreatedModel):
+    """Упоминание пользователя в посте или комментарии."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='mentions',
+        verbose_name='Упомянутый пользователь'
+    )
+    post = models.ForeignKey(
+        Post,
+        blank=True, null=True,
+        on_delete=models.CASCADE,
+        related_name='mentions',
+        verbose_name='Пост'
+    )
+    comment = models.ForeignKey(
+        Comment,
+        blank=True, null=True,
+        on_delete=models.CASCADE,
+        related_name='mentions',
+        verbose_name='Комментарий'
+    )
+    notified = models.BooleanField(
+        default=False,
+        db_index=True,
+        verbose_name='Уведомление отправлено'
+    )
+
+    class Meta:
+        ordering = ['-created']
+        verbose_name = 'Упоминание'
+        verbose_name_plural = 'Упоминания'
+
+
+NOTIFICATION_KINDS = (
+    ('comment', 'Комментарий'),
+    ('follow', 'Подписка'),
+)
+
+
+class NotificationEvent(CreatedModel):
+    """Событие, которое еще не попало в уведомления."""
+    recipient = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Получатель'
+    )
+    actor = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор события'
+    )
+    kind = models.CharField(
+        max_length=20,
+        choices=NOTIFICATION_KINDS,
+        verbose_name='Тип'
+    )
+    post = models.ForeignKey(
+        Post,
+        blank=True, null=True,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Пост'
+    )
+
+    class Meta:
+        verbose_name = 'Событие уведомлений'
+        verbose_name_plural = 'События уведомлений'
+
+
+class Notification(CreatedModel):
+    """Уведомление, объединяющее однотипные события."""
+    recipient = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='notifications',
+        verbose_name='Получатель'
+    )
+    actor = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Последний автор события'
+    )
+    kind = models.CharField(
+        max_length=20,
+        choices=NOTIFICATION_KINDS,
+        verbose_name='Тип'
+    )
+    post = models.ForeignKey(
+        Post,
+        blank=True, null=True,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Пост'
+    )
+    count = models.PositiveIntegerField(
+        default=1,
+        verbose_name='Событий'
+    )
+    read = models.BooleanField(
+        default=False,
+        verbose_name='Прочитано'
+    )
+
+    class Meta:
+        ordering = ['-pk']
+        verbose_name = 'Уведомление'
+        verbose_name_plural = 'Уведомления'
+        indexes = [
+            models.Index(fields=['recipient', 'read'],
+                         name='posts_notif_recipient_read'),
+        ]
+
+
+class NotificationCounter(models.Model):
+    """Число непрочитанных уведомлений пользователя."""
+    user = models.OneToOneField(
+        User,
+        primary_key=True,
+        on_delete=models.CASCADE,
+        related_name='notification_counter',
+        verbose_name='Пользователь'
+    )
+    unread = models.IntegerField(
+        default=0,
+        verbose_name='Непрочитанных'
+    )
+
+    class Meta:
+        verbose_name = 'Счетчик уведомлений'
+        verbose_name_plural = 'Счетчики уведомлений'
+
+
+class TrendingPost(models.Model):
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='trending',
+        verbose_name='Пост'
+    )
+    score = models.FloatField(
+        db_index=True,
+        verbose_name='Рейтинг'
+    )
+
+    class Meta:
+        ordering = ['-score']
+        verbose_name = 'Популярный пост'
+        verbose_name_plural = 'Популярные посты'
+
+
+class TrendingRun(CreatedModel):
+    """Запуск пересчета популярных постов."""
+    last_comment_id = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Последний учтенный комментарий'
+    )
+
+    class Meta:
+        ordering = ['-created']
+        verbose_name = 'Пересчет популярных постов'
+        verbose_name_plural = 'Пересчеты популярных постов'
+
+
+class DigestRun(CreatedModel):
+    """Рассылка дайджестов новых постов подписчикам."""
+    posts_since = models.DateTimeField(
+        verbose_name='Посты начиная с'
+    )
+    posts_until = models.DateTimeField(
+        verbose_name='Посты по'
+    )
+    recipients = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Получателей'
+    )
+
+    class Meta:
+        ordering = ['-created']
+        verbose_name = 'Рассылка дайджеста'
+        verbose_name_plural = 'Рассылки дайджестов'
+
+
+class PurgeTask(CreatedModel):
+    """Фоновое удаление пользователя и всего, что с ним связано."""
+    STAGES = (
+        ('comments', 'Комментарии'),
+        ('posts', 'Посты'),
+        ('follows', 'Подписки'),
+        ('activity', 'Лайки и уведомления'),
+        ('user', 'Пользователь'),
+        ('done', 'Завершено'),
+    )
+    user_id = models.PositiveIntegerField(
+        verbose_name='ID пользователя'
+    )
+    username = models.CharField(
+        max_length=150,
+        verbose_name='Имя пользователя'
+    )
+    stage = models.CharField(
+        max_length=20,
+        choices=STAGES,
+        default='comments',
+        verbose_name='Этап'
+    )
+    comments = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Удалено комментариев'
+    )
+    posts = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Удалено постов'
+    )
+    follows = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Удалено подписок'
+    )
+    files = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Удалено файлов'
+    )
+    finished = models.DateTimeField(
+        blank=True, null=True,
+        verbose_name='Дата завершения'
+    )
+
+    def __str__(self):
+        return f'{self.username}: {self.get_stage_display()}'
+
+    class Meta:
+        ordering = ['created']
+        verbose_name = 'Удаление пользователя'
+        verbose_name_plural = 'Удаления пользователей'
@@ -0,0 +1,182 @@
+"""Уведомления о комментариях и подписках.
+
+Новый комментарий или подписка записывают одну строку в
+``NotificationEvent`` — запрос не ждет ничего больше. Фоновая задача
+``posts.aggregate_notifications`` забирает события пачками и сводит их
+в уведомления: однотипные события по одному посту, еще не прочитанные
+получателем, объединяются в одно уведомление вида «5 новых
+комментариев». Число непрочитанных хранится в ``NotificationCounter``
+и в общем кэше, поэтому шапка сайта не считает уведомления через
+``COUNT(*)``. Кэш в памяти процесса не используется: сводка идет
+в обработчике задач, и сбросить записи веб-процессов он не может.
+
+Сводка и ``mark_read`` сначала блокируют строки счетчиков получателей,
+поэтому прочтение не теряется между чтением непрочитанных уведомлений
+и их заменой.
+"""
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from core.cache import cache_is_local
+from core.jobs import enqueue
+
+from .models import (Comment, Follow, Notification, NotificationCounter,
+                     NotificationEvent)
+
+AGGREGATE_DELAY = 30
+BATCH_SIZE = 1000
+UNREAD_CACHE_TIMEOUT = 24 * 60 * 60
+
+
+def unread_key(user_id):
+    return f'notifications.unread:{user_id}'
+
+
+def _read_counter(user_id):
+    return NotificationCounter.objects.filter(user_id=user_id).values_list(
+        'unread', flat=True
+    ).first() or 0
+
+
+def get_unread_count(user):
+    if cache_is_local():
+        return _read_counter(user.pk)
+    key = unread_key(user.pk)
+    count = cache.get(key)
+    if count is None:
+        count = _read_counter(user.pk)
+        cache.set(key, count, UNREAD_CACHE_TIMEOUT)
+    return count
+
+
+def _lock_counters(user_ids):
+    """Блокирует счетчики до конца транзакции в порядке ключей."""
+    list(
+        NotificationCounter.objects.select_for_update()
+        .filter(user_id__in=user_ids).order_by('pk')
+        .values_list('pk', flat=True)
+    )
+
+
+def add_event(recipient_id, actor_id, kind, post_id=None):
+    if recipient_id == actor_id:
+        return
+    NotificationEvent.objects.create(
+        recipient_id=recipient_id, actor_id=actor_id,
+        kind=kind, post_id=post_id,
+    )
+    transaction.on_commit(schedule_aggregation)
+
+
+def schedule_aggregation():
+    enqueue('posts.aggregate_notifications', dedup_key='notifications',
+            delay=AGGREGATE_DELAY)
+
+
+@receiver(post_save, sender=Comment)
+def comment_added(sender, instance, created, **kwargs):
+    if created:
+        add_event(instance.post.author_id, instance.author_id,
+                  'comment', instance.post_id)
+
+
+@receiver(post_save, sender=Follow)
+def follow_added(sender, instance, created, **kwargs):
+    if created:
+        add_event(instance.author_id, instance.user_id, 'follow')
+
+
+def _update_counters(deltas):
+    by_delta = defaultdict(list)
+    for user_id, delta in deltas.items():
+        if delta:
+            by_delta[delta].append(user_id)
+    for delta, user_ids in by_delta.items():
+        NotificationCounter.objects.filter(user_id__in=user_ids).update(
+            unread=F('unread') + delta
+        )
+    if not cache_is_local():
+        keys = [unread_key(pk) for pk in deltas]
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def _merge(events):
+    """Новые уведомления вместо непрочитанных. Возвращает (прирост
+    счетчиков, id заменяемых уведомлений, новые уведомления)."""
+    groups = {}
+    for event in events:
+        key = (event.recipient_id, event.kind, event.post_id)
+        count, _ = groups.get(key, (0, None))
+        groups[key] = (count + 1, event.actor_id)
+    existing = {
+        (item.recipient_id, item.kind, item.post_id): item
+        for item in Notification.objects.filter(
+            recipient_id__in={key[0] for key in groups}, read=False
+        )
+    }
+    deltas = defaultdict(int)
+    replaced = []
+    created = []
+    for key, (count, actor_id) in groups.items():
+        recipient_id, kind, post_id = key
+        previous = existing.get(key)
+        if previous is not None:
+            # Обновленное уведомление пересоздается, чтобы подняться
+            # в начало ленты, упорядоченной по ``pk``.
+            replaced.append(previous.pk)
+            count += previous.count
+        else:
+            deltas[recipient_id] += 1
+        created.append(Notification(
+            recipient_id=recipient_id, actor_id=actor_id, kind=kind,
+            post_id=post_id, count=count,
+        ))
+    return deltas, replaced, created
+
+
+def aggregate_batch(events):
+    """Сводит пачку событий в уведомления. Возвращает число созданных."""
+    recipients = {event.recipient_id for event in events}
+    NotificationCounter.objects.bulk_create(
+        [NotificationCounter(user_id=pk) for pk in recipients],
+        ignore_conflicts=True,
+    )
+    with transaction.atomic():
+        _lock_counters(recipients)
+        # Пока счетчики были заняты, эти события мог свести другой
+        # обработчик.
+        pending = set(NotificationEvent.objects.filter(
+            pk__in=[event.pk for event in events]
+        ).values_list('pk', flat=True))
+        events = [event for event in events if event.pk in pending]
+        deltas, replaced, created = _merge(events)
+        Notification.objects.filter(pk__in=replaced).delete()
+        Notification.objects.bulk_create(created)
+        NotificationEvent.objects.filter(pk__in=pending).delete()
+        _update_counters(deltas)
+    return len(created)
+
+
+def aggregate(batch_size=BATCH_SIZE):
+    total = 0
+    while True:
+        events = list(NotificationEvent.objects.order_by('pk')[:batch_size])
+        if not events:
+            return total
+        total += aggregate_batch(events)
+
+
+def mark_read(user):
+    with transaction.atomic():
+        _lock_counters([user.pk])
+        Notification.objects.filter(recipient=user, read=False).update(
+            read=True
+        )
+        NotificationCounter.objects.filter(user=user).update(unread=0)
+    if not cache_is_local():
+        cache.set(unread_key(user.pk), 0, UNREAD_CACHE_TIMEOUT)
@@ -0,0 +1,193 @@
+"""Мягкое удаление и фоновая очистка пользователей и постов.
+
+Удаление автора с тысячами постов одним ``delete()`` собирает все
+каскадные строки в память и надолго блокирует базу. Поэтому контент
+сначала скрывается флагом ``is_deleted`` одним ``UPDATE``, а затем
+``manage.py purge_deleted`` удаляет строки небольшими транзакциями.
+Прогресс хранится в ``PurgeTask``, так что после падения очистка
+продолжается с того же места.
+
+``UPDATE`` не отправляет сигналов, поэтому кэши, где могли остаться
+скрытые посты, сбрасываются явно.
+"""
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from core.holes import bump_generation
+
+from . import feeds, follow_feed
+from .counters import post_likes
+from .holes import FEED_GENERATION, invalidate_post_pages
+from .models import (Comment, Follow, Like, Mention, Notification,
+                     NotificationCounter, NotificationEvent, Post,
+                     PurgeTask, User)
+from .tags import POPULAR_TAGS_KEY
+from .trending import TRENDING_CACHE_KEY
+
+BATCH_SIZE = 500
+
+
+def invalidate_hidden(post_ids, author_ids):
+    """Сбрасывает страницы, ленты и списки со скрытыми постами."""
+    invalidate_post_pages(post_ids)
+    bump_generation(FEED_GENERATION)
+    feeds.bump_generation()
+    follow_feed.invalidate_followers(list(author_ids))
+    cache.delete_many([TRENDING_CACHE_KEY, POPULAR_TAGS_KEY])
+
+
+def soft_delete_user(user):
+    with transaction.atomic():
+        user.is_active = False
+        user.save(update_fields=['is_active'])
+        posts = Post.all_objects.filter(author=user, is_deleted=False)
+        comments = Comment.all_objects.filter(author=user, is_deleted=False)
+        post_ids = set(posts.values_list('pk', flat=True))
+        post_ids.update(comments.values_list('post_id', flat=True))
+        posts.update(is_deleted=True)
+        comments.update(is_deleted=True)
+        author_id = user.pk
+        transaction.on_commit(
+            lambda: invalidate_hidden(post_ids, [author_id])
+        )
+        return PurgeTask.objects.create(
+            user_id=user.pk, username=user.get_username()
+        )
+
+
+def soft_delete_posts(queryset):
+    with transaction.atomic():
+        rows = list(queryset.values_list('pk', 'author_id'))
+        hidden = Post.all_objects.filter(
+            pk__in=[pk for pk, _ in rows]
+        ).update(is_deleted=True)
+        transaction.on_commit(lambda: invalidate_hidden(
+            [pk for pk, _ in rows], {author_id for _, author_id in rows}
+        ))
+    return hidden
+
+
+def _delete_files(names):
+    # Одинаковые картинки хранятся одним файлом: удаляются только те,
+    # на которые больше не ссылается ни один пост и которые недавно
+    # не загружали заново для еще не сохраненного поста.
+    referenced = set(Post.all_objects.filter(
+        image__in=names
+    ).values_list('image', flat=True))
+    storage = Post._meta.get_field('image').storage
+    for name in set(names) - referenced:
+        storage.delete_if_stale(name)
+
+
+def _purge_posts(posts, batch_size):
+    """Удаляет пачку постов и возвращает (постов, комментариев, файлов)."""
+    ids = list(posts.values_list('pk', flat=True)[:batch_size])
+    if not ids:
+        return 0, 0, 0
+    images = list(Post.all_objects.filter(
+        pk__in=ids
+    ).exclude(image='').values_list('image', flat=True))
+    with transaction.atomic():
+        comments, _ = Comment.all_objects.filter(post__in=ids).delete()
+        Post.all_objects.filter(pk__in=ids).delete()
+        transaction.on_commit(lambda: _delete_files(images))
+    return len(ids), comments, len(images)
+
+
+def _purge_batch(task, batch_size):
+    """Выполняет одну пачку текущего этапа задачи."""
+    user_id = task.user_id
+    if task.stage == 'comments':
+        ids = list(Comment.all_objects.filter(
+            author_id=user_id
+        ).values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return 'posts', {}
+        deleted, _ = Comment.all_objects.filter(pk__in=ids).delete()
+        return 'comments', {'comments': deleted}
+    if task.stage == 'posts':
+        posts, comments, files = _purge_posts(
+            Post.all_objects.filter(author_id=user_id), batch_size
+        )
+        if not posts:
+            return 'follows', {}
+        return 'posts', {
+            'posts': posts, 'comments': comments, 'files': files
+        }
+    if task.stage == 'follows':
+        ids = list(Follow.objects.filter(
+            Q(user_id=user_id) | Q(author_id=user_id)
+        ).values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return 'activity', {}
+        deleted, _ = Follow.objects.filter(pk__in=ids).delete()
+        return 'follows', {'follows': deleted}
+    if task.stage == 'activity':
+        if _purge_activity(user_id, batch_size):
+            return 'activity', {}
+        return 'user', {}
+    User.objects.filter(pk=user_id).delete()
+    return 'done', {}
+
+
+def _activity(user_id):
+    either = Q(recipient_id=user_id) | Q(actor_id=user_id)
+    return [
+        Like.objects.filter(user_id=user_id),
+        Mention.objects.filter(user_id=user_id),
+        NotificationEvent.objects.filter(either),
+        Notification.objects.filter(either),
+        NotificationCounter.objects.filter(user_id=user_id),
+    ]
+
+
+def _unlike(post_ids):
+    for post_id in post_ids:
+        post_likes.incr(post_id, -1)
+
+
+def _purge_activity(user_id, batch_size):
+    """Удаляет пачку лайков и уведомлений. Возвращает False, когда их
+    не осталось и удаление пользователя ничего не соберет каскадом."""
+    for queryset in _activity(user_id):
+        ids = list(queryset.values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            continue
+        if queryset.model is Like:
+            liked = list(Like.objects.filter(
+                pk__in=ids
+            ).values_list('post_id', flat=True))
+            transaction.on_commit(lambda: _unlike(liked))
+        queryset.model.objects.filter(pk__in=ids).delete()
+        return True
+    return False
+
+
+def run_task(task, batch_size=BATCH_SIZE, progress=None):
+    while task.stage != 'done':
+        with transaction.atomic():
+            stage, counts = _purge_batch(task, batch_size)
+            task.stage = stage
+            for field, value in counts.items():
+                setattr(task, field, getattr(task, field) + value)
+            if stage == 'done':
+                task.finished = timezone.now()
+            task.save()
+        if progress is not None:
+            progress(task)
+    return task
+
+
+def purge_deleted_posts(batch_size=BATCH_SIZE, progress=None):
+    """Удаляет посты, скрытые без удаления автора."""
+    total = 0
+    posts = Post.all_objects.filter(is_deleted=True)
+    while True:
+        deleted, _, _ = _purge_posts(posts, batch_size)
+        if not deleted:
+            return total
+        total += deleted
+        if progress is not None:
+            progress(total)
@@ -0,0 +1,51 @@
+"""Запросы лент постов.
+
+Все списки постов строятся отсюда: автор и группа подтягиваются одним
+``JOIN``, а из таблицы постов читаются только поля карточки. Вместо
+полного текста карточка показывает сохраненное начало ``excerpt``,
+поэтому страницы лент не тянут из базы длинные тексты. Для постов,
+у которых ``excerpt`` еще не заполнен, база отдает только начало текста
+в ``text_head``.
+"""
+from django.db.models import Case, Value, When
+from django.db.models.functions import Substr
+
+from .models import EXCERPT_LENGTH, Post
+
+CARD_FIELDS = (
+    'id', 'pub_date', 'excerpt', 'image', 'image_placeholder', 'views',
+    'likes',
+    'author', 'author__username', 'author__first_name', 'author__last_name',
+    'group', 'group__slug', 'group__title',
+)
+
+
+def feed_posts(queryset=None):
+    if queryset is None:
+        queryset = Post.objects.all()
+    return queryset.select_related('author', 'group').only(
+        *CARD_FIELDS
+    ).annotate(text_head=Case(
+        When(excerpt='', then=Substr('text', 1, EXCERPT_LENGTH + 1)),
+        default=Value(''),
+    ))
+
+
+def index_posts():
+    return feed_posts()
+
+
+def group_posts(group):
+    return feed_posts(Post.objects.filter(group=group))
+
+
+def author_posts(author):
+    return feed_posts(Post.objects.filter(author=author))
+
+
+def follow_posts(user):
+    return feed_posts(Post.objects.filter(author__following__user=user))
+
+
+def tag_posts(tag):
+    return feed_posts(Post.objects.filter(tagged__tag=tag))
@@ -0,0 +1,190 @@
+"""Карта сайта для постов, профилей и групп.
+
+Разделы карты нарезаны по диапазонам первичных ключей, а не по
+``OFFSET``: раздел ``n`` содержит записи с ``pk`` от ``n * size`` до
+``(n + 1) * size``. XML отдается потоком из ``.iterator()``.
+
+Строки индекса — номер, дата и версия каждого раздела — один раз
+считаются группировкой и хранятся на диске ``SITEMAP_INDEX_TIMEOUT``.
+Заполненный раздел, в который новые записи уже не попадут, сохраняется
+на диск под своей версией и отдается без обращения к БД, пока версия
+в индексе не изменится. Разделы без даты изменения, кроме того,
+пересобираются раз в ``SITEMAP_CACHE_TIMEOUT``.
+"""
+import glob
+import json
+import os
+import time
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.db.models import Count, F, Max
+from django.urls import reverse
+
+from .models import Group, Post, User
+
+XML_HEADER = '<?xml version="1.0" encoding="UTF-8"?>\n'
+XMLNS = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+CHUNK_SIZE = 1000
+
+
+class SitemapSection:
+    def __init__(self, queryset, url_name, field, lastmod=None):
+        self.queryset = queryset
+        self.url_name = url_name
+        self.field = field
+        self.lastmod = lastmod
+
+    def sections(self, size):
+        """Номера непустых разделов с датой последнего изменения
+        и версией, которая меняется вместе с содержимым раздела."""
+        queryset = self.queryset.order_by().annotate(
+            section=F('pk') / size
+        ).values('section').annotate(count=Count('pk'))
+        if self.lastmod:
+            queryset = queryset.annotate(lastmod=Max(self.lastmod))
+        for row in queryset.order_by('section'):
+            lastmod = row.get('lastmod')
+            if lastmod is None:
+                yield row['section'], None, str(row['count'])
+                continue
+            date = lastmod.date().isoformat()
+            yield row['section'], date, f'{row["count"]}-{lastmod.timestamp()}'
+
+    def is_full(self, number, size):
+        """В раздел больше не попадут новые записи."""
+        model = self.queryset.model
+        last_pk = model._base_manager.aggregate(last=Max('pk'))['last']
+        return last_pk is not None and last_pk >= (number + 1) * size
+
+    def rows(self, number, size):
+        fields = [self.field] + ([self.lastmod] if self.lastmod else [])
+        return self.queryset.filter(
+            pk__gte=number * size, pk__lt=(number + 1) * size
+        ).order_by('pk').values_list(*fields).iterator(chunk_size=CHUNK_SIZE)
+
+
+SECTIONS = {
+    'posts': SitemapSection(
+        Post.objects.all(), 'posts:post_detail', 'pk', lastmod='pub_date'
+    ),
+    'profiles': SitemapSection(
+        User.objects.filter(is_active=True), 'posts:profile', 'username'
+    ),
+    'groups': SitemapSection(
+        Group.objects.all(), 'posts:group_posts', 'slug'
+    ),
+}
+
+
+def _url(path):
+    return escape(settings.SITE_URL + path)
+
+
+def is_fresh(path, timeout):
+    try:
+        age = time.time() - os.path.getmtime(path)
+    except OSError:
+        return False
+    return age < timeout
+
+
+def write_atomic(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+def index_rows():
+    """Строки индекса [имя, номер, дата, версия] всех разделов."""
+    path = os.path.join(settings.SITEMAP_CACHE_DIR, 'index.json')
+    if is_fresh(path, settings.SITEMAP_INDEX_TIMEOUT):
+        try:
+            with open(path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            pass
+    size = settings.SITEMAP_SECTION_SIZE
+    rows = [
+        [name, number, lastmod, version]
+        for name, section in SECTIONS.items()
+        for number, lastmod, version in section.sections(size)
+    ]
+    write_atomic(path, json.dumps(rows))
+    return rows
+
+
+def section_version(name, number):
+    """Версия раздела из индекса или None, если раздела в индексе нет."""
+    for row_name, row_number, _, version in index_rows():
+        if row_name == name and row_number == number:
+            return version
+    return None
+
+
+def iter_index():
+    yield XML_HEADER
+    yield f'<sitemapindex xmlns="{XMLNS}">\n'
+    for name, number, lastmod, _ in index_rows():
+        path = reverse('posts:sitemap_section', args=[name, number])
+        yield f'<sitemap><loc>{_url(path)}</loc>'
+        if lastmod is not None:
+            yield f'<lastmod>{lastmod}</lastmod>'
+        yield '</sitemap>\n'
+    yield '</sitemapindex>\n'
+
+
+def iter_section(section, number):
+    size = settings.SITEMAP_SECTION_SIZE
+    yield XML_HEADER
+    yield f'<urlset xmlns="{XMLNS}">\n'
+    chunk = []
+    for row in section.rows(number, size):
+        path = reverse(section.url_name, args=[row[0]])
+        line = f'<url><loc>{_url(path)}</loc>'
+        if section.lastmod:
+            line += f'<lastmod>{row[1].date().isoformat()}</lastmod>'
+        chunk.append(line + '</url>\n')
+        if len(chunk) >= CHUNK_SIZE:
+            yield ''.join(chunk)
+            chunk = []
+    yield ''.join(chunk)
+    yield '</urlset>\n'
+
+
+def cache_path(name, number, version):
+    return os.path.join(
+        settings.SITEMAP_CACHE_DIR, f'{name}-{number}-{version}.xml'
+    )
+
+
+def cached_section(name, number, version):
+    """Путь к файлу раздела с этой версией или None."""
+    path = cache_path(name, number, version)
+    if SECTIONS[name].lastmod:
+        return path if os.path.exists(path) else None
+    return path if is_fresh(path, settings.SITEMAP_CACHE_TIMEOUT) else None
+
+
+def write_through(chunks, path):
+    """Отдает куски дальше и сохраняет их в файл, если поток дошел
+    до конца. Файлы прежних версий раздела удаляются."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    name, number, _ = os.path.basename(path).split('-', 2)
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for chunk in chunks:
+                f.write(chunk)
+                yield chunk
+        os.replace(tmp_path, path)
+        pattern = os.path.join(os.path.dirname(path), f'{name}-{number}-*.xml')
+        for old_path in glob.glob(pattern):
+            if old_path != path:
+                os.remove(old_path)
+    finally:
+        # Оборванный клиентом поток не должен оставлять обрывок файла.
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
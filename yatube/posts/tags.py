@@ -0,0 +1,94 @@
+"""Хэштеги в тексте постов.
+
+Теги извлекаются из текста при сохранении поста и хранятся в таблицах
+``Tag`` и ``TaggedPost``. При правке поста меняются только добавленные
+и удаленные связи, а посты, сохраненные до появления тегов, индексирует
+команда ``manage.py backfill_tags``.
+"""
+import re
+
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .models import Post, Tag, TaggedPost
+
+TAG_RE = re.compile(r'(?<![\w&#])#(\w{1,50})')
+POPULAR_TAGS_KEY = 'popular_tags'
+POPULAR_TAGS_SIZE = 20
+POPULAR_TAGS_TIMEOUT = 300
+
+
+def extract_tags(text):
+    return {name.lower() for name in TAG_RE.findall(text)}
+
+
+def get_tag_ids(names):
+    """Id тегов по именам, недостающие теги создаются."""
+    Tag.objects.bulk_create(
+        [Tag(name=name) for name in names], ignore_conflicts=True
+    )
+    return dict(
+        Tag.objects.filter(name__in=names).values_list('name', 'pk')
+    )
+
+
+def sync_tags(post, created=False):
+    names = extract_tags(post.text)
+    if created:
+        current = {}
+    else:
+        current = dict(
+            TaggedPost.objects.filter(post=post)
+            .values_list('tag__name', 'pk')
+        )
+    removed = [pk for name, pk in current.items() if name not in names]
+    if removed:
+        TaggedPost.objects.filter(pk__in=removed).delete()
+    added = names - current.keys()
+    if added:
+        tag_ids = get_tag_ids(added)
+        TaggedPost.objects.bulk_create(
+            [TaggedPost(tag_id=tag_ids[name], post=post) for name in added],
+            ignore_conflicts=True
+        )
+
+
+@receiver(post_save, sender=Post)
+def update_post_tags(sender, instance, created, update_fields, **kwargs):
+    if update_fields is None or 'text' in update_fields:
+        sync_tags(instance, created=created)
+
+
+def backfill(posts):
+    """Индексирует теги пачки постов, заданной парами (pk, текст)."""
+    pairs = [
+        (pk, name) for pk, text in posts for name in extract_tags(text)
+    ]
+    if not pairs:
+        return 0
+    tag_ids = get_tag_ids({name for _, name in pairs})
+    TaggedPost.objects.bulk_create(
+        [TaggedPost(tag_id=tag_ids[name], post_id=pk) for pk, name in pairs],
+        ignore_conflicts=True
+    )
+    return len(pairs)
+
+
+def _popular_tags():
+    return list(
+        Tag.objects.annotate(posts_count=Count(
+            'tagged_posts',
+            filter=Q(tagged_posts__post__is_deleted=False)
+        ))
+        .filter(posts_count__gt=0)
+        .order_by('-posts_count', 'name')
+        .values('name', 'posts_count')[:POPULAR_TAGS_SIZE]
+    )
+
+
+def get_popular_tags():
+    return cache.get_or_set(
+        POPULAR_TAGS_KEY, _popular_tags, POPULAR_TAGS_TIMEOUT
+    )
@@ -0,0 +1,79 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from posts.models import Comment, Group, Post
+
+User = get_user_model()
+
+QUERY_BUDGET = 10
+
+
+class PostAdminTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass')
+        cls.group = Group.objects.create(
+            title='Заголовок', slug='test_slug', description='Описание')
+
+    def setUp(self):
+        self.admin_client = Client()
+        self.admin_client.force_login(self.admin)
+        cache.clear()
+
+    def create_posts(self, count):
+        for i in range(count):
+            post = Post.objects.create(
+                author=self.admin, group=self.group, text=f'Запись {i}')
+            Comment.objects.create(
+                post=post, author=self.admin, text=f'Комментарий {i}')
+
+    def changelist_queries(self, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.admin_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_changelist_query_budget(self):
+        """Число запросов списка не зависит от числа строк."""
+        for model in ('post', 'comment'):
+            with self.subTest(model=model):
+                url = reverse(f'admin:posts_{model}_changelist')
+                self.create_posts(3)
+                few = self.changelist_queries(url)
+                self.create_posts(30)
+                many = self.changelist_queries(url)
+                self.assertEqual(few, many)
+                self.assertLessEqual(many, QUERY_BUDGET)
+
+    def test_changelist_keyset_pages(self):
+        """Следующая страница выбирается по pk, без OFFSET."""
+        self.create_posts(105)
+        url = reverse('admin:posts_post_changelist')
+        response = self.admin_client.get(url)
+        cl = response.context['cl']
+        self.assertEqual(len(cl.result_list), 100)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.admin_client.get(url + cl.next_page_url())
+        self.assertEqual(len(response.context['cl'].result_list), 5)
+        self.assertFalse(
+            any('OFFSET' in query['sql'] for query in queries.captured_queries)
+        )
+
+    def test_changelist_invalid_cursor(self):
+        """Испорченный курсор открывает первую страницу, а не ошибку."""
+        self.create_posts(3)
+        for model in ('post', 'comment'):
+            for cursor in ('abc', '1x'):
+                with self.subTest(model=model, cursor=cursor):
+                    url = reverse(f'admin:posts_{model}_changelist')
+                    response = self.admin_client.get(f'{url}?after={cursor}')
+                    self.assertEqual(response.status_code, 200)
+                    cl = response.context['cl']
+                    self.assertIsNone(cl.cursor)
+                    self.assertEqual(len(cl.result_list), 3)
@@ -0,0 +1,78 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from posts.counters import post_views
+from posts.models import Post
+
+User = get_user_model()
+
+
+@override_settings(COUNTERS_FLUSH_INTERVAL=None)
+class PostViewsCounterTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='test_author')
+        cls.post = Post.objects.create(
+            author=cls.author,
+            text='Тестовая запись')
+
+    def setUp(self):
+        self.guest_client = Client()
+        cache.clear()
+        caches['counters'].clear()
+
+    def test_view_does_not_write_to_db(self):
+        """Просмотр поста увеличивает счетчик в кэше, а не в БД."""
+        url = reverse('posts:post_detail', args=[self.post.id])
+        self.guest_client.get(url)
+        self.guest_client.get(url)
+        self.assertEqual(post_views.pending([self.post.id]),
+                         {self.post.id: 2})
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.views, 0)
+
+    def test_flush_writes_pending_views(self):
+        """Сброс записывает приращения в БД и обнуляет буфер."""
+        other = Post.objects.create(author=self.author, text='Другая')
+        post_views.incr(self.post.id)
+        post_views.incr(self.post.id)
+        post_views.incr(other.id)
+        err = StringIO()
+        with self.assertNumQueries(4):
+            call_command('flush_counters', stdout=StringIO(), stderr=err)
+        self.assertIn('Кэш в памяти процесса', err.getvalue())
+        self.post.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual((self.post.views, other.views), (2, 1))
+        self.assertEqual(post_views.pending([self.post.id, other.id]),
+                         {self.post.id: 0, other.id: 0})
+        post_views.incr(self.post.id)
+        [post] = post_views.annotate([self.post], 'view_count')
+        self.assertEqual(post.view_count, 3)
+
+    def test_lost_dirty_list_restored(self):
+        """Вытесненный список грязных постов восстанавливается."""
+        post_views.incr(self.post.id)
+        caches['counters'].delete(post_views.dirty_key)
+        post_views.incr(self.post.id)
+        post_views.flush()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.views, 2)
+
+    def test_busy_lock_not_stolen(self):
+        """Занятая блокировка не удаляется, отметка повторяется позже."""
+        counters = caches['counters']
+        lock_key = f'{post_views.dirty_key}:lock'
+        counters.set(lock_key, 'чужая', 60)
+        post_views.incr(self.post.id)
+        self.assertEqual(counters.get(lock_key), 'чужая')
+        self.assertIsNone(counters.get(post_views.dirty_key))
+        counters.delete(lock_key)
+        post_views.flush()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.views, 1)
@@ -0,0 +1,42 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management import call_command
+from django.test import TestCase
+from posts.models import DigestRun, Follow, Post
+
+User = get_user_model()
+
+
+class DigestTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='test_author')
+        cls.other = User.objects.create_user(username='test_other')
+        cls.reader = User.objects.create_user(
+            username='test_reader', email='reader@example.com')
+        cls.silent = User.objects.create_user(username='test_silent')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        Follow.objects.create(user=cls.reader, author=cls.other)
+        Follow.objects.create(user=cls.silent, author=cls.author)
+        Post.objects.create(author=cls.author, text='Первая запись')
+        Post.objects.create(author=cls.other, text='Вторая запись')
+
+    def test_send_digests(self):
+        """Подписчик получает одно письмо со всеми новыми постами."""
+        with self.assertNumQueries(3):
+            call_command('send_digests', stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 1)
+        message = mail.outbox[0]
+        self.assertEqual(message.to, ['reader@example.com'])
+        self.assertIn('Первая запись', message.body)
+        self.assertIn('Вторая запись', message.body)
+        self.assertEqual(DigestRun.objects.get().recipients, 1)
+
+    def test_next_digest_contains_only_new_posts(self):
+        """Следующая рассылка не повторяет уже отправленные посты."""
+        call_command('send_digests', stdout=StringIO())
+        call_command('send_digests', stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 1)
@@ -0,0 +1,82 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+class FeedTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='test_author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test_slug',
+            description='Тестовое описание')
+        for number in range(3):
+            Post.objects.create(
+                author=cls.author, group=cls.group,
+                text=f'Тестовая запись {number}')
+
+    def setUp(self):
+        self.guest_client = Client()
+        cache.clear()
+
+    def test_feeds_render(self):
+        """Ленты сайта, группы и автора отдают все посты."""
+        urls = [
+            reverse('posts:feed'),
+            reverse('posts:feed_atom'),
+            reverse('posts:group_feed', args=[self.group.slug]),
+            reverse('posts:group_feed_atom', args=[self.group.slug]),
+            reverse('posts:profile_feed', args=[self.author.username]),
+            reverse('posts:profile_feed_atom', args=[self.author.username]),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertContains(response, 'Тестовая запись 2')
+                self.assertContains(response, 'Тестовая группа')
+
+    def test_fixed_number_of_queries(self):
+        """Число запросов не зависит от числа постов, а закэшированная
+        лента обходится без выборки постов."""
+        url = reverse('posts:group_feed', args=[self.group.slug])
+        with self.assertNumQueries(3):
+            self.guest_client.get(url)
+        with self.assertNumQueries(2):
+            self.guest_client.get(url)
+
+    def test_conditional_get(self):
+        """Лента без новых постов отвечает 304, новый пост меняет ETag."""
+        url = reverse('posts:profile_feed', args=[self.author.username])
+        etag = self.guest_client.get(url)['ETag']
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        Post.objects.create(author=self.author, text='Новая запись')
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Новая запись')
+
+    def test_edit_is_not_modified_since(self):
+        """Правка поста меняет ETag, а If-Modified-Since не скрывает ее."""
+        url = reverse('posts:profile_feed', args=[self.author.username])
+        response = self.guest_client.get(url)
+        etag = response['ETag']
+        self.assertFalse(response.has_header('Last-Modified'))
+        post = Post.objects.filter(author=self.author).first()
+        post.text = 'Исправленная запись'
+        post.save()
+        response = self.guest_client.get(
+            url, HTTP_IF_NONE_MATCH=etag,
+            HTTP_IF_MODIFIED_SINCE='Fri, 01 Jan 2100 00:00:00 GMT')
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Исправленная запись')
+
+    def test_unknown_group(self):
+        response = self.guest_client.get(
+            reverse('posts:group_feed', args=['unknown']))
+        self.assertEqual(response.status_code, 404)
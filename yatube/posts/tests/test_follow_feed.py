@@ -0,0 +1,84 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from core.jobs import run_pending
+from posts.follow_feed import (FollowFeedPaginator, feed_key,
+                               invalidate_followers)
+from posts.models import Follow, Post
+
+User = get_user_model()
+
+
+class FollowFeedCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='test_author')
+        cls.reader = User.objects.create_user(username='test_reader')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        cls.posts = [
+            Post.objects.create(author=cls.author, text=f'Запись {number}')
+            for number in range(5)
+        ]
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.reader)
+        cache.clear()
+
+    def page_ids(self, response):
+        return [post.pk for post in response.context['page_obj']]
+
+    def test_cached_ids_hydrated_in_bulk(self):
+        """Повторный запрос берет id из кэша и читает посты одним IN,
+        лайки пользователя — еще одним. Сессия, пользователь и счетчик
+        уведомлений с кэшем в памяти процесса читаются из базы."""
+        url = reverse('posts:follow_index')
+        first = self.page_ids(self.client.get(url))
+        self.assertIsNotNone(cache.get(feed_key(self.reader.pk)))
+        with self.assertNumQueries(5):
+            response = self.client.get(url)
+        self.assertEqual(self.page_ids(response), first)
+        self.assertEqual(
+            first, [post.pk for post in reversed(self.posts)])
+
+    def test_far_pages_read_from_db(self):
+        with mock.patch('posts.follow_feed.CACHED_PAGES', 1):
+            paginator = FollowFeedPaginator(self.reader, 2)
+            pages = [
+                [post.pk for post in paginator.page(number)]
+                for number in paginator.page_range
+            ]
+        self.assertEqual(len(paginator.ids), 2)
+        self.assertEqual(
+            sum(pages, []), [post.pk for post in reversed(self.posts)])
+
+    def test_new_post_invalidates_followers(self):
+        self.client.get(reverse('posts:follow_index'))
+        post = Post.objects.create(author=self.author, text='Новая запись')
+        invalidate_followers([self.author.pk])
+        response = self.client.get(reverse('posts:follow_index'))
+        self.assertEqual(self.page_ids(response)[0], post.pk)
+
+    def test_deleted_post_invalidates_followers(self):
+        """Удаление поста сбрасывает ленты подписчиков."""
+        self.client.get(reverse('posts:follow_index'))
+        post = Post.objects.get(pk=self.posts[-1].pk)
+        post_id = post.pk
+        with mock.patch('posts.follow_feed.transaction.on_commit',
+                        side_effect=lambda callback: callback()):
+            post.delete()
+        run_pending()
+        self.assertIsNone(cache.get(feed_key(self.reader.pk)))
+        response = self.client.get(reverse('posts:follow_index'))
+        self.assertNotIn(post_id, self.page_ids(response))
+
+    def test_unfollow_invalidates(self):
+        self.client.get(reverse('posts:follow_index'))
+        self.client.get(
+            reverse('posts:profile_unfollow', args=[self.author.username]))
+        response = self.client.get(reverse('posts:follow_index'))
+        self.assertEqual(self.page_ids(response), [])
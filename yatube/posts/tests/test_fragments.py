@@ -0,0 +1,84 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts.likes import set_like
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+class FeedFragmentTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='test_author')
+        cls.group = Group.objects.create(
+            title='Заголовок', slug='test_slug', description='Описание')
+        cls.posts = [
+            Post.objects.create(
+                author=cls.author, group=cls.group, text=f'Запись {number}')
+            for number in range(12)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        caches['counters'].clear()
+        self.client = Client()
+        self.client.force_login(self.author)
+
+    def test_html_fragment_without_base(self):
+        url = reverse('posts:group_fragment', args=[self.group.slug])
+        response = self.client.get(url)
+        self.assertTemplateUsed(response, 'posts/includes/post_cards.html')
+        self.assertTemplateNotUsed(response, 'base.html')
+        self.assertNotContains(response, '<html')
+        self.assertContains(response, '<article>', count=10)
+        self.assertNotContains(response, '<!--hole:')
+        # Адрес фрагмента не годится для возврата после лайка.
+        self.assertNotContains(response, 'name="next"')
+        cursor = int(response['X-Next-Cursor'])
+        self.assertEqual(cursor, self.posts[2].pk)
+        self.assertContains(response, f'data-next-cursor="{cursor}"')
+        response = self.client.get(url, {'before': cursor})
+        self.assertContains(response, '<article>', count=2)
+        self.assertFalse(response.has_header('X-Next-Cursor'))
+        self.assertContains(response, 'data-next-cursor=""')
+
+    def test_page_next_cursor_attribute(self):
+        """Курсор следующей порции есть и на закэшированной странице."""
+        url = reverse('posts:group_posts', args=[self.group.slug])
+        for _ in range(2):
+            response = self.client.get(url)
+            self.assertContains(
+                response, f'data-next-cursor="{self.posts[2].pk}"')
+            self.assertContains(response, 'name="next"', count=10)
+
+    def test_like_from_fragment_returns_to_referer(self):
+        page = reverse('posts:group_posts', args=[self.group.slug])
+        url = reverse('posts:like', args=[self.posts[0].pk])
+        response = self.client.post(
+            url, {'action': 'like'}, HTTP_REFERER=f'http://testserver{page}')
+        self.assertRedirects(response, f'http://testserver{page}')
+        response = self.client.post(
+            url, {'action': 'like'}, HTTP_REFERER='http://evil.example/')
+        self.assertRedirects(
+            response,
+            reverse('posts:post_detail', args=[self.posts[0].pk]),
+            fetch_redirect_response=False)
+
+    def test_json_fragment(self):
+        set_like(self.author, self.posts[-1].pk, True)
+        response = self.client.get(
+            reverse('posts:profile_fragment', args=[self.author.username]),
+            {'format': 'json'})
+        data = response.json()
+        self.assertEqual(data['next_cursor'], self.posts[2].pk)
+        first = data['posts'][0]
+        self.assertEqual(first['id'], self.posts[-1].pk)
+        self.assertEqual((first['likes'], first['liked']), (1, True))
+        self.assertFalse(data['posts'][1]['liked'])
+
+    def test_follow_fragment_requires_login(self):
+        response = Client().get(reverse('posts:follow_fragment'))
+        self.assertEqual(response.status_code, 302)
@@ -0,0 +1,92 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts.models import Comment, Group, Post
+
+User = get_user_model()
+
+
+class SharedPageCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='test_author')
+        cls.reader = User.objects.create_user(username='test_reader')
+        cls.group = Group.objects.create(
+            title='Заголовок', slug='test_slug', description='Описание')
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Тестовая запись')
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        cache.clear()
+
+    def shared_keys(self):
+        return [key for key in cache._cache if '.shared.' in key]
+
+    def test_body_shared_between_users(self):
+        """Гость и пользователи получают одну запись кэша страницы."""
+        url = reverse('posts:group_posts', args=[self.group.slug])
+        self.guest_client.get(url)
+        self.assertEqual(len(self.shared_keys()), 1)
+        with self.assertNumQueries(4):
+            response = self.reader_client.get(url)
+        self.assertEqual(len(self.shared_keys()), 1)
+        content = response.content.decode()
+        self.assertIn('test_reader', content)
+        self.assertNotIn('<!--hole:', content)
+
+    def test_fragments_rendered_per_user(self):
+        """Форма комментария и кнопка правки видны только своим."""
+        url = reverse('posts:post_detail', args=[self.post.pk])
+        edit_url = reverse('posts:post_edit', args=[self.post.pk])
+        comment_url = reverse('posts:add_comment', args=[self.post.pk])
+        guest = self.guest_client.get(url).content.decode()
+        reader = self.reader_client.get(url).content.decode()
+        author = self.author_client.get(url).content.decode()
+        self.assertNotIn(comment_url, guest)
+        self.assertIn(comment_url, reader)
+        self.assertNotIn(edit_url, reader)
+        self.assertIn(edit_url, author)
+
+    def test_comment_invalidates_post_page(self):
+        """Новый комментарий сразу виден на закэшированной странице."""
+        url = reverse('posts:post_detail', args=[self.post.pk])
+        self.guest_client.get(url)
+        Comment.objects.create(
+            post=self.post, author=self.reader, text='Свежий комментарий')
+        response = self.guest_client.get(url)
+        self.assertContains(response, 'Свежий комментарий')
+
+    def test_post_change_invalidates_feed_pages(self):
+        """Правка поста сразу видна на главной и на странице группы."""
+        urls = [
+            reverse('posts:index'),
+            reverse('posts:group_posts', args=[self.group.slug]),
+        ]
+        for url in urls:
+            self.guest_client.get(url)
+        self.post.text = 'Измененная запись'
+        self.post.save()
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertContains(response, 'Измененная запись')
+                self.assertIn('page_obj', response.context)
+
+    def test_unused_params_share_entry(self):
+        """Параметры, которые лента не читает, не создают новых записей
+        и не попадают в общий текст страницы."""
+        url = reverse('posts:group_posts', args=[self.group.slug])
+        self.guest_client.get(url, {'page': 1, 'utm_source': 'mail'})
+        response = self.guest_client.get(
+            url, {'utm_source': 'feed', 'page': 1, 'fbclid': 'x'})
+        self.assertEqual(len(self.shared_keys()), 1)
+        self.assertNotContains(response, 'utm_source')
+        self.guest_client.get(url, {'page': 2})
+        self.assertEqual(len(self.shared_keys()), 2)
@@ -0,0 +1,91 @@
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import (Client, TestCase, TransactionTestCase,
+                         override_settings)
+from django.urls import reverse
+from PIL import Image
+from posts.images import NO_PLACEHOLDER
+from posts.models import Post
+
+from core.jobs import run_pending
+from core.models import Job
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def make_image(name='image.png'):
+    buffer = BytesIO()
+    Image.new('RGB', (100, 50), color=(255, 0, 0)).save(buffer, 'PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), 'image/png')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class PostImageTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.author = User.objects.create_user(username='test_author')
+        self.guest_client = Client()
+        cache.clear()
+
+    def test_placeholder_computed_on_upload(self):
+        """При загрузке картинки сохраняется заглушка, а лента выводит
+        ленивую картинку с srcset."""
+        post = Post.objects.create(
+            author=self.author, text='Тест', image=make_image())
+        self.assertTrue(
+            post.image_placeholder.startswith('data:image/jpeg;base64,'))
+        response = self.guest_client.get(reverse('posts:index'))
+        self.assertContains(response, 'loading="lazy"')
+        self.assertContains(response, '480w')
+        self.assertContains(response, post.image_placeholder)
+
+    def test_backfill_placeholders(self):
+        """Команда досчитывает заглушки для старых картинок."""
+        post = Post.objects.create(
+            author=self.author, text='Тест', image=make_image())
+        Post.objects.filter(pk=post.pk).update(image_placeholder='')
+        call_command('backfill_placeholders', workers=1, stdout=StringIO())
+        post.refresh_from_db()
+        self.assertTrue(post.image_placeholder.startswith('data:image/'))
+
+    def test_backfill_marks_broken_images(self):
+        """Битая картинка отмечается и не обрабатывается повторно."""
+        post = Post.objects.create(author=self.author, text='Тест')
+        storage = Post._meta.get_field('image').storage
+        name = storage.save('posts/broken.png', BytesIO(b'not an image'))
+        Post.objects.filter(pk=post.pk).update(image=name)
+        out = StringIO()
+        call_command('backfill_placeholders', workers=1, stdout=out)
+        post.refresh_from_db()
+        self.assertEqual(post.image_placeholder, NO_PLACEHOLDER)
+        self.assertEqual(post.placeholder_uri, '')
+        self.assertIn('без заглушки: 1', out.getvalue())
+        out = StringIO()
+        call_command('backfill_placeholders', workers=1, stdout=out)
+        self.assertEqual(out.getvalue(), '')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class PostImageJobTests(TransactionTestCase):
+    def test_thumbnails_enqueued_on_commit(self):
+        """После коммита поста с картинкой ставится задача нарезки,
+        и обработчик ее выполняет."""
+        author = User.objects.create_user(username='test_author')
+        post = Post.objects.create(
+            author=author, text='Тест', image=make_image())
+        job = Job.objects.get(name='posts.pregenerate_thumbnails')
+        self.assertIn(post.image.name, job.payload)
+        run_pending()
+        self.assertFalse(Job.objects.exists())
@@ -0,0 +1,101 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from posts.counters import post_likes
+from posts.likes import reconcile_likes, set_like
+from posts.models import Like, Post
+
+User = get_user_model()
+
+
+@override_settings(COUNTERS_FLUSH_INTERVAL=None)
+class LikeTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='test_author')
+        cls.reader = User.objects.create_user(username='test_reader')
+        cls.posts = [
+            Post.objects.create(author=cls.author, text=f'Запись {number}')
+            for number in range(3)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        caches['counters'].clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def writes(self, queries):
+        return [
+            query['sql'].split()[0] for query in queries.captured_queries
+            if query['sql'].startswith(('INSERT', 'UPDATE', 'DELETE'))
+        ]
+
+    def test_set_like(self):
+        """Лайк и снятие делают по одной записи в базу, а повтор
+        не меняет счетчик."""
+        post = self.posts[0]
+        for liked, pending in ((True, 1), (True, 1), (False, 0), (False, 0)):
+            with CaptureQueriesContext(connection) as queries:
+                set_like(self.reader, post.pk, liked)
+            self.assertEqual(len(self.writes(queries)), 1)
+            self.assertEqual(
+                post_likes.pending([post.pk]), {post.pk: pending})
+        self.assertFalse(Like.objects.exists())
+
+    def test_reconcile_likes(self):
+        """Пересчет исправляет число лайков, потерянное вместе
+        с буфером."""
+        post = self.posts[0]
+        set_like(self.reader, post.pk, True)
+        caches['counters'].clear()
+        Post.objects.filter(pk=self.posts[1].pk).update(likes=5)
+        self.assertEqual(reconcile_likes(batch_size=2), 2)
+        self.assertEqual(
+            list(Post.objects.order_by('pk').values_list('likes', flat=True)),
+            [1, 0, 0])
+        self.assertEqual(reconcile_likes(), 0)
+
+    def test_flush_writes_likes(self):
+        post = self.posts[0]
+        set_like(self.reader, post.pk, True)
+        set_like(self.author, post.pk, True)
+        post_likes.flush()
+        post.refresh_from_db()
+        self.assertEqual(post.likes, 2)
+
+    def test_feed_page_liked_in_one_query(self):
+        """Лайки пользователя для всей страницы читаются одним запросом."""
+        set_like(self.reader, self.posts[1].pk, True)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('posts:index'))
+        like_queries = [
+            query for query in queries.captured_queries
+            if 'FROM "posts_like"' in query['sql']
+        ]
+        self.assertEqual(len(like_queries), 1)
+        self.assertContains(response, 'btn-danger', count=1)
+
+    def test_like_endpoint(self):
+        post = self.posts[0]
+        url = reverse('posts:like', args=[post.pk])
+        response = self.client.post(
+            url, {'action': 'like', 'next': reverse('posts:index')})
+        self.assertRedirects(response, reverse('posts:index'))
+        self.assertTrue(
+            Like.objects.filter(user=self.reader, post=post).exists())
+        # Повторная отправка той же формы не снимает лайк.
+        response = self.client.post(
+            url, {'action': 'like'}, HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        self.assertEqual(response.json(), {'liked': True})
+        response = self.client.post(
+            url, {'action': 'unlike'},
+            HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        self.assertEqual(response.json(), {'liked': False})
+        self.assertFalse(Like.objects.exists())
+        self.assertEqual(self.client.post(url).status_code, 400)
+        self.assertEqual(self.client.get(url).status_code, 405)
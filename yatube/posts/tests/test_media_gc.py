@@ -0,0 +1,104 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from posts.media_gc import remove_orphans
+from posts.models import Post
+from sorl.thumbnail import get_thumbnail
+
+User = get_user_model()
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+class GcMediaTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.addCleanup(shutil.rmtree, self.media_root, True)
+        # Записи sorl кэшируются, а файлы каждого теста лежат в новом
+        # каталоге.
+        cache.clear()
+        self.author = User.objects.create_user(username='test_author')
+        self.kept = Post.objects.create(
+            author=self.author, text='Оставить',
+            image=SimpleUploadedFile('a.gif', SMALL_GIF, 'image/gif'))
+        self.replaced = Post.objects.create(
+            author=self.author, text='Заменить',
+            image=SimpleUploadedFile(
+                'b.gif', SMALL_GIF + b'\x00', 'image/gif'))
+        self.old_name = self.replaced.image.name
+        self.old_thumbnail = get_thumbnail(self.replaced.image, '480x170')
+        Post.objects.filter(pk=self.replaced.pk).update(image='')
+
+    def gc(self, **options):
+        out = StringIO()
+        call_command('gc_media', min_age=0, stdout=out, **options)
+        return out.getvalue()
+
+    def test_dry_run_keeps_files(self):
+        """В пробном режиме ничего не удаляется."""
+        self.gc(dry_run=True)
+        self.assertTrue(os.path.exists(os.path.join(
+            self.media_root, self.old_name)))
+
+    def test_dry_run_reports_thumbnails(self):
+        """Пробный запуск находит столько же файлов, сколько удаляет
+        настоящий, включая миниатюры забытых картинок."""
+        found = self.gc(dry_run=True).splitlines()[-1]
+        removed = self.gc().splitlines()[-1]
+        self.assertIn('файлов: 2,', found)
+        self.assertEqual(found.split(':', 1)[1], removed.split(':', 1)[1])
+
+    def test_orphans_and_thumbnails_removed(self):
+        """Удаляются забытые картинки и их миниатюры, а используемые
+        остаются."""
+        self.gc()
+        self.assertFalse(os.path.exists(os.path.join(
+            self.media_root, self.old_name)))
+        self.assertFalse(self.old_thumbnail.exists())
+        self.assertTrue(self.kept.image.storage.exists(self.kept.image.name))
+        kept_thumbnail = get_thumbnail(self.kept.image, '480x170')
+        self.assertTrue(kept_thumbnail.exists())
+
+    def test_quarantine(self):
+        """Забытые файлы переносятся в карантин."""
+        quarantine = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, quarantine, True)
+        self.gc(quarantine=quarantine)
+        self.assertTrue(os.path.exists(os.path.join(
+            quarantine, self.old_name)))
+        self.assertTrue(os.path.exists(os.path.join(
+            quarantine, self.old_thumbnail.name)))
+
+    def test_rechecks_before_removal(self):
+        """Файл, на который успел сослаться пост или который только что
+        загрузили заново, не удаляется."""
+        path = os.path.join(self.media_root, self.old_name)
+        old = os.path.getmtime(path) - 3600
+        os.utime(path, (old, old))
+        Post.objects.filter(pk=self.replaced.pk).update(image=self.old_name)
+        count, _ = remove_orphans(
+            iter([(self.old_name, path)]), self.media_root)
+        self.assertEqual(count, 0)
+        Post.objects.filter(pk=self.replaced.pk).update(image='')
+        os.utime(path)
+        count, _ = remove_orphans(
+            iter([(self.old_name, path)]), self.media_root, min_age=60)
+        self.assertEqual(count, 0)
+        self.assertTrue(os.path.exists(path))
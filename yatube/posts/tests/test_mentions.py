@@ -0,0 +1,85 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts.models import Comment, Mention, Post
+
+User = get_user_model()
+
+
+class MentionTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username='test_author', email='author@yatube.ru')
+        cls.reader = User.objects.create_user(
+            username='test_reader', email='reader@yatube.ru')
+        cls.other = User.objects.create_user(
+            username='test_other', email='other@yatube.ru')
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.author)
+
+    def mentioned(self, **lookup):
+        return set(Mention.objects.filter(**lookup).values_list(
+            'user__username', flat=True))
+
+    def test_mentions_resolved_in_one_query(self):
+        """Все упоминания проверяются одним запросом."""
+        post = Post(
+            author=self.author,
+            text='@test_reader и @test_other, но не @nobody')
+        with self.assertNumQueries(3):
+            post.save()
+        self.assertEqual(
+            self.mentioned(post=post), {'test_reader', 'test_other'})
+        self.assertIn(
+            '<a href="{}">@test_reader</a>'.format(
+                reverse('posts:profile', args=['test_reader'])),
+            post.text_html)
+        self.assertIn('@nobody', post.text_html)
+
+    def test_html_escaped(self):
+        post = Post.objects.create(
+            author=self.author, text='<b>@test_reader</b> #тег')
+        self.assertTrue(post.text_html.startswith('&lt;b&gt;<a href='))
+        self.assertIn(
+            reverse('posts:tag_posts', args=['тег']), post.text_html)
+
+    def test_edit_updates_mentions(self):
+        post = Post.objects.create(author=self.author, text='@test_reader')
+        post.text = '@test_other'
+        post.save()
+        self.assertEqual(self.mentioned(post=post), {'test_other'})
+
+    def test_comment_mentions_batched_notifications(self):
+        """Комментарий не отправляет писем, уведомления уходят
+        командой пачками, по одному письму на пользователя."""
+        post = Post.objects.create(author=self.author, text='@test_reader')
+        self.authorized_client.post(
+            reverse('posts:add_comment', args=[post.pk]),
+            {'text': '@test_reader @test_other @test_author'})
+        comment = Comment.objects.get()
+        self.assertEqual(
+            self.mentioned(comment=comment),
+            {'test_reader', 'test_other', 'test_author'})
+        self.assertEqual(len(mail.outbox), 0)
+        call_command('send_mentions', batch_size=2, stdout=StringIO())
+        self.assertEqual(
+            sorted(message.to[0] for message in mail.outbox),
+            ['other@yatube.ru', 'reader@yatube.ru'])
+        self.assertFalse(Mention.objects.filter(notified=False).exists())
+
+    def test_linked_text_rendered(self):
+        post = Post.objects.create(author=self.author, text='@test_reader')
+        response = self.authorized_client.get(
+            reverse('posts:post_detail', args=[post.pk]))
+        self.assertContains(
+            response,
+            '<a href="{}">@test_reader</a>'.format(
+                reverse('posts:profile', args=['test_reader'])))
@@ -0,0 +1,103 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from posts.models import (Comment, Follow, Notification, NotificationEvent,
+                          Post)
+from posts.notifications import (aggregate, aggregate_batch,
+                                 get_unread_count)
+
+User = get_user_model()
+
+
+class NotificationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='test_author')
+        cls.readers = [
+            User.objects.create_user(username=f'test_reader{number}')
+            for number in range(3)
+        ]
+        cls.post = Post.objects.create(
+            author=cls.author, text='Тестовая запись')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.author)
+
+    def comment(self, user, text='Комментарий'):
+        return Comment.objects.create(post=self.post, author=user, text=text)
+
+    def test_events_collapsed(self):
+        """Комментарии к одному посту сводятся в одно уведомление."""
+        for reader in self.readers:
+            self.comment(reader)
+        Follow.objects.create(user=self.readers[0], author=self.author)
+        self.comment(self.author)
+        with self.assertNumQueries(11):
+            self.assertEqual(aggregate(), 2)
+        comment, follow = sorted(
+            Notification.objects.filter(recipient=self.author),
+            key=lambda item: item.kind)
+        self.assertEqual((comment.count, comment.actor), (3, self.readers[2]))
+        self.assertEqual(follow.count, 1)
+        self.assertFalse(NotificationEvent.objects.exists())
+        self.assertEqual(get_unread_count(self.author), 2)
+
+    def test_unread_notification_extended(self):
+        """Новые события добавляются к непрочитанному уведомлению."""
+        self.comment(self.readers[0])
+        aggregate()
+        self.comment(self.readers[1])
+        aggregate()
+        [notification] = Notification.objects.filter(recipient=self.author)
+        self.assertEqual(notification.count, 2)
+        self.assertEqual(get_unread_count(self.author), 1)
+
+    def test_unread_count_without_count_query(self):
+        """Кэш в памяти процесса не используется: сводку делает
+        обработчик задач, и веб-процессы читают счетчик из базы."""
+        self.comment(self.readers[0])
+        aggregate()
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(get_unread_count(self.author), 1)
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('COUNT', queries[0]['sql'])
+
+    def test_unread_count_cached_in_shared_cache(self):
+        self.comment(self.readers[0])
+        with mock.patch('posts.notifications.cache_is_local',
+                        return_value=False):
+            aggregate()
+            get_unread_count(self.author)
+            with self.assertNumQueries(0):
+                self.assertEqual(get_unread_count(self.author), 1)
+
+    def test_batch_skips_events_aggregated_elsewhere(self):
+        """Пачка, которую уже свел другой обработчик, не считается
+        повторно."""
+        self.comment(self.readers[0])
+        events = list(NotificationEvent.objects.all())
+        self.assertEqual(aggregate_batch(events), 1)
+        self.assertEqual(aggregate_batch(events), 0)
+        [notification] = Notification.objects.filter(recipient=self.author)
+        self.assertEqual(notification.count, 1)
+        self.assertEqual(get_unread_count(self.author), 1)
+
+    def test_inbox_marks_read(self):
+        self.comment(self.readers[0])
+        aggregate()
+        response = self.client.get(reverse('posts:notifications'))
+        self.assertContains(response, 'test_reader0')
+        self.assertEqual(get_unread_count(self.author), 0)
+        self.comment(self.readers[1])
+        aggregate()
+        self.assertEqual(
+            Notification.objects.filter(recipient=self.author).count(), 2)
+        self.assertEqual(get_unread_count(self.author), 1)
@@ -0,0 +1,80 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from core.paginator import MAX_PAGE, FeedPaginator
+from posts.models import Post
+
+User = get_user_model()
+
+PER_PAGE = 10
+
+
+class FeedPaginationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='test_author')
+        Post.objects.bulk_create([
+            Post(author=cls.author, text=f'Запись {number}')
+            for number in range(MAX_PAGE * PER_PAGE + 5)
+        ])
+        cls.ids = list(
+            Post.objects.order_by('-pk').values_list('pk', flat=True))
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        return response, [
+            query for query in queries.captured_queries
+            if 'COUNT(*)' in query['sql']
+        ]
+
+    def test_count_cached(self):
+        posts = Post.objects.all()
+        self.assertEqual(FeedPaginator(posts, PER_PAGE).count, len(self.ids))
+        with self.assertNumQueries(0):
+            FeedPaginator(posts, PER_PAGE).count
+
+    def test_empty_queryset_count(self):
+        self.assertEqual(FeedPaginator(Post.objects.none(), PER_PAGE).count, 0)
+
+    def test_profile_count_exact(self):
+        """Число постов в профиле не берется из кэша и сразу меняется."""
+        url = reverse('posts:profile', args=[self.author.username])
+        self.client.get(url)
+        Post.objects.create(author=self.author, text='Новая запись')
+        response = self.client.get(url)
+        self.assertEqual(response.context['paginator'].count,
+                         len(self.ids) + 1)
+
+    def test_page_numbers_capped(self):
+        """Последняя страница — MAX_PAGE, дальше ведет курсор."""
+        url = reverse('posts:index')
+        response = self.client.get(url, {'page': MAX_PAGE})
+        self.assertEqual(response.context['paginator'].num_pages, MAX_PAGE)
+        cursor = self.ids[MAX_PAGE * PER_PAGE - 1]
+        self.assertEqual(response.context['next_cursor'], cursor)
+        self.assertContains(response, f'?before={cursor}')
+
+    def test_deep_page_redirects_to_cursor(self):
+        url = reverse('posts:profile', args=[self.author.username])
+        response = self.client.get(url, {'page': 99999})
+        cursor = self.ids[MAX_PAGE * PER_PAGE - 1]
+        self.assertRedirects(response, f'{url}?before={cursor}')
+
+    def test_cursor_page_without_count(self):
+        cursor = self.ids[MAX_PAGE * PER_PAGE - 1]
+        response, counts = self.count_queries(
+            reverse('posts:index') + f'?before={cursor}')
+        self.assertEqual(counts, [])
+        self.assertEqual(
+            [post.pk for post in response.context['page_obj']],
+            self.ids[MAX_PAGE * PER_PAGE:])
+        self.assertIsNone(response.context['next_cursor'])
@@ -0,0 +1,114 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, TransactionTestCase
+from django.urls import reverse
+from posts.models import (Comment, Follow, Like, Notification,
+                          NotificationEvent, Post, PurgeTask)
+from posts.purge import run_task, soft_delete_posts, soft_delete_user
+
+User = get_user_model()
+
+
+class PurgeTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='test_author')
+        self.reader = User.objects.create_user(username='test_reader')
+        self.posts = [
+            Post.objects.create(author=self.author, text=f'Запись {i}')
+            for i in range(3)
+        ]
+        Comment.objects.create(
+            post=self.posts[0], author=self.reader, text='Комментарий')
+        Comment.objects.create(
+            post=self.posts[0], author=self.author, text='Ответ')
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.guest_client = Client()
+        cache.clear()
+
+    def test_soft_delete_hides_content(self):
+        """Мягкое удаление сразу скрывает посты и комментарии автора."""
+        soft_delete_user(self.author)
+        response = self.guest_client.get(reverse('posts:index'))
+        self.assertEqual(len(response.context['page_obj']), 0)
+        self.assertEqual(Comment.objects.count(), 1)
+        self.assertEqual(Post.all_objects.count(), 3)
+
+    def test_purge_in_batches(self):
+        """Очистка удаляет все связанные строки небольшими пачками."""
+        task = soft_delete_user(self.author)
+        out = StringIO()
+        call_command('purge_deleted', batch_size=1, stdout=out)
+        task.refresh_from_db()
+        self.assertEqual(task.stage, 'done')
+        self.assertEqual(
+            (task.comments, task.posts, task.follows), (2, 3, 1))
+        self.assertFalse(User.objects.filter(pk=self.author.pk).exists())
+        self.assertFalse(Post.all_objects.exists())
+        self.assertFalse(Comment.all_objects.exists())
+        self.assertIn('этап posts', out.getvalue())
+
+    def test_purge_removes_activity_in_batches(self):
+        """Лайки и уведомления удаляются пачками до удаления автора."""
+        Like.objects.create(user=self.author, post=self.posts[0])
+        NotificationEvent.objects.create(
+            recipient=self.reader, actor=self.author, kind='follow')
+        Notification.objects.create(
+            recipient=self.author, actor=self.reader, kind='follow')
+        task = soft_delete_user(self.author)
+        stages = []
+        run_task(task, batch_size=1,
+                 progress=lambda task: stages.append(task.stage))
+        self.assertIn('activity', stages)
+        self.assertFalse(Like.objects.exists())
+        self.assertFalse(NotificationEvent.objects.exists())
+        self.assertFalse(Notification.objects.exists())
+
+    def test_purge_resumes_after_crash(self):
+        """Прерванная очистка продолжается с сохраненного места."""
+        task = soft_delete_user(self.author)
+
+        def crash(task):
+            if task.posts:
+                raise RuntimeError
+
+        with self.assertRaises(RuntimeError):
+            run_task(task, batch_size=1, progress=crash)
+        task = PurgeTask.objects.get(pk=task.pk)
+        self.assertEqual((task.stage, task.posts), ('posts', 1))
+        call_command('purge_deleted', stdout=StringIO())
+        task.refresh_from_db()
+        self.assertEqual(
+            (task.comments, task.posts, task.follows), (2, 3, 1))
+        self.assertFalse(User.objects.filter(pk=self.author.pk).exists())
+
+
+class SoftDeleteCacheTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='test_author')
+        self.post = Post.objects.create(
+            author=self.author, text='Скрываемая запись')
+        self.guest_client = Client()
+
+    def test_soft_delete_user_drops_cached_pages(self):
+        """Скрытые посты сразу пропадают из закэшированных страниц."""
+        index = reverse('posts:index')
+        detail = reverse('posts:post_detail', args=[self.post.pk])
+        self.assertContains(self.guest_client.get(index), 'Скрываемая')
+        self.guest_client.get(detail)
+        soft_delete_user(self.author)
+        self.assertNotContains(self.guest_client.get(index), 'Скрываемая')
+        self.assertEqual(self.guest_client.get(detail).status_code, 404)
+
+    def test_soft_delete_posts_drops_follow_feed(self):
+        reader = User.objects.create_user(username='test_reader')
+        Follow.objects.create(user=reader, author=self.author)
+        client = Client()
+        client.force_login(reader)
+        url = reverse('posts:follow_index')
+        self.assertContains(client.get(url), 'Скрываемая')
+        soft_delete_posts(Post.objects.filter(pk=self.post.pk))
+        self.assertNotContains(client.get(url), 'Скрываемая')
@@ -0,0 +1,83 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from posts.models import EXCERPT_LENGTH, Follow, Group, Post
+from posts.queries import feed_posts
+
+User = get_user_model()
+
+LONG_TEXT = 'Очень длинный текст. ' * 100
+
+
+class FeedQueriesTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='test_author')
+        cls.reader = User.objects.create_user(username='test_reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test_slug',
+            description='Тестовое описание')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        for _ in range(3):
+            Post.objects.create(
+                author=cls.author, group=cls.group, text=LONG_TEXT)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.reader)
+        cache.clear()
+
+    def test_excerpt_stored_on_save(self):
+        post = Post.objects.first()
+        self.assertLessEqual(len(post.excerpt), EXCERPT_LENGTH)
+        self.assertTrue(LONG_TEXT.startswith(post.excerpt[:-1]))
+
+    def test_feeds_skip_full_text(self):
+        """Ленты не читают полный текст и не делают запросов на пост."""
+        urls = [
+            reverse('posts:index'),
+            reverse('posts:group_posts', args=[self.group.slug]),
+            reverse('posts:profile', args=[self.author.username]),
+            reverse('posts:follow_index'),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertNotIn(LONG_TEXT, response.content.decode())
+                sql = [query['sql'] for query in queries]
+                cards = [q for q in sql if '"posts_post"."excerpt"' in q]
+                self.assertEqual(len(cards), 1)
+                # Полный текст не выбирается, только его начало для
+                # постов без сохраненного excerpt.
+                self.assertFalse(any(
+                    '"posts_post"."text"' in q.replace(
+                        'SUBSTR("posts_post"."text"', '')
+                    for q in sql))
+
+    def test_excerpt_without_stored_excerpt(self):
+        """Пост без excerpt показывает начало текста без запроса
+        отложенного поля."""
+        Post.objects.update(excerpt='')
+        posts = list(feed_posts())
+        with self.assertNumQueries(0):
+            excerpts = [post.linked_excerpt for post in posts]
+        for excerpt in excerpts:
+            self.assertLessEqual(len(excerpt), EXCERPT_LENGTH)
+            self.assertTrue(LONG_TEXT.startswith(excerpt[:-1]))
+
+    def test_backfill_texts(self):
+        post = Post.objects.first()
+        Post.objects.filter(pk=post.pk).update(text_html='', excerpt='')
+        call_command('backfill_texts', stdout=StringIO())
+        post.refresh_from_db()
+        self.assertTrue(post.excerpt)
+        self.assertTrue(post.text_html)
@@ -0,0 +1,108 @@
+import glob
+import os
+import shutil
+import tempfile
+import time
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from posts.models import Group, Post
+
+User = get_user_model()
+
+SITEMAP_CACHE_DIR = tempfile.mkdtemp()
+
+
+@override_settings(
+    SITEMAP_SECTION_SIZE=2,
+    SITEMAP_CACHE_DIR=SITEMAP_CACHE_DIR,
+    SITE_URL='http://testserver'
+)
+class SitemapTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='test_author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test_slug',
+            description='Тестовое описание')
+        cls.posts = [
+            Post.objects.create(author=cls.author, text=f'Запись {number}')
+            for number in range(5)
+        ]
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(SITEMAP_CACHE_DIR, ignore_errors=True)
+
+    def setUp(self):
+        self.guest_client = Client()
+        shutil.rmtree(SITEMAP_CACHE_DIR, ignore_errors=True)
+
+    def get(self, url):
+        response = self.guest_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode()
+
+    def section_url(self, section, pk):
+        return reverse('posts:sitemap_section', args=[section, pk // 2])
+
+    def test_index_lists_id_range_sections(self):
+        """Индекс ссылается на разделы по диапазонам id."""
+        content = self.get(reverse('posts:sitemap'))
+        for post in self.posts:
+            self.assertIn(self.section_url('posts', post.pk), content)
+        self.assertIn(self.section_url('profiles', self.author.pk), content)
+        self.assertIn(self.section_url('groups', self.group.pk), content)
+
+    def test_section_contains_only_its_range(self):
+        post = self.posts[-1]
+        content = self.get(self.section_url('posts', post.pk))
+        self.assertIn(
+            reverse('posts:post_detail', args=[post.pk]), content)
+        for other in Post.objects.exclude(pk__in=[post.pk, post.pk ^ 1]):
+            self.assertNotIn(
+                reverse('posts:post_detail', args=[other.pk]) + '<',
+                content)
+
+    def test_full_section_served_from_disk(self):
+        """Заполненный раздел отдается с диска без запросов к БД."""
+        url = self.section_url('posts', self.posts[0].pk)
+        content = self.get(url)
+        with self.assertNumQueries(0):
+            response = self.guest_client.get(url)
+            cached = b''.join(response.streaming_content).decode()
+        self.assertEqual(cached, content)
+
+    def test_index_served_from_disk(self):
+        """Строки индекса считаются один раз и дальше читаются с диска."""
+        content = self.get(reverse('posts:sitemap'))
+        with self.assertNumQueries(0):
+            cached = self.get(reverse('posts:sitemap'))
+        self.assertEqual(cached, content)
+
+    def test_section_rebuilt_only_on_new_version(self):
+        """Старый файл раздела отдается, пока версия в индексе та же,
+        и пересобирается после удаления поста из раздела."""
+        post = self.posts[0]
+        url = self.section_url('posts', post.pk)
+        self.get(url)
+        old = time.time() - 2 * 24 * 60 * 60
+        for path in glob.glob(os.path.join(SITEMAP_CACHE_DIR, 'posts-*')):
+            os.utime(path, (old, old))
+        with self.assertNumQueries(0):
+            self.get(url)
+        Post.objects.filter(pk=post.pk).update(is_deleted=True)
+        os.remove(os.path.join(SITEMAP_CACHE_DIR, 'index.json'))
+        content = self.get(url)
+        self.assertNotIn(
+            reverse('posts:post_detail', args=[post.pk]) + '<', content)
+        self.assertEqual(len(glob.glob(os.path.join(
+            SITEMAP_CACHE_DIR, f'posts-{post.pk // 2}-*'))), 1)
+
+    def test_unknown_section(self):
+        response = self.guest_client.get(
+            reverse('posts:sitemap_section', args=['unknown', 0]))
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,75 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts.models import Post, TaggedPost
+from posts.tags import extract_tags, get_popular_tags
+
+User = get_user_model()
+
+
+class TagTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='test_author')
+
+    def setUp(self):
+        self.guest_client = Client()
+        cache.clear()
+
+    def tags_of(self, post):
+        return set(TaggedPost.objects.filter(
+            post=post).values_list('tag__name', flat=True))
+
+    def test_extract_tags(self):
+        self.assertEqual(
+            extract_tags('#Django и #питон, не тег: a#b и &#39;'),
+            {'django', 'питон'})
+
+    def test_tags_updated_on_edit(self):
+        """Правка поста убирает старые связи и добавляет новые."""
+        post = Post.objects.create(
+            author=self.author, text='#django #python')
+        self.assertEqual(self.tags_of(post), {'django', 'python'})
+        post.text = '#django #yatube'
+        post.save()
+        self.assertEqual(self.tags_of(post), {'django', 'yatube'})
+
+    def test_backfill(self):
+        post = Post.objects.create(author=self.author, text='Без тегов')
+        Post.objects.filter(pk=post.pk).update(text='#старый пост')
+        call_command('backfill_tags', stdout=StringIO())
+        self.assertEqual(self.tags_of(post), {'старый'})
+
+    def test_tag_posts_cursor_pagination(self):
+        """Страницы тега идут по курсору без пропусков и повторов."""
+        posts = [
+            Post.objects.create(author=self.author, text=f'#лента {number}')
+            for number in range(13)
+        ]
+        Post.objects.create(author=self.author, text='Другая запись')
+        url = reverse('posts:tag_posts', args=['лента'])
+        response = self.guest_client.get(url)
+        first = response.context['posts']
+        self.assertEqual(len(first), 10)
+        response = self.guest_client.get(
+            url, {'before': response.context['next_cursor']})
+        second = response.context['posts']
+        self.assertIsNone(response.context['next_cursor'])
+        self.assertEqual(
+            [post.pk for post in first + second],
+            [post.pk for post in reversed(posts)])
+
+    def test_popular_tags(self):
+        Post.objects.create(author=self.author, text='#редкий #частый')
+        Post.objects.create(author=self.author, text='#частый')
+        self.assertEqual(
+            [tag['name'] for tag in get_popular_tags()],
+            ['частый', 'редкий'])
+        response = self.guest_client.get(reverse('posts:index'))
+        self.assertContains(
+            response, reverse('posts:tag_posts', args=['частый']))
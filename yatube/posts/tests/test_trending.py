@@ -0,0 +1,69 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+from posts.models import Comment, Follow, Post, TrendingPost
+from posts.trending import update_trending
+
+User = get_user_model()
+
+
+class TrendingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='test_author')
+        cls.popular = User.objects.create_user(username='test_popular')
+        cls.reader = User.objects.create_user(username='test_reader')
+        Follow.objects.create(user=cls.reader, author=cls.popular)
+        cls.post = Post.objects.create(
+            author=cls.author, text='Тестовая запись')
+        cls.popular_post = Post.objects.create(
+            author=cls.popular, text='Популярная запись')
+
+    def setUp(self):
+        self.guest_client = Client()
+        cache.clear()
+
+    def comment(self, post):
+        return Comment.objects.create(
+            post=post, author=self.reader, text='Комментарий')
+
+    def test_update_counts_only_new_comments(self):
+        """Повторный пересчет учитывает только новые комментарии."""
+        self.comment(self.post)
+        call_command('update_trending', stdout=StringIO())
+        score = TrendingPost.objects.get(post=self.post).score
+        self.assertEqual(update_trending(), 0)
+        self.assertAlmostEqual(
+            TrendingPost.objects.get(post=self.post).score, score, places=3)
+
+    def test_follower_reach_and_decay(self):
+        """Комментарий к посту автора с подписчиками весит больше,
+        а старые баллы затухают."""
+        self.comment(self.post)
+        self.comment(self.popular_post)
+        update_trending()
+        ranking = list(
+            TrendingPost.objects.values_list('post', flat=True))
+        self.assertEqual(ranking, [self.popular_post.id, self.post.id])
+        score = TrendingPost.objects.get(post=self.post).score
+        update_trending(now=timezone.now() + timedelta(hours=6))
+        self.assertAlmostEqual(
+            TrendingPost.objects.get(post=self.post).score, score / 2,
+            places=3)
+
+    def test_trending_page_single_query(self):
+        """Страница популярного читает рейтинг одним запросом."""
+        self.comment(self.post)
+        update_trending()
+        with self.assertNumQueries(1):
+            response = self.guest_client.get(reverse('posts:trending'))
+        self.assertEqual(response.context['posts'], [self.post])
+        with self.assertNumQueries(0):
+            self.guest_client.get(reverse('posts:trending'))
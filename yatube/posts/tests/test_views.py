@@ -193,6 +193,7 @@ class PaginatorViewsTest(TestCase):
         self.user = User.objects.create_user(username='test_user')
         self.authorized_client = Client()
         self.authorized_client.force_login(self.author)
+        cache.clear()
 
     def test_first_page_contains_ten_posts(self):
         urls_dict = {
@@ -237,15 +238,15 @@ class CacheViewsTests(TestCase):
 
     def test_cache_index(self):
         """Тест кэширования страницы index.html"""
-        initial_state = self.authorized_client.get(reverse('posts:index'))
-        post = Post.objects.get(pk=1)
-        post.text = 'Измененная тестовая запись'
-        post.save()
+        self.authorized_client.get(reverse('posts:index'))
+        Post.objects.filter(pk=self.post.pk).update(
+            text='Измененная тестовая запись', excerpt='')
         changed_state = self.authorized_client.get(reverse('posts:index'))
-        self.assertEqual(initial_state.content, changed_state.content)
+        self.assertContains(changed_state, 'Тестовая запись')
+        self.assertNotContains(changed_state, 'Измененная')
         cache.clear()
         changed_state_2 = self.authorized_client.get(reverse('posts:index'))
-        self.assertNotEqual(initial_state.content, changed_state_2.content)
+        self.assertContains(changed_state_2, 'Измененная тестовая запись')
 
 
 class FollowViewsTests(TestCase):
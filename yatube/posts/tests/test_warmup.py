@@ -0,0 +1,88 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import (LiveServerTestCase, TransactionTestCase,
+                         override_settings)
+from django.urls import reverse
+from posts.models import Follow, Group, Post
+from posts.warmup import popular_urls, urls_from_access_log
+
+User = get_user_model()
+
+ACCESS_LOG = [
+    '1.2.3.4 - - [19/Oct/2026:10:00:00 +0000] "GET / HTTP/1.1" 200 512',
+    '1.2.3.4 - - [19/Oct/2026:10:00:01 +0000] "GET / HTTP/1.1" 200 512',
+    '1.2.3.4 - - [19/Oct/2026:10:00:02 +0000] '
+    '"GET /group/test_slug/ HTTP/1.1" 200 512',
+    '1.2.3.4 - - [19/Oct/2026:10:00:03 +0000] '
+    '"GET /posts/1/ HTTP/1.1" 200 512',
+    '1.2.3.4 - - [19/Oct/2026:10:00:04 +0000] '
+    '"GET /missing/ HTTP/1.1" 404 512',
+]
+
+
+@override_settings(SITE_URL='http://testserver')
+class WarmCachesTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='test_author')
+        reader = User.objects.create_user(username='test_reader')
+        Follow.objects.create(user=reader, author=self.author)
+        self.group = Group.objects.create(
+            title='Тестовая группа', slug='test_slug',
+            description='Тестовое описание')
+        Post.objects.create(
+            author=self.author, group=self.group, text='Тестовая запись')
+
+    def test_access_log_ranking(self):
+        """Из журнала берутся успешные GET без страниц постов."""
+        self.assertEqual(
+            urls_from_access_log(ACCESS_LOG, 10),
+            ['/', '/group/test_slug/'])
+
+    def test_popular_urls(self):
+        urls = popular_urls(10, index_pages=1)
+        self.assertEqual(urls[0], reverse('posts:index'))
+        self.assertIn(
+            reverse('posts:group_posts', args=['test_slug']), urls)
+        self.assertIn(
+            reverse('posts:profile', args=['test_author']), urls)
+        # Авторов больше, чем групп: лишние не теряются.
+        self.assertIn(
+            reverse('posts:profile', args=['test_reader']), urls)
+
+    def test_warm_caches_fills_index_cache(self):
+        out, err = StringIO(), StringIO()
+        call_command('warm_caches', concurrency=2, stdout=out, stderr=err)
+        self.assertIn('Кэш в памяти процесса', err.getvalue())
+        self.assertIn('с ошибкой: 0', out.getvalue())
+        self.assertIn('не успели: 0', out.getvalue())
+        self.assertTrue(any(
+            'swr.page.index_page' in key for key in cache._cache))
+
+    def test_unreachable_site_counts_as_failed(self):
+        """Недоступный сайт не роняет команду, а адреса идут в ошибки."""
+        out, err = StringIO(), StringIO()
+        call_command('warm_caches', url='http://127.0.0.1:9', limit=2,
+                     stdout=out, stderr=err)
+        self.assertIn('Нет ответа', err.getvalue())
+        self.assertIn('Прогрето страниц: 0, с ошибкой: 2', out.getvalue())
+
+
+class WarmCachesHTTPTests(LiveServerTestCase):
+    def setUp(self):
+        cache.clear()
+        author = User.objects.create_user(username='test_author')
+        Post.objects.create(author=author, text='Тестовая запись')
+
+    def test_warm_caches_over_http(self):
+        """С --url страницы запрашиваются у работающего сайта."""
+        out, err = StringIO(), StringIO()
+        call_command('warm_caches', url=self.live_server_url, limit=5,
+                     stdout=out, stderr=err)
+        self.assertEqual(err.getvalue(), '')
+        self.assertIn('с ошибкой: 0', out.getvalue())
+        self.assertTrue(any(
+            'swr.page.index_page' in key for key in cache._cache))
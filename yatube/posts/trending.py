@@ -0,0 +1,88 @@
+"""Рейтинг популярных постов по свежим комментариям.
+
+Рейтинг хранится в ``TrendingPost`` и обновляется инкрементально:
+старые баллы затухают с периодом полураспада ``HALF_LIFE``, а новые
+комментарии с прошлого запуска добавляют баллы с учетом числа
+подписчиков автора поста.
+"""
+import math
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, Max
+from django.utils import timezone
+
+from .models import Comment, Post, TrendingPost, TrendingRun, User
+from .queries import feed_posts
+
+HALF_LIFE = timedelta(hours=6)
+TRENDING_SIZE = 50
+TRENDING_CACHE_KEY = 'trending_posts'
+TRENDING_CACHE_TIMEOUT = 60
+
+
+def comment_weight(followers):
+    return 1 + math.log1p(followers)
+
+
+def update_trending(now=None):
+    """Пересчитывает рейтинг. Возвращает число учтенных комментариев."""
+    now = now or timezone.now()
+    last_run = TrendingRun.objects.first()
+    last_comment_id = last_run.last_comment_id if last_run else 0
+    activity = list(
+        Comment.objects.filter(id__gt=last_comment_id)
+        .values('post', 'post__author')
+        .annotate(comments=Count('id'), last_id=Max('id'))
+    )
+    reach = dict(
+        User.objects.filter(
+            pk__in={row['post__author'] for row in activity}
+        ).annotate(followers=Count('following')).values_list(
+            'pk', 'followers'
+        )
+    )
+    with transaction.atomic():
+        if last_run is not None:
+            elapsed = now - last_run.created
+            decay = 0.5 ** (elapsed / HALF_LIFE)
+            TrendingPost.objects.update(score=F('score') * decay)
+        existing = TrendingPost.objects.in_bulk(
+            [row['post'] for row in activity], field_name='post'
+        )
+        created, updated = [], []
+        for row in activity:
+            points = row['comments'] * comment_weight(
+                reach.get(row['post__author'], 0)
+            )
+            trending = existing.get(row['post'])
+            if trending is None:
+                created.append(
+                    TrendingPost(post_id=row['post'], score=points)
+                )
+            else:
+                trending.score += points
+                updated.append(trending)
+        TrendingPost.objects.bulk_create(created)
+        TrendingPost.objects.bulk_update(updated, ['score'])
+        top = TrendingPost.objects.values_list('pk', flat=True)
+        TrendingPost.objects.exclude(
+            pk__in=list(top[:TRENDING_SIZE])
+        ).delete()
+        TrendingRun.objects.create(last_comment_id=max(
+            [row['last_id'] for row in activity], default=last_comment_id
+        ))
+    cache.delete(TRENDING_CACHE_KEY)
+    return sum(row['comments'] for row in activity)
+
+
+def get_trending_posts():
+    posts = cache.get(TRENDING_CACHE_KEY)
+    if posts is None:
+        posts = list(
+            feed_posts(Post.objects.filter(trending__isnull=False))
+            .order_by('-trending__score')[:TRENDING_SIZE]
+        )
+        cache.set(TRENDING_CACHE_KEY, posts, TRENDING_CACHE_TIMEOUT)
+    return posts
@@ -1,35 +1,99 @@
-from django.core.paginator import Paginator
+from django.http import (FileResponse, Http404, HttpResponseBadRequest,
+                         JsonResponse, StreamingHttpResponse)
 from django.shortcuts import render, get_object_or_404, redirect
-from .models import Post, Group, User, Comment, Follow
+from .models import Post, Group, User, Comment, Follow, Tag
 from django.contrib.auth.decorators import login_required
 from .forms import PostForm, CommentForm
+from .counters import post_likes, post_views
+from .likes import liked_ids, set_like
+from .follow_feed import FollowFeedPaginator
+from .trending import get_trending_posts
+from .tags import get_popular_tags
+from . import notifications
+from . import queries
+from . import sitemaps
+from django.conf import settings
+from core.paginator import (CursorPage, FeedPaginator, cursor_page,
+                            deep_page_cursor, get_cursor)
+from core.holes import shared_cache_page
+from .holes import FEED_GENERATION
 from django.urls import reverse
-from django.views.decorators.cache import cache_page
+from django.utils.http import is_safe_url
+from django.views.decorators.http import require_POST
 
 
 NUM_OF_POSTS = 10
 
 
-def get_page_context(queryset, request):
-    paginator = Paginator(queryset, NUM_OF_POSTS)
+def deep_page_redirect(request, queryset):
+    """Уводит запрос страницы дальше ``MAX_PAGE`` на курсорную ленту."""
+    try:
+        number = int(request.GET.get('page'))
+    except (TypeError, ValueError):
+        return None
+    cursor = deep_page_cursor(queryset, number, NUM_OF_POSTS)
+    if cursor is None:
+        return None
+    return redirect(f'{request.path}?before={cursor}')
+
+
+def get_page_context(queryset, request, paginator=None):
+    cursor = get_cursor(request)
+    if cursor is not None:
+        posts, next_cursor = cursor_page(queryset, cursor, NUM_OF_POSTS)
+        page_obj = CursorPage(
+            post_views.annotate(posts, 'view_count'), cursor, next_cursor
+        )
+        return {'page_obj': page_obj, 'next_cursor': next_cursor}
+    if paginator is None:
+        paginator = FeedPaginator(queryset, NUM_OF_POSTS)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
+    page_obj.object_list = post_views.annotate(
+        page_obj.object_list, 'view_count'
+    )
+    next_cursor = None
+    if page_obj.object_list and (
+            page_obj.has_next() or paginator.truncated
+            and page_obj.number == paginator.num_pages):
+        next_cursor = page_obj.object_list[-1].pk
     return {
         'paginator': paginator,
         'page_number': page_number,
         'page_obj': page_obj,
+        'next_cursor': next_cursor,
     }
 
 
-@cache_page(20, key_prefix='index_page')
+@shared_cache_page(20, key_prefix='index_page', generation=FEED_GENERATION,
+                   params=('page', 'before'))
 def index(request):
-    context = get_page_context(Post.objects.select_related('group'), request)
+    posts = queries.index_posts()
+    response = deep_page_redirect(request, posts)
+    if response is not None:
+        return response
+    context = get_page_context(posts, request)
+    context['popular_tags'] = get_popular_tags()
     return render(request, 'posts/index.html', context)
 
 
+def trending(request):
+    posts = post_views.annotate(get_trending_posts(), 'view_count')
+    context = {
+        'posts': posts,
+        'trending': True,
+    }
+    return render(request, 'posts/trending.html', context)
+
+
+@shared_cache_page(20, key_prefix='group_posts',
+                   generation=FEED_GENERATION, params=('page', 'before'))
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()
+    posts = queries.group_posts(group)
+    response = deep_page_redirect(request, posts)
+    if response is not None:
+        return response
     context = {
         'group': group,
         'posts': posts,
@@ -38,33 +102,54 @@ def group_posts(request, slug):
     return render(request, 'posts/group_list.html', context)
 
 
+def tag_posts(request, name):
+    tag = get_object_or_404(Tag, name=name.lower())
+    posts, next_cursor = cursor_page(
+        queries.tag_posts(tag),
+        get_cursor(request),
+        NUM_OF_POSTS
+    )
+    context = {
+        'tag': tag,
+        'posts': post_views.annotate(posts, 'view_count'),
+        'next_cursor': next_cursor,
+        'popular_tags': get_popular_tags(),
+    }
+    return render(request, 'posts/tag_posts.html', context)
+
+
 def profile(request, username):
     author = get_object_or_404(User, username=username)
-    posts = author.posts.all()
+    posts = queries.author_posts(author)
+    response = deep_page_redirect(request, posts)
+    if response is not None:
+        return response
     profile = author
-    if request.user.is_authenticated:
-        following = Follow.objects.filter(
-            user=request.user, author=author
-        ).exists()
-    else:
-        following = False
     context = {
         'posts': posts,
         'author': author,
         'profile': profile,
-        'following': following,
     }
-    context.update(get_page_context(posts, request))
+    # Число постов автора видно на странице и должно сразу меняться.
+    paginator = FeedPaginator(posts, NUM_OF_POSTS, exact_count=True)
+    context.update(get_page_context(posts, request, paginator))
     return render(request, 'posts/profile.html', context)
 
 
 def post_detail(request, post_id):
-    post_list = Post.objects.get(pk=post_id)
-    form = CommentForm()
+    response = post_detail_page(request, post_id)
+    if response.status_code == 200:
+        post_views.incr(post_id)
+    return response
+
+
+@shared_cache_page(20, key_prefix='post_detail')
+def post_detail_page(request, post_id):
+    post_list = get_object_or_404(Post, pk=post_id)
+    post_views.annotate([post_list], 'view_count')
     comments = reversed(post_list.comments.all())
     context = {
         'post_list': post_list,
-        'form': form,
         'comments': comments,
     }
     return render(request, 'posts/post_detail.html', context)
@@ -121,10 +206,36 @@ def add_comment(request, post_id):
     return redirect('posts:post_detail', post_id=post_id)
 
 
+@login_required
+@require_POST
+def like(request, post_id):
+    action = request.POST.get('action')
+    if action not in ('like', 'unlike'):
+        return HttpResponseBadRequest('action: like или unlike')
+    get_object_or_404(Post, pk=post_id)
+    liked = action == 'like'
+    set_like(request.user, post_id, liked)
+    if request.is_ajax():
+        return JsonResponse({'liked': liked})
+    # Кнопки во фрагментах ленты не знают адреса страницы, на которую
+    # вставлены, и полагаются на Referer.
+    for next_url in (request.POST.get('next'),
+                     request.META.get('HTTP_REFERER')):
+        if is_safe_url(next_url, {request.get_host()}):
+            break
+    else:
+        next_url = reverse('posts:post_detail', args=[post_id])
+    return redirect(next_url)
+
+
 @login_required
 def follow_index(request):
-    context = get_page_context(Post.objects.filter(
-        author__following__user=request.user), request)
+    posts = queries.follow_posts(request.user)
+    response = deep_page_redirect(request, posts)
+    if response is not None:
+        return response
+    paginator = FollowFeedPaginator(request.user, NUM_OF_POSTS)
+    context = get_page_context(posts, request, paginator)
     return render(request, 'posts/follow.html', context)
 
 
@@ -145,3 +256,121 @@ def profile_unfollow(request, username):
     if is_follower.exists():
         is_follower.delete()
     return redirect('posts:profile', username=author)
+
+
+@login_required
+def notification_list(request):
+    items, next_cursor = cursor_page(
+        request.user.notifications.select_related('actor', 'post'),
+        get_cursor(request),
+        NUM_OF_POSTS
+    )
+    if any(not item.read for item in items):
+        notifications.mark_read(request.user)
+    context = {
+        'notifications': items,
+        'next_cursor': next_cursor,
+    }
+    return render(request, 'posts/notifications.html', context)
+
+
+def card_data(post, liked, likes):
+    return {
+        'id': post.pk,
+        'url': reverse('posts:post_detail', args=[post.pk]),
+        'author': post.author.username,
+        'author_name': post.author.get_full_name(),
+        'group': post.group.slug if post.group else None,
+        'pub_date': post.pub_date.isoformat(),
+        'excerpt': str(post.linked_excerpt),
+        'image': post.image.url if post.image else None,
+        'placeholder': post.placeholder_uri,
+        'views': post.view_count,
+        'likes': likes,
+        'liked': liked,
+    }
+
+
+def feed_fragment(request, queryset):
+    """Карточки следующей порции ленты без ``base.html``.
+
+    Порция выбирается курсором ``?before=``, курсор следующей порции
+    приходит в атрибуте ``data-next-cursor`` контейнера карточек (как
+    и на полных страницах лент) и в заголовке ``X-Next-Cursor``.
+    С ``?format=json`` вместо HTML отдаются данные карточек.
+    """
+    posts, next_cursor = cursor_page(
+        queryset, get_cursor(request), NUM_OF_POSTS
+    )
+    posts = post_views.annotate(posts, 'view_count')
+    if request.GET.get('format') == 'json':
+        ids = [post.pk for post in posts]
+        liked = liked_ids(request.user, ids)
+        pending = post_likes.pending(ids)
+        return JsonResponse({
+            'posts': [
+                card_data(
+                    post, post.pk in liked,
+                    post.likes + pending.get(post.pk, 0)
+                )
+                for post in posts
+            ],
+            'next_cursor': next_cursor,
+        })
+    response = render(request, 'posts/includes/post_cards.html', {
+        'posts': posts,
+        'next_cursor': next_cursor,
+    })
+    if next_cursor is not None:
+        response['X-Next-Cursor'] = str(next_cursor)
+    return response
+
+
+def index_fragment(request):
+    return feed_fragment(request, queries.index_posts())
+
+
+def group_fragment(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    return feed_fragment(request, queries.group_posts(group))
+
+
+def profile_fragment(request, username):
+    author = get_object_or_404(User, username=username)
+    return feed_fragment(request, queries.author_posts(author))
+
+
+def tag_fragment(request, name):
+    tag = get_object_or_404(Tag, name=name.lower())
+    return feed_fragment(request, queries.tag_posts(tag))
+
+
+@login_required
+def follow_fragment(request):
+    return feed_fragment(request, queries.follow_posts(request.user))
+
+
+def sitemap_index(request):
+    return StreamingHttpResponse(
+        sitemaps.iter_index(), content_type='application/xml'
+    )
+
+
+def sitemap_section(request, section, number):
+    if section not in sitemaps.SECTIONS:
+        raise Http404
+    version = sitemaps.section_version(section, number)
+    if version is not None:
+        path = sitemaps.cached_section(section, number, version)
+        if path is not None:
+            return FileResponse(
+                open(path, 'rb'), content_type='application/xml'
+            )
+    sitemap = sitemaps.SECTIONS[section]
+    chunks = sitemaps.iter_section(sitemap, number)
+    if (version is not None
+            and sitemap.is_full(number, settings.SITEMAP_SECTION_SIZE)):
+        chunks = sitemaps.write_through(
+            chunks, sitemaps.cache_path(section, number, version)
+        )
+    return StreamingHttpResponse(chunks, content_type='application/xml')
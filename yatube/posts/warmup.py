@@ -0,0 +1,64 @@
+"""Адреса для прогрева кэшей после деплоя.
+
+Если есть журнал доступа, берутся самые запрашиваемые страницы из него.
+Иначе популярность оценивается по данным: первые страницы главной,
+популярные посты, крупнейшие группы и авторы с наибольшим числом
+подписчиков.
+"""
+import re
+from collections import Counter
+from itertools import zip_longest
+
+from django.db.models import Count
+from django.urls import reverse
+
+from .models import Group, User
+
+LOG_LINE_RE = re.compile(
+    r'"GET (?P<path>/\S*) HTTP/[\d.]+" (?P<status>\d{3})'
+)
+# Страница поста увеличивает счетчик просмотров, прогревать ее нельзя.
+SKIP_PREFIXES = (
+    '/admin/', '/internal/', '/static/', '/media/', '/auth/', '/posts/',
+    '/create/', '/__debug__/',
+)
+
+
+def urls_from_access_log(lines, limit):
+    counts = Counter()
+    for line in lines:
+        match = LOG_LINE_RE.search(line)
+        if match is None or match['status'] != '200':
+            continue
+        path = match['path']
+        if not path.startswith(SKIP_PREFIXES) and '/follow/' not in path:
+            counts[path] += 1
+    return [path for path, _ in counts.most_common(limit)]
+
+
+def popular_urls(limit, index_pages=3):
+    urls = [reverse('posts:index')]
+    urls += [
+        reverse('posts:index') + f'?page={page}'
+        for page in range(2, index_pages + 1)
+    ]
+    urls.append(reverse('posts:trending'))
+    groups = (
+        Group.objects.annotate(posts_count=Count('posts'))
+        .order_by('-posts_count')
+        .values_list('slug', flat=True)[:limit]
+    )
+    authors = (
+        User.objects.filter(is_active=True)
+        .annotate(followers=Count('following'))
+        .order_by('-followers')
+        .values_list('username', flat=True)[:limit]
+    )
+    # Группы и авторы чередуются, чтобы при обрезке по бюджету
+    # прогрелись верхушки обоих списков.
+    for slug, username in zip_longest(groups, authors):
+        if slug is not None:
+            urls.append(reverse('posts:group_posts', args=[slug]))
+        if username is not None:
+            urls.append(reverse('posts:profile', args=[username]))
+    return urls[:limit]
@@ -0,0 +1,82 @@
+"""Кэширование пользователя, найденного по сессии.
+
+``AuthenticationMiddleware`` на каждом запросе читает ``auth_user``.
+Здесь объект пользователя хранится в общем кэше под ключом с версией;
+при сохранении пользователя (в том числе при смене пароля) и при выходе
+версия увеличивается, и старый объект больше не читается.
+
+Кэш в памяти процесса для этого не годится: выход или блокировка
+сбросили бы версию только в одном процессе, а остальные продолжали бы
+пускать пользователя. Поэтому с таким кэшем пользователь читается из
+базы, как в ``django.contrib.auth.get_user``.
+"""
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.auth.signals import user_logged_out
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.crypto import constant_time_compare
+
+from core.cache import cache_is_local
+
+USER_CACHE_TIMEOUT = 60 * 60
+
+User = get_user_model()
+
+
+def _version_key(user_id):
+    return f'auth_user_version:{user_id}'
+
+
+def user_cache_key(user_id):
+    version = cache.get_or_set(_version_key(user_id), 1, None)
+    return f'auth_user:{user_id}:{version}'
+
+
+def invalidate_user(user_id):
+    key = _version_key(user_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+def get_user(request):
+    """То же, что ``django.contrib.auth.get_user``, но через кэш."""
+    if cache_is_local():
+        return auth.get_user(request)
+    try:
+        user_id = auth._get_user_session_key(request)
+        backend_path = request.session[auth.BACKEND_SESSION_KEY]
+    except KeyError:
+        return AnonymousUser()
+    if backend_path not in settings.AUTHENTICATION_BACKENDS:
+        return AnonymousUser()
+    key = user_cache_key(user_id)
+    user = cache.get(key)
+    if user is None:
+        user = auth.load_backend(backend_path).get_user(user_id)
+        if user is None:
+            return AnonymousUser()
+        cache.set(key, user, USER_CACHE_TIMEOUT)
+    session_hash = request.session.get(auth.HASH_SESSION_KEY)
+    if not (session_hash and constant_time_compare(
+            session_hash, user.get_session_auth_hash())):
+        request.session.flush()
+        return AnonymousUser()
+    return user
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_saved_user(sender, instance, **kwargs):
+    invalidate_user(instance.pk)
+
+
+@receiver(user_logged_out)
+def invalidate_logged_out_user(sender, request, user, **kwargs):
+    if user is not None:
+        invalidate_user(user.pk)
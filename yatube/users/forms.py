@@ -1,5 +1,8 @@
-from django.contrib.auth.forms import UserCreationForm
+from django.contrib.auth.forms import PasswordResetForm, UserCreationForm
 from django.contrib.auth import get_user_model
+from django.contrib.sites.shortcuts import get_current_site
+
+from core.jobs import enqueue
 
 
 User = get_user_model()
@@ -9,3 +12,34 @@ class CreationForm(UserCreationForm):
     class Meta(UserCreationForm.Meta):
         model = User
         fields = ('first_name', 'last_name', 'username', 'email')
+
+
+class QueuedPasswordResetForm(PasswordResetForm):
+    """Письмо со ссылкой собирает и отправляет фоновая задача, чтобы
+    ответ не ждал почтовый сервер. В очередь попадает только ``pk``
+    пользователя: токен сброса создается в задаче и в таблице задач
+    не хранится."""
+
+    def save(self, domain_override=None,
+             subject_template_name='registration/password_reset_subject.txt',
+             email_template_name='registration/password_reset_email.html',
+             use_https=False, token_generator=None, from_email=None,
+             request=None, html_email_template_name=None,
+             extra_email_context=None):
+        if domain_override:
+            site_name = domain = domain_override
+        else:
+            current_site = get_current_site(request)
+            site_name = current_site.name
+            domain = current_site.domain
+        for user in self.get_users(self.cleaned_data['email']):
+            enqueue(
+                'users.send_password_reset',
+                user_id=user.pk, domain=domain, site_name=site_name,
+                use_https=use_https,
+                subject_template_name=subject_template_name,
+                email_template_name=email_template_name,
+                html_email_template_name=html_email_template_name,
+                from_email=from_email,
+                extra_email_context=extra_email_context,
+            )
@@ -0,0 +1,117 @@
+import os
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.jobs import run_pending
+from core.models import Job
+
+User = get_user_model()
+
+AUTH_TABLES = ('FROM "auth_user"', 'FROM "django_session"')
+
+SHARED_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(tempfile.gettempdir(), 'yatube_test_cache'),
+    },
+    'counters': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'counters',
+    },
+}
+
+
+@override_settings(
+    CACHES=SHARED_CACHES,
+    SESSION_ENGINE='django.contrib.sessions.backends.cached_db',
+)
+class CachedAuthTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='test_user', password='old_password')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.login(username='test_user', password='old_password')
+
+    def auth_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        return response, [
+            query['sql'] for query in queries.captured_queries
+            if any(table in query['sql'] for table in AUTH_TABLES)
+        ]
+
+    def test_logged_in_page_without_auth_queries(self):
+        """Повторный запрос авторизованного пользователя не читает
+        сессию и пользователя из БД."""
+        url = reverse('posts:follow_index')
+        self.client.get(url)
+        response, queries = self.auth_queries(url)
+        self.assertEqual(response.context['user'], self.user)
+        self.assertEqual(queries, [])
+
+    def test_password_change_invalidates_cached_user(self):
+        """После смены пароля старая сессия больше не действует."""
+        url = reverse('posts:follow_index')
+        self.assertEqual(self.client.get(url).status_code, 200)
+        user = User.objects.get(pk=self.user.pk)
+        user.set_password('new_password')
+        user.save()
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 302)
+
+    def test_logout_invalidates_cached_user(self):
+        """Выход из аккаунта сбрасывает закэшированного пользователя."""
+        url = reverse('posts:follow_index')
+        self.client.get(url)
+        self.client.get(reverse('users:logout'))
+        self.assertEqual(self.client.get(url).status_code, 302)
+
+
+class LocalCacheAuthTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='test_user', password='password')
+        self.client = Client()
+        self.client.login(username='test_user', password='password')
+
+    def test_user_not_cached_in_process_memory(self):
+        """С кэшем в памяти процесса блокировка, сделанная другим
+        процессом, действует сразу."""
+        url = reverse('posts:follow_index')
+        self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertFalse(
+            any('auth_user:' in key for key in cache._cache))
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(self.client.get(url).status_code, 302)
+
+
+class PasswordResetTests(TestCase):
+    def test_reset_email_sent_by_worker(self):
+        """Письмо для сброса пароля отправляет фоновая задача."""
+        User.objects.create_user(
+            username='test_user', email='user@example.com',
+            password='old_password')
+        response = self.client.post(
+            reverse('users:password_reset'), {'email': 'user@example.com'})
+        self.assertRedirects(response, reverse('users:password_reset_done'))
+        self.assertEqual(len(mail.outbox), 0)
+        job = Job.objects.get()
+        self.assertEqual(job.name, 'users.send_password_reset')
+        self.assertNotIn('reset/', job.payload)
+        run_pending()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['user@example.com'])
+        self.assertIn('/auth/reset/', mail.outbox[0].body)
@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/2.2/ref/settings/
 """
 
 import os
+import tempfile
 
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
@@ -45,13 +46,47 @@ LOGIN_REDIRECT_URL = 'posts:index'
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
+SITE_URL = os.getenv('SITE_URL', 'http://localhost:8000')
+
 
 CACHES = {
     'default': {
+        'BACKEND': 'core.cache.InstrumentedLocMemCache',
+    },
+    # Буфер счетчиков просмотров и лайков. Отдельный кэш без других
+    # ключей и с большим лимитом, чтобы страницы не вытесняли буфер.
+    'counters': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+        'LOCATION': 'counters',
+        'OPTIONS': {'MAX_ENTRIES': 1000000},
+    },
 }
 
+# Сессии и пользователи кэшируются, только если кэш общий для всех
+# процессов: иначе выход из аккаунта в одном процессе не сбросит копию
+# сессии в остальных.
+if CACHES['default']['BACKEND'].endswith('LocMemCache'):
+    SESSION_ENGINE = 'django.contrib.sessions.backends.db'
+else:
+    SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+
+METRICS_DIR = os.getenv(
+    'METRICS_DIR', os.path.join(tempfile.gettempdir(), 'yatube_metrics')
+)
+METRICS_FLUSH_INTERVAL = 5
+SLOW_QUERY_THRESHOLD = 0.1
+
+COUNTERS_FLUSH_INTERVAL = 60
+
+SITEMAP_SECTION_SIZE = 50000
+SITEMAP_CACHE_DIR = os.getenv(
+    'SITEMAP_CACHE_DIR',
+    os.path.join(tempfile.gettempdir(), 'yatube_sitemaps')
+)
+SITEMAP_CACHE_TIMEOUT = 24 * 60 * 60
+SITEMAP_INDEX_TIMEOUT = 60 * 60
+
 
 # Application definition
 
@@ -71,11 +106,13 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'users.middleware.CachedAuthenticationMiddleware',
+    'core.middleware.HoleMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'debug_toolbar.middleware.DebugToolbarMiddleware',
@@ -90,7 +127,7 @@ INTERNAL_IPS = [
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.template.InstrumentedDjangoTemplates',
         'DIRS': [os.path.join(BASE_DIR, 'templates')],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -28,6 +28,7 @@ urlpatterns = [
     path('auth/', include('users.urls')),
     path('auth/', include('django.contrib.auth.urls')),
     path('about/', include('about.urls', namespace='about')),
+    path('internal/', include('core.urls', namespace='core')),
 ]
 
 if settings.DEBUG: